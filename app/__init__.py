@@ -1,6 +1,12 @@
 # /app/__init__.py
 from flask import Flask
 from config import config_by_name
+from .repositories import create_product_repository
+from .services.product_service import ProductService
+from .utils.security import VerifiedTokenCache
+from .utils.http_cache import ResponseCache
+from .utils.json_codec import HAS_ORJSON, DomainJSONProvider, FastJSONProvider
+from .utils import compression, metrics, rate_limit
 
 
 def create_app(config_name: str) -> Flask:
@@ -12,6 +18,21 @@ def create_app(config_name: str) -> Flask:
     # Carrega as configurações do objeto de configuração correspondente ao ambiente.
     app.config.from_object(config_by_name[config_name])
 
+    # Provider JSON baseado em orjson quando disponível e ativado; ambos serializam os modelos do domínio
+    if app.config["FAST_JSON_PROVIDER"] and HAS_ORJSON:
+        app.json = FastJSONProvider(app)
+    else:
+        app.json = DomainJSONProvider(app)
+
+    # Cria o serviço de produtos sobre o backend de repositório configurado
+    app.extensions["product_service"] = ProductService(
+        create_product_repository(app.config), search_cache_max_results=app.config["SEARCH_CACHE_MAX_RESULTS"]
+    )
+    # Cache de tokens JWT já verificados, usada por token_required
+    app.extensions["token_cache"] = VerifiedTokenCache(app.config["TOKEN_CACHE_SIZE"])
+    # Cache de respostas serializadas das leituras de produtos, invalidada pela versão do repositório
+    app.extensions["response_cache"] = ResponseCache(app.config["RESPONSE_CACHE_MAX_BYTES"])
+
     # Importa e regista os blueprints (nossos controladores)
     from .controllers.auth_controller import auth_api as auth_blueprint
     from .controllers.product_controller import product_api as product_blueprint
@@ -19,6 +40,19 @@ def create_app(config_name: str) -> Flask:
     app.register_blueprint(auth_blueprint, url_prefix='/auth')
     app.register_blueprint(product_blueprint, url_prefix='/produtos')
 
+    # Comandos 'flask products import/export' para carga e cópia do catálogo
+    from .cli import products_cli
+    app.cli.add_command(products_cli)
+
+    # Limites de taxa e de concorrência por parceiro, aplicados por token_required
+    rate_limit.init_app(app)
+    # Latência por endpoint e status, e a rota /metrics no formato do Prometheus
+    metrics.init_app(app)
+    # Compressão gzip/deflate/brotli das respostas, negociada pelo Accept-Encoding.
+    # Registada depois das métricas: os hooks after_request correm em ordem inversa,
+    # por isso a latência medida inclui a compressão.
+    compression.init_app(app)
+
     # Adiciona uma rota raiz para verificar o status da API
     @app.route("/")
     def index():
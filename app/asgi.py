@@ -0,0 +1,297 @@
+# /app/asgi.py
+import asyncio
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from . import create_app
+from .controllers.product_controller import ASYNC_CHANGE_STREAM_KEY
+from .utils.json_codec import dumps_bytes
+from .utils.responses import sse_event
+
+_BODY_TOO_LARGE = dumps_bytes({"status": "error", "erro": {"message": "O corpo da requisição é grande demais."}})
+
+
+class _ChangeStreamRequest:
+    """Recebe do controlador os parâmetros de um stream de alterações aceite."""
+    __slots__ = ("service", "since", "heartbeat", "limit")
+
+    def __init__(self):
+        self.service = None
+
+    def open(self, service, since, heartbeat, limit):
+        self.service = service
+        self.since = since
+        self.heartbeat = heartbeat
+        self.limit = limit
+
+
+class _VersionWatcher:
+    """
+    Uma única thread espera por alterações no repositório (wait_for_changes) e
+    acorda, no event loop, todos os streams à espera. Assim, milhares de clientes
+    SSE parados não ocupam uma thread cada.
+    """
+
+    def __init__(self, service, loop, poll_timeout=1.0):
+        self.service = service
+        self.loop = loop
+        self.version = service.get_catalogue_version()
+        self.poll_timeout = poll_timeout
+        self._waiters = set()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="asgi-version-watcher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        version = self.version
+        while not self._stopped.is_set():
+            if self.service.wait_for_changes(version, self.poll_timeout):
+                version = self.service.get_catalogue_version()
+                try:
+                    self.loop.call_soon_threadsafe(self._notify, version)
+                except RuntimeError:
+                    # O event loop já foi fechado
+                    return
+
+    def _notify(self, version):
+        self.version = version
+        waiters, self._waiters = self._waiters, set()
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(True)
+
+    async def wait(self, since, timeout):
+        """Espera até a versão passar de `since`; retorna False se o tempo esgotar."""
+        if self.version > since:
+            return True
+        waiter = self.loop.create_future()
+        self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return self.version > since
+        finally:
+            self._waiters.discard(waiter)
+
+    def stop(self):
+        self._stopped.set()
+
+
+class ASGIAdapter:
+    """
+    Serve a aplicação Flask num servidor ASGI (por exemplo, `uvicorn asgi:app`).
+    Cada requisição corre a aplicação WSGI, com as mesmas rotas, autenticação,
+    envelope e hooks, num pool de threads limitado, para não bloquear o event
+    loop; respostas em streaming são lidas bloco a bloco no pool. O stream de
+    alterações (/produtos/changes/stream) é produzido no próprio event loop:
+    uma conexão SSE aberta não ocupa nenhuma thread enquanto espera.
+    """
+
+    def __init__(self, flask_app, max_workers=None):
+        self.app = flask_app
+        self.executor = ThreadPoolExecutor(
+            max_workers or flask_app.config["ASGI_THREADS"], thread_name_prefix="asgi-worker"
+        )
+        self._watcher = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise ValueError(f"Tipo de conexão ASGI não suportado: {scope['type']}")
+
+        # Sem o servidor WSGI, o limite do corpo é aplicado aqui, antes de o guardar em memória
+        max_size = self.app.config["MAX_CONTENT_LENGTH"] or self.app.config["ASGI_MAX_BODY_SIZE"]
+        body = await _read_body(scope, receive, max_size)
+        if body is None:
+            await _send_body_too_large(send)
+            return
+        environ = _build_environ(scope, body)
+        stream = environ[ASYNC_CHANGE_STREAM_KEY] = _ChangeStreamRequest()
+        loop = asyncio.get_running_loop()
+        status, headers, chunks = await loop.run_in_executor(self.executor, self._call_wsgi, environ)
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+
+        if stream.service is not None:
+            await _close(chunks, loop, self.executor)
+            await self._send_until_disconnect(self._change_events(stream), send, receive)
+        else:
+            await self._send_until_disconnect(self._iter_chunks(chunks, loop), send, receive)
+
+    def _call_wsgi(self, environ):
+        """Corre a aplicação WSGI (numa thread do pool) e lê o corpo se não for um stream."""
+        response_start = []
+
+        def start_response(status, headers, exc_info=None):
+            response_start[:] = [status, headers]
+
+        app_iter = self.app(environ, start_response)
+        status, headers = response_start
+        encoded_headers = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+        if any(name.lower() == "content-length" for name, _ in headers):
+            try:
+                chunks = [b"".join(app_iter)]
+            finally:
+                if hasattr(app_iter, "close"):
+                    app_iter.close()
+        else:
+            chunks = app_iter
+        return int(status.split(" ", 1)[0]), encoded_headers, chunks
+
+    async def _iter_chunks(self, chunks, loop):
+        """Percorre o corpo; blocos de um gerador (exportações) são lidos no pool."""
+        if isinstance(chunks, list):
+            for chunk in chunks:
+                yield chunk
+            return
+        iterator = iter(chunks)
+        try:
+            while True:
+                chunk = await loop.run_in_executor(self.executor, next, iterator, None)
+                if chunk is None:
+                    return
+                if chunk:
+                    yield chunk
+        finally:
+            await _close(chunks, loop, self.executor)
+
+    async def _change_events(self, stream):
+        """Versão assíncrona do gerador de eventos de stream_product_changes."""
+        loop = asyncio.get_running_loop()
+        service, position = stream.service, stream.since
+        if self._watcher is None:
+            self._watcher = _VersionWatcher(service, loop)
+        yield sse_event("ready", {"storage_id": service.storage_id, "since": position})
+        while True:
+            changes, error_message = await loop.run_in_executor(
+                self.executor, service.get_changes, position, stream.limit
+            )
+            if error_message:
+                yield sse_event("reset", {"message": error_message})
+                return
+            if changes:
+                yield b"".join(sse_event(change["op"], change, change["version"]) for change in changes)
+                position = changes[-1]["version"]
+            elif not await self._watcher.wait(position, stream.heartbeat):
+                yield b": keep-alive\n\n"
+
+    async def _send_until_disconnect(self, chunks, send, receive):
+        """Envia o corpo e termina cedo se o cliente desligar (streams que não acabam)."""
+        async def pump():
+            async for chunk in chunks:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+        pump_task = asyncio.ensure_future(pump())
+        disconnect_task = asyncio.ensure_future(_wait_for_disconnect(receive))
+        await asyncio.wait((pump_task, disconnect_task), return_when=asyncio.FIRST_COMPLETED)
+        if pump_task.done():
+            disconnect_task.cancel()
+            pump_task.result()
+            return
+        pump_task.cancel()
+        try:
+            await pump_task
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await chunks.aclose()
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def close(self):
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+        self.executor.shutdown(wait=False)
+
+
+async def _read_body(scope, receive, max_size):
+    """Lê o corpo da requisição; retorna None, sem o ler até ao fim, se passar de `max_size` bytes."""
+    for name, value in scope.get("headers", ()):
+        if name.lower() == b"content-length" and value.isdigit() and int(value) > max_size:
+            return None
+    parts = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > max_size:
+            return None
+        parts.append(chunk)
+        if not message.get("more_body", False):
+            break
+    return b"".join(parts)
+
+
+async def _send_body_too_large(send):
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(_BODY_TOO_LARGE)).encode())]
+    await send({"type": "http.response.start", "status": 413, "headers": headers})
+    await send({"type": "http.response.body", "body": _BODY_TOO_LARGE, "more_body": False})
+
+
+async def _wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def _close(chunks, loop, executor):
+    if hasattr(chunks, "close"):
+        await loop.run_in_executor(executor, chunks.close)
+
+
+def _build_environ(scope, body):
+    """Traduz o scope ASGI de uma requisição HTTP para um environ WSGI (PEP 3333)."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", ()):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+            continue
+        if name == "CONTENT_LENGTH":
+            continue
+        key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def create_asgi_app(config_name):
+    """Cria a aplicação Flask e envolve-a no adaptador ASGI."""
+    return ASGIAdapter(create_app(config_name))
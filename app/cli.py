@@ -0,0 +1,178 @@
+# /app/cli.py
+import csv
+import io
+import os
+import sys
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from .utils.json_codec import loads
+
+products_cli = AppGroup("products", help="Importação e exportação do catálogo de produtos.")
+
+FORMATS = ("jsonl", "csv")
+CSV_COLUMNS = ("id", "name", "price", "description")
+# Número máximo de erros de importação mostrados (os restantes são só contados)
+MAX_REPORTED_ERRORS = 20
+
+
+def _format_for(path, chosen):
+    if chosen:
+        return chosen
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+class _ByteCounter:
+    """Linhas (bytes) de um ficheiro binário, contando quantos bytes já foram lidos."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.bytes_read = 0
+
+    def __iter__(self):
+        for line in self.stream:
+            self.bytes_read += len(line)
+            yield line
+
+
+def _jsonl_records(lines):
+    """Pares (número da linha, dados ou mensagem de erro) de um ficheiro JSON Lines."""
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, loads(line), None
+        except ValueError:
+            yield line_number, None, "JSON inválido."
+
+
+def _csv_value(field, value):
+    if field == "price":
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _csv_records(lines):
+    """Pares (número da linha, dados ou mensagem de erro) de um CSV com cabeçalho."""
+    reader = csv.DictReader(line.decode("utf-8-sig") for line in lines)
+    for row in reader:
+        if None in row:
+            yield reader.line_num, None, "Linha com mais colunas do que o cabeçalho."
+            continue
+        # Colunas vazias (por exemplo, sem descrição) contam como ausentes
+        yield reader.line_num, {k: _csv_value(k, v) for k, v in row.items() if v not in ("", None)}, None
+
+
+@products_cli.command("import")
+@click.argument("path")
+@click.option("--format", "file_format", type=click.Choice(FORMATS), help="Padrão: pela extensão do ficheiro.")
+@click.option("--batch-size", default=5_000, show_default=True, help="Produtos gravados por lote.")
+def import_products(path, file_format, batch_size):
+    """
+    Importa produtos de PATH (JSON Lines ou CSV; '-' para a entrada padrão), em
+    lotes e com memória constante. Cada produto é validado com as regras da API;
+    os IDs do ficheiro são ignorados e o repositório atribui novos IDs.
+    """
+    service = current_app.extensions["product_service"]
+    if current_app.config["PRODUCT_REPOSITORY"] == "memory" and not current_app.config.get("PRODUCT_STORE_DIR"):
+        click.echo("Aviso: o backend 'memory' sem PRODUCT_STORE_DIR não guarda a importação "
+                   "depois de o comando terminar.", err=True)
+
+    stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+    total_bytes = None if path == "-" else os.fstat(stream.fileno()).st_size
+    counter = _ByteCounter(stream)
+    records = _csv_records(counter) if _format_for(path, file_format) == "csv" else _jsonl_records(counter)
+
+    done = rejected = 0
+    batch, batch_lines = [], []
+    # A linha de progresso é reescrita com '\r'; os erros abrem uma linha nova
+    progress_shown = False
+
+    def report(line_number, message):
+        nonlocal rejected, progress_shown
+        rejected += 1
+        if rejected <= MAX_REPORTED_ERRORS:
+            prefix = "\n" if progress_shown else ""
+            click.echo(f"{prefix}Linha {line_number}: {message}", err=True)
+            progress_shown = False
+
+    def flush():
+        nonlocal done, progress_shown
+        if not batch:
+            return
+        for result, line_number in zip(service.create_products(batch), batch_lines):
+            if "erro" in result:
+                report(line_number, result["erro"]["message"])
+            else:
+                done += 1
+        batch.clear()
+        batch_lines.clear()
+        percent = f" ({counter.bytes_read * 100 // total_bytes}%)" if total_bytes else ""
+        click.echo(f"\r{done} produtos importados, {rejected} rejeitados{percent}", err=True, nl=False)
+        progress_shown = True
+
+    try:
+        for line_number, data, error_message in records:
+            if error_message:
+                report(line_number, error_message)
+                continue
+            if isinstance(data, dict):
+                data.pop("id", None)
+            batch.append(data)
+            batch_lines.append(line_number)
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+    if progress_shown:
+        click.echo(err=True)
+    if rejected > MAX_REPORTED_ERRORS:
+        click.echo(f"... e mais {rejected - MAX_REPORTED_ERRORS} erros.", err=True)
+    click.echo(f"{done} produtos importados, {rejected} rejeitados.")
+    if rejected:
+        sys.exit(1)
+
+
+@products_cli.command("export")
+@click.argument("path")
+@click.option("--format", "file_format", type=click.Choice(FORMATS), help="Padrão: pela extensão do ficheiro.")
+@click.option("--batch-size", default=5_000, show_default=True, help="Produtos lidos por página.")
+def export_products(path, file_format, batch_size):
+    """
+    Exporta o catálogo para PATH (JSON Lines ou CSV; '-' para a saída padrão),
+    página a página por cursor, sem carregar o catálogo inteiro numa lista.
+    Escritas feitas durante a exportação podem ou não aparecer no ficheiro.
+    """
+    service = current_app.extensions["product_service"]
+    to_stdout = path == "-"
+    output = sys.stdout.buffer if to_stdout else open(path, "wb")
+    exported = 0
+    try:
+        if _format_for(path, file_format) == "csv":
+            text = io.TextIOWrapper(output, encoding="utf-8", newline="")
+            writer = csv.writer(text)
+            writer.writerow(CSV_COLUMNS)
+            for products in service.iter_product_batches(batch_size):
+                writer.writerows(
+                    (p.id, p.name, p.price, "" if p.description is None else p.description) for p in products
+                )
+                exported += len(products)
+            text.flush()
+            # Devolve o ficheiro binário sem o fechar (a saída padrão continua aberta)
+            text.detach()
+        else:
+            # Reutiliza o JSON já codificado de cada produto: uma linha por produto
+            for fragments in service.iter_encoded_product_batches(batch_size):
+                output.write(b"\n".join(fragments) + b"\n")
+                exported += len(fragments)
+        output.flush()
+    finally:
+        if not to_stdout:
+            output.close()
+    click.echo(f"{exported} produtos exportados.", err=True)
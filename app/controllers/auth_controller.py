@@ -6,11 +6,13 @@ from ..utils.responses import success_response, bad_request_error, unauthorized_
 
 auth_api = Blueprint('auth_api', __name__)
 
-# Simulação de um banco de dados de parceiros autorizados
+# Simulação de um banco de dados de parceiros autorizados. 'rate_limit' define os
+# limites do parceiro (ver app/utils/rate_limit.py); sem ele vale RATE_LIMIT_DEFAULT.
 AUTHORIZED_PARTNERS = {
     "partner_123": {
         "secret": "super_secret_key_123",
-        "permissions": ["read", "write"]
+        "permissions": ["read", "write"],
+        "rate_limit": {"requests_per_second": 200, "burst": 400, "max_concurrent": 16},
     }
 }
 
@@ -1,20 +1,74 @@
 # /app/controllers/product_controller.py
-from flask import request, Blueprint
+import math
+from flask import request, Blueprint, current_app
 from http import HTTPStatus
-from ..services.product_service import ProductService
+from werkzeug.local import LocalProxy
+from ..models.product_model import Product
+from ..repositories.prefix_index import normalize_text
 from ..utils.security import token_required
-from ..utils.responses import success_response, bad_request_error, not_found_error
+from ..utils.responses import (
+    success_response, success_body, success_item_body, success_page_body,
+    streamed_list_response, sse_event, event_stream_response,
+    error_response, bad_request_error, not_found_error,
+)
+from ..utils.pagination import (
+    encode_cursor, parse_fields_arg, parse_filter_args, parse_limit_arg, parse_page_args,
+)
+from ..utils.http_cache import cached_success_response, not_modified_response
 
 product_api = Blueprint('product_api', __name__)
-product_service = ProductService()
+# O serviço é criado em create_app com o backend de repositório configurado.
+product_service = LocalProxy(lambda: current_app.extensions["product_service"])
+# Parâmetros que fazem a listagem retornar uma página em vez do catálogo completo
+_PAGE_ARGS = ("limit", "cursor", "sort", "min_price", "max_price")
+# Chave do environ onde o adaptador ASGI (app/asgi.py) recebe os parâmetros do stream
+# de alterações para produzir os eventos no event loop, sem ocupar uma thread.
+ASYNC_CHANGE_STREAM_KEY = "df_api.async_change_stream"
 
 
 @product_api.route("", methods=['GET'])
 @token_required
 def get_all_products():
-    """Retorna uma lista de todos os produtos."""
-    products = product_service.get_all_products()
-    return success_response(products)
+    """
+    Lista os produtos. Com 'limit', 'cursor', 'sort' (id, name ou price),
+    'min_price' e/ou 'max_price' retorna uma página filtrada e ordenada;
+    sem eles, exporta o catálogo completo em streaming. 'fields' limita os
+    campos de cada produto (por exemplo, 'fields=id,price').
+    """
+    config = current_app.config
+    try:
+        fields = parse_fields_arg(request.args, Product.FIELDS)
+    except ValueError as e:
+        return bad_request_error(str(e))
+    version = product_service.get_catalogue_version()
+    etag = f"{product_service.storage_id}-{version}"
+
+    if any(name in request.args for name in _PAGE_ARGS):
+        try:
+            sort, min_price, max_price = parse_filter_args(request.args, Product.SORT_FIELDS)
+            limit, after = parse_page_args(
+                request.args, config["PRODUCTS_PAGE_SIZE"], config["PRODUCTS_MAX_PAGE_SIZE"], sort
+            )
+        except ValueError as e:
+            return bad_request_error(str(e))
+
+        def load_page():
+            fragments, next_key = product_service.get_encoded_products_page(
+                limit, after, sort, min_price, max_price, fields
+            )
+            next_cursor = encode_cursor(next_key) if next_key is not None else None
+            return success_page_body(fragments, next_cursor)
+
+        key = ("page", limit, after, sort, min_price, max_price, fields)
+        return cached_success_response(key, version, etag, load_page)
+
+    response = not_modified_response(etag)
+    if response is not None:
+        return response
+    batches = product_service.iter_encoded_product_batches(config["PRODUCTS_STREAM_BATCH_SIZE"], fields)
+    response = streamed_list_response(batches)
+    response.set_etag(etag)
+    return response
 
 
 @product_api.route("", methods=['POST'])
@@ -30,11 +84,23 @@ def create_product():
 @product_api.route("/<int:pid>", methods=['GET'])
 @token_required
 def get_product_by_id(pid):
-    """Busca um produto específico pelo seu ID."""
-    prod = product_service.get_product_by_id(pid)
-    if not prod:
+    """Busca um produto específico pelo seu ID ('fields' limita os campos retornados)."""
+    try:
+        fields = parse_fields_arg(request.args, Product.FIELDS)
+    except ValueError as e:
+        return bad_request_error(str(e))
+    version = product_service.get_product_version(pid)
+    response = None
+    if version is not None:
+        etag = f"{product_service.storage_id}-{pid}-{version}"
+        def load_product():
+            fragment = product_service.get_encoded_product(pid, fields)
+            return success_item_body(fragment) if fragment is not None else None
+
+        response = cached_success_response(("product", pid, fields), version, etag, load_product)
+    if response is None:
         return not_found_error("Produto")
-    return success_response(prod)
+    return response
 
 
 @product_api.route("/<int:pid>", methods=['PUT', 'PATCH'])
@@ -43,6 +109,8 @@ def update_product(pid):
     """Atualiza um produto existente."""
     updated_prod, error_message = product_service.update_product(pid, request.json)
     if error_message:
+        return bad_request_error(error_message)
+    if updated_prod is None:
         return not_found_error("Produto")
     return success_response(updated_prod)
 
@@ -58,21 +126,231 @@ def delete_product(pid):
     return success_response(status_code=HTTPStatus.NO_CONTENT)
 
 
+def _read_batch():
+    """
+    Lê o corpo de uma requisição em lote e o parâmetro 'fields', que limita os
+    campos dos produtos retornados. Retorna (itens, campos, mensagem de erro).
+    """
+    try:
+        fields = parse_fields_arg(request.args, Product.FIELDS)
+    except ValueError as e:
+        return None, None, str(e)
+    items = request.get_json(silent=True)
+    if not isinstance(items, list) or not items:
+        return None, None, "O corpo da requisição deve ser uma lista JSON não vazia."
+    max_items = current_app.config["PRODUCTS_MAX_BATCH_SIZE"]
+    if len(items) > max_items:
+        return None, None, f"O lote excede o máximo de {max_items} itens."
+    return items, fields, None
+
+
+def _batch_response(results, fields=None):
+    """Resposta de um lote: resultado por item (com os campos `fields` de cada produto) e totais."""
+    if fields is not None:
+        for result in results:
+            if "data" in result:
+                result["data"] = result["data"].to_dict(fields)
+    failed = sum(1 for result in results if "erro" in result)
+    return success_response({"results": results, "succeeded": len(results) - failed, "failed": failed})
+
+
+@product_api.route("/batch", methods=['POST'])
+@token_required
+def create_products_batch():
+    """Cria vários produtos numa única requisição."""
+    items, fields, error_message = _read_batch()
+    if error_message:
+        return bad_request_error(error_message)
+    return _batch_response(product_service.create_products(items), fields)
+
+
+@product_api.route("/batch", methods=['PUT', 'PATCH'])
+@token_required
+def update_products_batch():
+    """Atualiza vários produtos numa única requisição. Cada item deve conter o 'id'."""
+    items, fields, error_message = _read_batch()
+    if error_message:
+        return bad_request_error(error_message)
+    return _batch_response(product_service.update_products(items), fields)
+
+
+@product_api.route("/batch", methods=['DELETE'])
+@token_required
+def delete_products_batch():
+    """Deleta vários produtos numa única requisição. O corpo é uma lista de IDs."""
+    ids, _, error_message = _read_batch()
+    if error_message:
+        return bad_request_error(error_message)
+    return _batch_response(product_service.delete_products(ids))
+
+
 @product_api.route("/count", methods=['GET'])
 @token_required
 def get_products_count():
     """Retorna a contagem total de produtos."""
-    count = product_service.get_products_count()
-    return success_response({"total_produtos": count})
+    version = product_service.get_catalogue_version()
+    etag = f"{product_service.storage_id}-{version}"
+    return cached_success_response(
+        ("count",), version, etag, lambda: success_body({"total_produtos": product_service.get_products_count()})
+    )
+
+
+def _read_bucket_edges():
+    """Lê os limites do histograma ('buckets=0,10,50'). Retorna (limites, mensagem de erro)."""
+    config = current_app.config
+    raw = request.args.get("buckets")
+    if raw is None:
+        return tuple(config["PRODUCTS_STATS_BUCKETS"]), None
+    try:
+        edges = tuple(float(value) for value in raw.split(","))
+    except ValueError:
+        return None, "O parâmetro 'buckets' deve ser uma lista de números separados por vírgula."
+    if not all(math.isfinite(edge) for edge in edges) or any(a >= b for a, b in zip(edges, edges[1:])):
+        return None, "Os limites de 'buckets' devem ser números finitos em ordem crescente."
+    if len(edges) > config["PRODUCTS_STATS_MAX_BUCKETS"]:
+        return None, f"O parâmetro 'buckets' aceita no máximo {config['PRODUCTS_STATS_MAX_BUCKETS']} limites."
+    return edges, None
+
+
+@product_api.route("/stats", methods=['GET'])
+@token_required
+def get_products_stats():
+    """Retorna estatísticas de preço do catálogo (soma, média, mínimo, máximo e histograma)."""
+    edges, error_message = _read_bucket_edges()
+    if error_message:
+        return bad_request_error(error_message)
+    version = product_service.get_catalogue_version()
+    etag = f"{product_service.storage_id}-{version}"
+    return cached_success_response(
+        ("stats", edges), version, etag, lambda: success_body(product_service.get_catalogue_stats(edges))
+    )
+
+
+def _read_since(default=None):
+    """
+    Lê a versão a partir da qual enviar alterações: o parâmetro 'since' ou o
+    cabeçalho Last-Event-ID (reconexão do EventSource). Retorna (versão, mensagem de erro).
+    """
+    raw = request.args.get("since", request.headers.get("Last-Event-ID"))
+    if raw is None:
+        if default is None:
+            return None, "O parâmetro 'since' é obrigatório."
+        return default, None
+    try:
+        since = int(raw)
+    except ValueError:
+        since = -1
+    if since < 0:
+        return None, "O parâmetro 'since' deve ser um número inteiro não negativo."
+    if since > product_service.get_catalogue_version():
+        return None, "A versão 'since' é posterior à versão atual do catálogo."
+    return since, None
+
+
+@product_api.route("/changes", methods=['GET'])
+@token_required
+def get_product_changes():
+    """
+    Retorna as alterações (create, update, delete, clear) posteriores à versão
+    'since', em ordem. 'next_since' é a versão a enviar na consulta seguinte.
+    """
+    since, error_message = _read_since()
+    if error_message:
+        return bad_request_error(error_message)
+    try:
+        config = current_app.config
+        limit = parse_limit_arg(request.args, config["CHANGES_PAGE_SIZE"], config["CHANGES_PAGE_SIZE"])
+    except ValueError as e:
+        return bad_request_error(str(e))
+
+    changes, error_message = product_service.get_changes(since, limit)
+    if error_message:
+        return error_response(error_message, HTTPStatus.GONE)
+    return success_response({
+        "storage_id": product_service.storage_id,
+        "changes": changes,
+        "next_since": changes[-1]["version"] if changes else since,
+        "has_more": len(changes) == limit,
+    })
+
+
+@product_api.route("/changes/stream", methods=['GET'])
+@token_required
+def stream_product_changes():
+    """
+    Envia as alterações em tempo real (Server-Sent Events), a partir de 'since',
+    do cabeçalho Last-Event-ID ou, sem eles, da versão atual. O ID de cada evento
+    é a versão da alteração. Se o histórico já não chegar à versão pedida, envia
+    um evento 'reset' e termina: o cliente deve sincronizar a listagem completa.
+    """
+    since, error_message = _read_since(default=product_service.get_catalogue_version())
+    if error_message:
+        return bad_request_error(error_message)
+    # O gerador corre fora do contexto da requisição.
+    service = product_service._get_current_object()
+    heartbeat = current_app.config["CHANGES_STREAM_HEARTBEAT"]
+    limit = current_app.config["CHANGES_PAGE_SIZE"]
+
+    async_stream = request.environ.get(ASYNC_CHANGE_STREAM_KEY)
+    if async_stream is not None:
+        async_stream.open(service, since, heartbeat, limit)
+        return event_stream_response(())
+
+    def generate():
+        position = since
+        yield sse_event("ready", {"storage_id": service.storage_id, "since": position})
+        while True:
+            changes, error_message = service.get_changes(position, limit)
+            if error_message:
+                yield sse_event("reset", {"message": error_message})
+                return
+            if changes:
+                yield b"".join(sse_event(change["op"], change, change["version"]) for change in changes)
+                position = changes[-1]["version"]
+            elif not service.wait_for_changes(position, heartbeat):
+                # Comentário SSE: mantém a conexão viva em proxies com timeout de inatividade
+                yield b": keep-alive\n\n"
+
+    return event_stream_response(generate())
 
 
 @product_api.route("/search", methods=['GET'])
 @token_required
 def search_product_by_name():
-    """Busca produtos por nome."""
+    """Busca produtos por nome ('fields' limita os campos retornados)."""
     name = request.args.get("name")
     if not name:
         return bad_request_error("O parâmetro 'name' é obrigatório.")
+    try:
+        fields = parse_fields_arg(request.args, Product.FIELDS)
+    except ValueError as e:
+        return bad_request_error(str(e))
 
     products = product_service.get_products_by_name(name)
+    if fields is not None:
+        products = [product.to_dict(fields) for product in products]
     return success_response(products)
+
+
+@product_api.route("/autocomplete", methods=['GET'])
+@token_required
+def autocomplete_products():
+    """
+    Sugestões para o prefixo digitado ('prefix'): até 'k' pares ID/nome, primeiro
+    os nomes que começam por ele e depois os que têm uma palavra que começa por ele.
+    Ignora maiúsculas e acentos.
+    """
+    config = current_app.config
+    prefix = normalize_text(request.args.get("prefix", ""))
+    if not prefix:
+        return bad_request_error("O parâmetro 'prefix' é obrigatório.")
+    try:
+        k = parse_limit_arg(request.args, config["AUTOCOMPLETE_DEFAULT_K"], config["AUTOCOMPLETE_MAX_K"], "k")
+    except ValueError as e:
+        return bad_request_error(str(e))
+
+    version = product_service.get_catalogue_version()
+    etag = f"{product_service.storage_id}-{version}"
+    return cached_success_response(
+        ("autocomplete", prefix, k), version, etag, lambda: success_body(product_service.get_autocomplete(prefix, k))
+    )
@@ -0,0 +1,119 @@
+# /app/models/product_model.py
+import math
+from ..utils.json_codec import dumps_bytes
+
+# Maior preço inteiro aceite: o limite dos inteiros do SQLite e do orjson (64 bits com sinal)
+MAX_INTEGER_PRICE = 2**63 - 1
+
+
+class Product:
+    """
+    Produto do catálogo. Usa __slots__ (sem __dict__ por instância) e é tratado
+    como imutável depois de gravado: as alterações criam um novo objeto com
+    `replace`, o que permite guardar em cache o seu JSON codificado.
+    """
+
+    __slots__ = ("id", "name", "price", "description", "_encoded")
+
+    # Campos públicos, na ordem em que são serializados
+    FIELDS = ("id", "name", "price", "description")
+    # Campos que os clientes podem enviar na criação e na atualização
+    WRITABLE_FIELDS = ("name", "price", "description")
+    # Ordenações aceitas na listagem
+    SORT_FIELDS = ("id", "name", "price")
+
+    def __init__(self, id, name, price, description=None):
+        self.id = id
+        self.name = name
+        self.price = price
+        self.description = description
+        self._encoded = None
+
+    @staticmethod
+    def validate(data, partial=False):
+        """
+        Valida os dados recebidos de um cliente. Com `partial`, valida apenas os
+        campos presentes (atualizações). Retorna a mensagem de erro ou None.
+        """
+        if not isinstance(data, dict):
+            return "Os dados do produto devem ser um objeto JSON."
+        unknown = [field for field in data if field not in Product.WRITABLE_FIELDS]
+        if unknown:
+            return f"Campos desconhecidos: {', '.join(sorted(map(str, unknown)))}."
+
+        required = [field for field in ("name", "price") if not partial or field in data]
+        if any(not data.get(field) for field in required):
+            return "Nome e preço são obrigatórios."
+        if "name" in required and not isinstance(data["name"], str):
+            return "O nome do produto deve ser um texto."
+        if "price" in required:
+            price = data["price"]
+            if isinstance(price, bool) or not isinstance(price, (int, float)) or not math.isfinite(price):
+                return "O preço do produto deve ser numérico."
+            if price < 0:
+                return "O preço do produto não pode ser negativo."
+            if isinstance(price, int) and price > MAX_INTEGER_PRICE:
+                return "O preço do produto é grande demais."
+        description = data.get("description")
+        if description is not None and not isinstance(description, str):
+            return "A descrição do produto deve ser um texto."
+        return None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Cria um produto a partir de um dict (por exemplo, lido do armazenamento)."""
+        return cls(data.get("id"), data["name"], data["price"], data.get("description"))
+
+    def to_dict(self, fields=None):
+        """
+        Converte para dict, omitindo a descrição quando não existe. Com `fields`
+        (subconjunto de FIELDS), inclui apenas esses campos.
+        """
+        if fields is not None:
+            return {
+                field: getattr(self, field) for field in fields
+                if field != "description" or self.description is not None
+            }
+        data = {"id": self.id, "name": self.name, "price": self.price}
+        if self.description is not None:
+            data["description"] = self.description
+        return data
+
+    def to_json(self, fields=None):
+        """
+        JSON codificado (bytes) do produto, calculado uma única vez por objeto.
+        Com `fields`, codifica só esses campos (sem guardar em cache).
+        """
+        if fields is not None:
+            return dumps_bytes(self.to_dict(fields))
+        if self._encoded is None:
+            self._encoded = dumps_bytes(self.to_dict())
+        return self._encoded
+
+    def sort_key(self, sort):
+        """
+        Chave do produto na ordenação `sort`, usada também como cursor: o ID para
+        'id' e o par (nome em minúsculas ou preço, ID) para as outras, o que
+        desempata produtos com o mesmo nome ou preço.
+        """
+        if sort == "price":
+            return self.price, self.id
+        if sort == "name":
+            return self.name.lower(), self.id
+        return self.id
+
+    def replace(self, **changes):
+        """Retorna um novo produto com os campos alterados (o original fica intacto)."""
+        values = {field: getattr(self, field) for field in self.FIELDS}
+        values.update(changes)
+        return Product(**values)
+
+    def __eq__(self, other):
+        if not isinstance(other, Product):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.FIELDS)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Product(id={self.id!r}, name={self.name!r}, price={self.price!r})"
@@ -0,0 +1,27 @@
+# /app/repositories/__init__.py
+
+
+def create_product_repository(config):
+    """Cria o repositório de produtos indicado por PRODUCT_REPOSITORY na configuração."""
+    backend = config.get("PRODUCT_REPOSITORY", "memory")
+    if backend == "memory":
+        from .product_repository import ProductRepository, configure_change_feed, enable_durability
+        configure_change_feed(config["CHANGE_LOG_RETENTION"])
+        if config.get("PRODUCT_STORE_DIR"):
+            enable_durability(
+                config["PRODUCT_STORE_DIR"],
+                config["PRODUCT_STORE_SNAPSHOT_EVERY"],
+                config["PRODUCT_STORE_FSYNC"],
+            )
+        return ProductRepository()
+    if backend == "sqlite":
+        from .sqlite_product_repository import SQLiteProductRepository
+        return SQLiteProductRepository(
+            config["SQLITE_DATABASE_PATH"], config["SQLITE_POOL_SIZE"], config["CHANGE_LOG_RETENTION"]
+        )
+    if backend == "shared":
+        from .shared_product_repository import SharedMemoryProductRepository
+        return SharedMemoryProductRepository(
+            config["SHARED_STORE_PATH"], config["SHARED_STORE_CAPACITY"], config["CHANGE_LOG_RETENTION"]
+        )
+    raise ValueError(f"Backend de repositório desconhecido: {backend}")
@@ -0,0 +1,140 @@
+# /app/repositories/base_repository.py
+import time
+
+
+class BaseProductRepository:
+    """
+    Interface comum dos repositórios de produtos. Recebem dicts com os dados
+    enviados pelos clientes (já validados pelo serviço) e retornam objetos Product.
+    Cada backend (memória, SQLite) implementa as operações básicas e expõe
+    `storage_id`, que identifica a instância do armazenamento (as versões só são
+    comparáveis dentro dela); os métodos com implementação aqui são construídos
+    sobre as operações básicas e podem ser sobrescritos quando houver algo mais eficiente.
+    """
+
+    def find_all(self):
+        raise NotImplementedError
+
+    def find_page(self, limit, after=None, sort="id", min_price=None, max_price=None):
+        """
+        Retorna até `limit` produtos com preço entre `min_price` e `max_price`
+        (limites opcionais e inclusivos), ordenados por `sort` ('id', 'name' ou
+        'price'), a partir da chave `after` (ver Product.sort_key). Retorna também a
+        chave do último produto, a usar como próximo cursor, ou None na última página.
+        """
+        raise NotImplementedError
+
+    def find_by_id(self, product_id):
+        raise NotImplementedError
+
+    def find_by_name(self, name):
+        raise NotImplementedError
+
+    def autocomplete(self, prefix, limit):
+        """
+        Até `limit` produtos cujo nome começa por `prefix`, seguidos dos que têm uma
+        palavra que começa por ele, cada grupo em ordem alfabética do texto a partir
+        da correspondência. A comparação
+        ignora maiúsculas e acentos (ver prefix_index.normalize_text).
+        """
+        raise NotImplementedError
+
+    def save(self, product_data):
+        raise NotImplementedError
+
+    def update(self, product_id, product_data):
+        raise NotImplementedError
+
+    def delete(self, product_id):
+        raise NotImplementedError
+
+    def count(self):
+        raise NotImplementedError
+
+    def get_version(self):
+        """Versão global do catálogo: cresce a cada escrita e nunca volta atrás."""
+        raise NotImplementedError
+
+    def get_product_version(self, product_id):
+        """Versão global da última alteração do produto, ou None se ele não existe."""
+        raise NotImplementedError
+
+    def get_changes(self, since, limit):
+        """
+        Até `limit` alterações posteriores à versão global `since`, em ordem, como
+        tuplos (versão, operação, id do produto, Product ou None). Retorna None se o
+        histórico retido já não chega até `since`.
+        """
+        raise NotImplementedError
+
+    def wait_for_changes(self, since, timeout, poll_interval=0.5):
+        """Espera até a versão global passar de `since`; retorna False se o tempo esgotar."""
+        deadline = time.monotonic() + timeout
+        while self.get_version() <= since:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(poll_interval, remaining))
+        return True
+
+    def get_price_summary(self):
+        """Agregados de preço do catálogo: (quantidade, soma, mínimo, máximo); mínimo e máximo são None se vazio."""
+        raise NotImplementedError
+
+    def count_by_price(self, edges):
+        """
+        Quantidade de produtos por faixa de preço. Para os limites crescentes
+        `edges`, a faixa i é [edges[i], edges[i + 1]) e a última é [edges[-1], ∞).
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def save_many(self, items):
+        """Insere vários produtos; retorna os produtos criados, na mesma ordem."""
+        return [self.save(item) for item in items]
+
+    def update_many(self, changes):
+        """Aplica vários pares (id, dados); retorna o produto atualizado ou None por item."""
+        return [self.update(product_id, data) for product_id, data in changes]
+
+    def delete_many(self, product_ids):
+        """Exclui vários produtos; retorna um booleano por ID."""
+        return [self.delete(product_id) for product_id in product_ids]
+
+    def iter_batches(self, batch_size):
+        """Percorre todo o catálogo em lotes ordenados por ID, uma página de cada vez."""
+        after = None
+        while True:
+            products, after = self.find_page(batch_size, after)
+            if products:
+                yield products
+            if after is None:
+                return
+
+    def find_page_encoded(self, limit, after=None, sort="id", min_price=None, max_price=None, fields=None):
+        """
+        Como find_page, mas com cada produto já codificado em JSON (bytes). Com
+        `fields`, codifica apenas esses campos (ver Product.to_json).
+        """
+        products, next_key = self.find_page(limit, after, sort, min_price, max_price)
+        return [product.to_json(fields) for product in products], next_key
+
+    def find_by_id_encoded(self, product_id, fields=None):
+        """Como find_by_id, mas com o produto já codificado em JSON (bytes)."""
+        product = self.find_by_id(product_id)
+        return product.to_json(fields) if product is not None else None
+
+    def iter_encoded_batches(self, batch_size, fields=None):
+        """Como iter_batches, com os produtos de cada lote já codificados em JSON."""
+        after = None
+        while True:
+            fragments, after = self.find_page_encoded(batch_size, after, fields=fields)
+            if fragments:
+                yield fragments
+            if after is None:
+                return
+
+    def close(self):
+        """Libera recursos do backend (conexões, ficheiros). Nada a fazer por padrão."""
@@ -0,0 +1,168 @@
+# /app/repositories/catalogue_index.py
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from fractions import Fraction
+from itertools import islice, takewhile
+from .ngram_index import NGramIndex
+from .prefix_index import PrefixIndex
+from .sorted_index import SortedIndex
+
+
+class CatalogueIndex:
+    """
+    Catálogo em memória e os seus índices: produtos e versões por ID, IDs
+    ordenados (paginação por cursor), trigramas dos nomes (busca), prefixos
+    normalizados dos nomes (autocompletar), índices ordenados por (preço, ID) e
+    (nome em minúsculas, ID) (filtros e ordenações) e a soma dos preços
+    (estatísticas). Os produtos nunca são alterados no lugar: `put` substitui o
+    objeto inteiro. Não é thread-safe: quem o usa deve protegê-lo com o seu próprio lock.
+    """
+
+    def __init__(self):
+        self.products = {}
+        # Versão global da última alteração de cada produto
+        self.versions = {}
+        self.ids = []
+        # Soma exata: cada float convertido sem perda, para que somar e subtrair
+        # o mesmo preço não deixe resíduos de arredondamento
+        self.price_total = Fraction(0)
+        self._name_index = NGramIndex()
+        self._prefix_index = PrefixIndex()
+        self._price_index = SortedIndex()
+        self._name_sort_index = SortedIndex()
+
+    # --- Escrita ---
+
+    def put(self, product, version):
+        """Insere o produto, ou substitui o que tem o mesmo ID, atualizando os índices."""
+        product_id = product.id
+        current = self.products.get(product_id)
+        self.products[product_id] = product
+        self.versions[product_id] = version
+        if current is None:
+            ids = self.ids
+            if not ids or product_id > ids[-1]:
+                ids.append(product_id)
+            else:
+                insort(ids, product_id)
+            self._name_index.add(product_id, product.name)
+            self._prefix_index.add(product_id, product.name)
+            self._price_index.add(product.sort_key("price"))
+            self._name_sort_index.add(product.sort_key("name"))
+            self.price_total += Fraction(product.price)
+            return
+        if product.name != current.name:
+            self._name_index.remove(product_id)
+            self._name_index.add(product_id, product.name)
+            self._prefix_index.remove(product_id, current.name)
+            self._prefix_index.add(product_id, product.name)
+            self._name_sort_index.remove(current.sort_key("name"))
+            self._name_sort_index.add(product.sort_key("name"))
+        if product.price != current.price:
+            self._price_index.remove(current.sort_key("price"))
+            self._price_index.add(product.sort_key("price"))
+            self.price_total += Fraction(product.price) - Fraction(current.price)
+
+    def remove(self, product_id):
+        """Remove o produto e retorna-o, ou None se não existir."""
+        product = self.products.pop(product_id, None)
+        if product is None:
+            return None
+        del self.versions[product_id]
+        ids = self.ids
+        del ids[bisect_left(ids, product_id)]
+        self._name_index.remove(product_id)
+        self._prefix_index.remove(product_id, product.name)
+        self._price_index.remove(product.sort_key("price"))
+        self._name_sort_index.remove(product.sort_key("name"))
+        self.price_total -= Fraction(product.price)
+        return product
+
+    def load(self, products, versions):
+        """
+        Substitui todo o conteúdo e reconstrói os índices (cada índice ordenado uma
+        única vez). Os dicts de produtos e versões e a lista de IDs são montados à
+        parte e atribuídos de uma vez no fim: find_by_id, count e
+        get_product_version leem-nos sem lock e nunca veem um catálogo a meio.
+        """
+        ids = sorted(products)
+        new_products = {}
+        self._name_index.clear()
+        for product_id in ids:
+            product = products[product_id]
+            new_products[product_id] = product
+            self._name_index.add(product_id, product.name)
+        self._prefix_index.load((product_id, product.name) for product_id, product in products.items())
+        self._price_index.load(product.sort_key("price") for product in products.values())
+        self._name_sort_index.load(product.sort_key("name") for product in products.values())
+        self.price_total = sum((Fraction(product.price) for product in products.values()), Fraction(0))
+        self.versions = dict(versions)
+        self.ids = ids
+        self.products = new_products
+
+    def clear(self):
+        self.load({}, {})
+
+    # --- Consultas ---
+
+    def search(self, name):
+        """Produtos cujo nome contém `name` (sem diferenciar maiúsculas), ordenados por ID."""
+        products = self.products
+        return [products[pid] for pid in self._name_index.search(name)]
+
+    def autocomplete(self, prefix, limit):
+        """Até `limit` produtos para o prefixo (ver PrefixIndex.search)."""
+        products = self.products
+        return [products[pid] for pid in self._prefix_index.search(prefix, limit, lambda pid: products[pid].name)]
+
+    def page(self, limit, after, sort, min_price, max_price):
+        """Página da listagem a partir da chave `after` (ver BaseProductRepository.find_page)."""
+        products = self.products
+        if min_price is None and max_price is None:
+            if sort == "id":
+                ids = self.ids
+                start = bisect_right(ids, after or 0)
+                keys = ids[start:start + limit + 1]
+            else:
+                index = self._price_index if sort == "price" else self._name_sort_index
+                keys = list(islice(index.irange(after, inclusive=False), limit + 1))
+        elif sort == "price":
+            keys = list(islice(self._price_range(min_price, max_price, after), limit + 1))
+        else:
+            # Outra ordenação com filtro de preço: percorre só os produtos do intervalo
+            # e seleciona os primeiros na ordem pedida.
+            candidates = (products[pid].sort_key(sort) for _, pid in self._price_range(min_price, max_price))
+            if after is not None:
+                candidates = (key for key in candidates if key > after)
+            keys = heapq.nsmallest(limit + 1, candidates)
+
+        has_more = len(keys) > limit
+        keys = keys[:limit]
+        page = [products[key if sort == "id" else key[1]] for key in keys]
+        return page, keys[-1] if has_more else None
+
+    def _price_range(self, min_price, max_price, after=None):
+        """Chaves (preço, ID) do índice de preços no intervalo, a partir da chave `after`."""
+        start, inclusive = (None, True) if min_price is None else ((min_price,), True)
+        if after is not None and (start is None or after >= start):
+            start, inclusive = after, False
+        keys = self._price_index.irange(start, inclusive)
+        if max_price is not None:
+            keys = takewhile(lambda key: key[0] <= max_price, keys)
+        return keys
+
+    def price_summary(self):
+        """(quantidade, soma, mínimo, máximo) dos preços; mínimo e máximo vêm do índice ordenado."""
+        first, last = self._price_index.first(), self._price_index.last()
+        return (
+            len(self.products),
+            float(self.price_total) if self.products else 0,
+            first[0] if first else None,
+            last[0] if last else None,
+        )
+
+    def count_by_price(self, edges):
+        """Contagens por faixa a partir das posições dos limites no índice de preços (O(log n) por limite)."""
+        index = self._price_index
+        ranks = [index.rank((edge,)) for edge in edges] + [len(index)]
+        return [ranks[i + 1] - ranks[i] for i in range(len(edges))]
@@ -0,0 +1,65 @@
+# /app/repositories/change_feed.py
+import threading
+
+# Tipos de alteração registados no histórico
+OP_CREATE = "create"
+OP_UPDATE = "update"
+OP_DELETE = "delete"
+OP_CLEAR = "clear"
+
+
+class ChangeFeed:
+    """
+    Histórico em memória das últimas alterações do catálogo, numeradas pela versão
+    global do repositório. Cada escrita incrementa a versão em exatamente um, por
+    isso as entradas são contíguas e a consulta "desde a versão N" é um acesso
+    direto por posição. Guarda no máximo cerca de `retention` entradas; as mais
+    antigas são descartadas em blocos. É thread-safe e permite esperar por novas
+    alterações (usado pelo stream de eventos).
+    """
+
+    def __init__(self, retention=100_000):
+        self.retention = retention
+        # Tuplos (versão, operação, id do produto, Product ou None)
+        self._entries = []
+        self._last_version = 0
+        self._cond = threading.Condition(threading.Lock())
+
+    def record(self, version, op, product_id=None, product=None):
+        """Regista a alteração que levou o catálogo à versão `version`."""
+        with self._cond:
+            entries = self._entries
+            if self.retention > 0:
+                entries.append((version, op, product_id, product))
+                # Apaga o excesso de uma vez só quando passa de 25% da retenção
+                if len(entries) > self.retention + self.retention // 4:
+                    del entries[:len(entries) - self.retention]
+            self._last_version = version
+            self._cond.notify_all()
+
+    def reset(self, version):
+        """Descarta o histórico: o catálogo foi substituído e está agora na versão `version`."""
+        with self._cond:
+            self._entries = []
+            self._last_version = version
+            self._cond.notify_all()
+
+    def since(self, version, limit):
+        """
+        Retorna até `limit` alterações posteriores à versão `version`, ou None se o
+        histórico já não chega até lá (o cliente deve sincronizar o catálogo completo).
+        """
+        with self._cond:
+            if version >= self._last_version:
+                return []
+            entries = self._entries
+            first = entries[0][0] if entries else self._last_version + 1
+            if version + 1 < first:
+                return None
+            start = version + 1 - first
+            return entries[start:start + limit]
+
+    def wait(self, version, timeout):
+        """Espera até haver uma alteração posterior a `version`; retorna False se o tempo esgotar."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._last_version > version, timeout)
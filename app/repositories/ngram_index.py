@@ -0,0 +1,64 @@
+# /app/repositories/ngram_index.py
+
+
+class NGramIndex:
+    """
+    Índice invertido de n-gramas (trigramas por padrão) para busca por substring.
+    Guarda o texto em minúsculas de cada chave, de modo que a busca produz
+    exatamente o mesmo resultado que `query.lower() in texto.lower()`, mas
+    verificando apenas os candidatos que contêm todos os n-gramas da consulta.
+    Não é thread-safe: o repositório deve protegê-lo com o seu próprio lock.
+    """
+
+    def __init__(self, n=3):
+        self.n = n
+        self._postings = {}
+        self._texts = {}
+
+    def _grams(self, text):
+        n = self.n
+        return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+    def add(self, key, text):
+        text = str(text).lower()
+        self._texts[key] = text
+        postings = self._postings
+        for gram in self._grams(text):
+            keys = postings.get(gram)
+            if keys is None:
+                postings[gram] = {key}
+            else:
+                keys.add(key)
+
+    def remove(self, key):
+        text = self._texts.pop(key, None)
+        if text is None:
+            return
+        for gram in self._grams(text):
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+
+    def search(self, query):
+        """Retorna, ordenadas, as chaves cujo texto contém `query` (sem diferenciar maiúsculas)."""
+        query = query.lower()
+        texts = self._texts
+        if len(query) < self.n:
+            # Consultas curtas não têm n-gramas: verifica os textos já normalizados.
+            return sorted(key for key, text in texts.items() if query in text)
+
+        postings = []
+        for gram in self._grams(query):
+            keys = self._postings.get(gram)
+            if not keys:
+                return []
+            postings.append(keys)
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        return sorted(key for key in candidates if query in texts[key])
+
+    def clear(self):
+        self._postings.clear()
+        self._texts.clear()
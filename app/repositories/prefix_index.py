@@ -0,0 +1,119 @@
+# /app/repositories/prefix_index.py
+import re
+import unicodedata
+from .sorted_index import SortedIndex
+
+# Caracteres de cada termo guardados no índice: prefixos mais longos são
+# confirmados no nome completo do produto.
+TERM_LENGTH = 24
+# Palavras de cada nome indexadas (a primeira é o início do nome)
+MAX_WORDS = 8
+# Separa o termo do ID na chave; é menor que qualquer carácter de um termo
+_SEPARATOR = "\x00"
+
+_WORD_START = re.compile(r"\w+")
+
+
+def normalize_text(text):
+    """Texto para comparação: sem acentos, em minúsculas (casefold) e com espaços simples."""
+    if not text.isascii():
+        decomposed = unicodedata.normalize("NFKD", text)
+        text = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(text.casefold().split())
+
+
+def _suffixes(normalized):
+    """Posições onde começam as primeiras MAX_WORDS palavras do texto normalizado."""
+    starts = []
+    for match in _WORD_START.finditer(normalized):
+        starts.append(match.start())
+        if len(starts) == MAX_WORDS:
+            break
+    return starts
+
+
+def prefix_terms(text):
+    """
+    Termos indexados de um nome: (0, início do nome) e (1, texto a partir de cada
+    palavra seguinte), normalizados e cortados em TERM_LENGTH caracteres.
+    """
+    normalized = normalize_text(text)
+    return [
+        (0 if i == 0 else 1, normalized[start:start + TERM_LENGTH])
+        for i, start in enumerate(_suffixes(normalized))
+    ]
+
+
+def matches_prefix(text, query, rank):
+    """Confirma, no nome completo, um prefixo já normalizado mais longo que TERM_LENGTH."""
+    normalized = normalize_text(text)
+    starts = _suffixes(normalized)
+    candidates = starts[:1] if rank == 0 else starts[1:]
+    return any(normalized.startswith(query, start) for start in candidates)
+
+
+class PrefixIndex:
+    """
+    Índice ordenado de prefixos para o autocompletar. Cada nome contribui com o
+    seu início e com o texto a partir de cada palavra seguinte, normalizados
+    (sem acentos nem maiúsculas), em dois índices ordenados: primeiro aparecem
+    os nomes que começam pelo prefixo, depois os que têm uma palavra que começa
+    por ele, cada grupo em ordem alfabética do texto a partir da correspondência. Obter os k primeiros custa uma busca
+    binária mais k passos, qualquer que seja o tamanho do catálogo.
+    Não é thread-safe: o repositório deve protegê-lo com o seu próprio lock.
+    """
+
+    def __init__(self):
+        # Chaves "termo\\x00ID" (ID com largura fixa, para desempatar pela ordem numérica)
+        self._indexes = (SortedIndex(), SortedIndex())
+
+    @staticmethod
+    def _entries(key, text):
+        return [(rank, f"{term}{_SEPARATOR}{key:012d}") for rank, term in prefix_terms(text)]
+
+    def add(self, key, text):
+        for rank, entry in self._entries(key, text):
+            self._indexes[rank].add(entry)
+
+    def remove(self, key, text):
+        """Remove as entradas de `key`; `text` é o nome com que foi indexada."""
+        for rank, entry in self._entries(key, text):
+            self._indexes[rank].remove(entry)
+
+    def load(self, items):
+        """Substitui o conteúdo pelos pares (chave, texto), ordenando cada índice uma única vez."""
+        entries = ([], [])
+        for key, text in items:
+            for rank, entry in self._entries(key, text):
+                entries[rank].append(entry)
+        for index, keys in zip(self._indexes, entries):
+            index.load(keys)
+
+    def clear(self):
+        for index in self._indexes:
+            index.clear()
+
+    def search(self, prefix, limit, text_of):
+        """
+        Até `limit` chaves cujo nome começa por `prefix`, seguidas das que têm uma
+        palavra que começa por ele. `text_of(chave)` dá o nome completo, usado só
+        para confirmar prefixos mais longos que TERM_LENGTH.
+        """
+        query = normalize_text(prefix)
+        if not query or limit <= 0:
+            return []
+        probe = query[:TERM_LENGTH]
+        long_query = len(query) > TERM_LENGTH
+        results, seen = [], set()
+        for rank, index in enumerate(self._indexes):
+            for entry in index.irange(probe):
+                if not entry.startswith(probe):
+                    break
+                key = int(entry.rpartition(_SEPARATOR)[2])
+                if key in seen or (long_query and not matches_prefix(text_of(key), query, rank)):
+                    continue
+                seen.add(key)
+                results.append(key)
+                if len(results) == limit:
+                    return results
+        return results
@@ -1,53 +1,238 @@
 # /app/repositories/product_repository.py
-import threading
+import os
+import uuid
+from .base_repository import BaseProductRepository
+from .catalogue_index import CatalogueIndex
+from .change_feed import ChangeFeed, OP_CLEAR, OP_CREATE, OP_DELETE, OP_UPDATE
+from .write_log import ProductWriteLog
+from ..models.product_model import Product
+from ..utils.metrics import TimedRWLock
+from ..utils.rwlock import RWLock
 
-_db_data = {"products": {}}
-_db_lock = threading.Lock()
+# Produtos, versões por produto e índices (IDs ordenados, busca por nome,
+# ordenações, soma dos preços), mantidos por save/update/delete.
+_catalogue = CatalogueIndex()
+# Leituras correm em paralelo; escritas são exclusivas e atômicas.
+# Os produtos armazenados nunca são alterados no lugar: 'update' substitui o objeto
+# inteiro (cópia na escrita), por isso leituras de um único passo dispensam o lock.
+# Os tempos de espera e de posse do lock são expostos em /metrics.
+_db_lock = TimedRWLock(RWLock(), "product_repository")
 _next_product_id = 1
+# Versão global, incrementada a cada escrita (nunca decresce, nem em 'clear').
+_version = 0
+# Identifica esta instância do armazenamento nas ETags. Muda a cada arranque do
+# processo: sem durabilidade os dados e as versões recomeçam do zero (com ela,
+# custa apenas uma revalidação extra por cliente).
+_storage_id = uuid.uuid4().hex[:12]
+# Histórico das últimas alterações (ver configure_change_feed), para /produtos/changes.
+_change_feed = ChangeFeed()
+# Log de escrita opcional (ver enable_durability); None mantém os dados só em memória.
+_write_log = None
 
 
-class ProductRepository:
+class ProductRepository(BaseProductRepository):
+    """Repositório em memória, partilhado por todas as instâncias do processo."""
+
+    @property
+    def storage_id(self):
+        return _storage_id
+
     def find_all(self):
-        with _db_lock:
-            return list(_db_data["products"].values())
+        with _db_lock.read():
+            return list(_catalogue.products.values())
+
+    def find_page(self, limit, after=None, sort="id", min_price=None, max_price=None):
+        """
+        Página da listagem (ver BaseProductRepository.find_page), servida pelos
+        índices ordenados: o custo acompanha o tamanho da página (ou do intervalo de
+        preços filtrado), não o do catálogo. O lock é mantido apenas durante a cópia.
+        """
+        with _db_lock.read():
+            return _catalogue.page(limit, after, sort, min_price, max_price)
 
     def find_by_id(self, product_id):
-        with _db_lock:
-            return _db_data["products"].get(product_id)
+        return _catalogue.products.get(product_id)
 
     def find_by_name(self, name):
-        with _db_lock:
-            return [p for p in _db_data["products"].values() if name.lower() in p["name"].lower()]
+        with _db_lock.read():
+            return _catalogue.search(name)
+
+    def autocomplete(self, prefix, limit):
+        with _db_lock.read():
+            return _catalogue.autocomplete(prefix, limit)
 
     def save(self, product_data):
-        global _next_product_id
-        with _db_lock:
-            new_id = _next_product_id
-            product_data["id"] = new_id
-            _db_data["products"][new_id] = product_data
-            _next_product_id += 1
-            return product_data
+        with _db_lock.write():
+            product, seq = _insert(product_data)
+        _commit(seq)
+        return product
+
+    def save_many(self, items):
+        """Insere vários produtos com uma única aquisição do lock e um único commit no log."""
+        seq = None
+        saved = []
+        with _db_lock.write():
+            for product_data in items:
+                product, seq = _insert(product_data)
+                saved.append(product)
+        _commit(seq)
+        return saved
 
     def update(self, product_id, product_data):
-        with _db_lock:
-            if product_id in _db_data["products"]:
-                _db_data["products"][product_id].update(product_data)
-                return _db_data["products"][product_id]
-            return None
+        with _db_lock.write():
+            updated, seq = _update(product_id, product_data)
+        _commit(seq)
+        return updated
+
+    def update_many(self, changes):
+        """Aplica vários pares (id, dados) atomicamente; None para IDs inexistentes."""
+        seq = None
+        results = []
+        with _db_lock.write():
+            for product_id, product_data in changes:
+                updated, item_seq = _update(product_id, product_data)
+                seq = item_seq or seq
+                results.append(updated)
+        _commit(seq)
+        return results
 
     def delete(self, product_id):
-        with _db_lock:
-            if product_id in _db_data["products"]:
-                del _db_data["products"][product_id]
-                return True
-            return False
+        with _db_lock.write():
+            deleted, seq = _delete(product_id)
+        _commit(seq)
+        return deleted
+
+    def delete_many(self, product_ids):
+        """Exclui vários produtos atomicamente; retorna um booleano por ID."""
+        seq = None
+        results = []
+        with _db_lock.write():
+            for product_id in product_ids:
+                deleted, item_seq = _delete(product_id)
+                seq = item_seq or seq
+                results.append(deleted)
+        _commit(seq)
+        return results
 
     def count(self):
-        with _db_lock:
-            return len(_db_data["products"])
+        return len(_catalogue.products)
+
+    def get_version(self):
+        return _version
+
+    def get_price_summary(self):
+        with _db_lock.read():
+            return _catalogue.price_summary()
+
+    def get_changes(self, since, limit):
+        return _change_feed.since(since, limit)
+
+    def wait_for_changes(self, since, timeout):
+        return _change_feed.wait(since, timeout)
+
+    def count_by_price(self, edges):
+        with _db_lock.read():
+            return _catalogue.count_by_price(edges)
+
+    def get_product_version(self, product_id):
+        return _catalogue.versions.get(product_id)
 
     def clear(self):
-        global _next_product_id
-        with _db_lock:
-            _db_data["products"].clear()
-            _next_product_id = 1
+        with _db_lock.write():
+            _load({}, {}, 1, _version + 1)
+            _change_feed.record(_version, OP_CLEAR)
+            seq = _write_log.append_clear() if _write_log else None
+        _commit(seq)
+
+
+# Operações de escrita internas: chamar com o lock de escrita adquirido. Cada uma
+# retorna (resultado, seq), onde seq é a posição do registo no log de escrita
+# (None sem durabilidade ou sem alteração), a confirmar com _commit fora do lock.
+
+def _insert(product_data):
+    global _next_product_id, _version
+    new_id = _next_product_id
+    product = Product(new_id, product_data["name"], product_data["price"], product_data.get("description"))
+    _version += 1
+    _catalogue.put(product, _version)
+    _change_feed.record(_version, OP_CREATE, new_id, product)
+    _next_product_id += 1
+    return product, _write_log.append_put(product) if _write_log else None
+
+
+def _update(product_id, product_data):
+    global _version
+    current = _catalogue.products.get(product_id)
+    if current is None:
+        return None, None
+    updated = current.replace(**{k: v for k, v in product_data.items() if k in Product.WRITABLE_FIELDS})
+    _version += 1
+    _catalogue.put(updated, _version)
+    _change_feed.record(_version, OP_UPDATE, product_id, updated)
+    return updated, _write_log.append_put(updated) if _write_log else None
+
+
+def _delete(product_id):
+    global _version
+    if product_id not in _catalogue.products:
+        return False, None
+    _version += 1
+    _catalogue.remove(product_id)
+    _change_feed.record(_version, OP_DELETE, product_id)
+    return True, _write_log.append_delete(product_id) if _write_log else None
+
+
+def _commit(seq):
+    """Espera que o registo `seq` do log de escrita esteja em disco (group commit)."""
+    log = _write_log
+    if seq is not None and log is not None:
+        log.commit(seq)
+
+
+def _load(products, versions, next_id, version):
+    """Substitui todo o estado e reconstrói os índices. Chamar com o lock de escrita adquirido."""
+    global _next_product_id, _version
+    _catalogue.load(products, versions)
+    _next_product_id = next_id
+    _version = version
+
+
+def _capture_snapshot(log):
+    """Fecha o segmento de log atual e captura o estado correspondente para o snapshot."""
+    with _db_lock.write():
+        generation = log.rotate()
+        versions = _catalogue.versions
+        entries = [(versions[pid], product) for pid, product in _catalogue.products.items()]
+        return generation, entries, _next_product_id, _version
+
+
+def configure_change_feed(retention):
+    """Define quantas alterações recentes o histórico do repositório em memória guarda."""
+    _change_feed.retention = retention
+
+
+def enable_durability(directory, snapshot_every=100_000, fsync=True):
+    """
+    Ativa o modo durável do repositório em memória: reconstrói o estado a partir
+    do snapshot e do log em `directory` e passa a registar cada escrita no log.
+    """
+    global _write_log
+    with _db_lock.write():
+        if _write_log is not None:
+            if os.path.abspath(_write_log.directory) == os.path.abspath(directory):
+                return
+            raise RuntimeError("A durabilidade já está ativa noutro diretório.")
+        log = ProductWriteLog(directory, snapshot_every, fsync)
+        _load(*log.recover())
+        _change_feed.reset(_version)
+        log.set_snapshot_source(lambda: _capture_snapshot(log))
+        _write_log = log
+
+
+def disable_durability():
+    """Desativa o modo durável, gravando o que estiver pendente. Os dados em memória são mantidos."""
+    global _write_log
+    with _db_lock.write():
+        log, _write_log = _write_log, None
+    if log is not None:
+        log.close()
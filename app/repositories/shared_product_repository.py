@@ -0,0 +1,429 @@
+# /app/repositories/shared_product_repository.py
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import uuid
+from contextlib import contextmanager
+from .base_repository import BaseProductRepository
+from .catalogue_index import CatalogueIndex
+from .change_feed import OP_CLEAR, OP_CREATE, OP_DELETE, OP_UPDATE
+from ..models.product_model import Product
+from ..utils.json_codec import loads
+from ..utils.rwlock import RWLock
+
+# Cabeçalho do ficheiro: assinatura, storage_id, capacidade de IDs, tamanho do anel
+# de alterações, tamanho do ficheiro, próximo ID, versão global, fim do heap, bytes
+# vivos no heap, geração (muda quando os registos do heap mudam de sítio) e primeira
+# versão ainda disponível no histórico.
+_HEADER = struct.Struct("<8s16sQQQQQQQQQ")
+_MAGIC = b"PRODSHM1"
+_HEADER_SIZE = 4096
+# Posição da versão global no cabeçalho, lida sem lock para detetar escritas de outros processos
+_VERSION_OFFSET = struct.calcsize("<8s16sQQQQ")
+_VERSION = struct.Struct("<Q")
+# Tabela de IDs: (posição do registo no heap, versão) por ID; posição 0 = inexistente
+_SLOT = struct.Struct("<QQ")
+# Anel de alterações: (versão, operação, ID do produto, posição do registo) por versão
+_CHANGE = struct.Struct("<QQQQ")
+_OPS = (OP_CREATE, OP_UPDATE, OP_DELETE, OP_CLEAR)
+# Registo do heap: tamanho seguido do produto em JSON
+_RECORD_LENGTH = struct.Struct("<I")
+_PAGE = 4096
+_GROWTH = 1024 * 1024
+
+
+def _align(size):
+    return -(-size // _PAGE) * _PAGE
+
+
+class _Header:
+    """Campos do cabeçalho (exceto a assinatura), lidos e gravados de uma vez."""
+
+    __slots__ = (
+        "storage_id", "capacity", "ring_size", "file_size", "next_id", "version",
+        "heap_end", "live_bytes", "generation", "history_start",
+    )
+
+    def __init__(self, data):
+        magic, *values = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC:
+            raise ValueError("Ficheiro de armazenamento partilhado inválido.")
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def write(self, data):
+        _HEADER.pack_into(data, 0, _MAGIC, *(getattr(self, name) for name in self.__slots__))
+
+
+class SharedMemoryProductRepository(BaseProductRepository):
+    """
+    Repositório de produtos partilhado por vários processos (por exemplo, os workers
+    do gunicorn) através de um ficheiro mapeado em memória (mmap), de preferência
+    em /dev/shm. O ficheiro contém o cabeçalho (próximo ID, versão global), uma
+    tabela com a posição de cada produto por ID, um anel com as últimas alterações
+    e um heap de registos JSON imutáveis (uma atualização grava um novo registo).
+
+    O acesso entre processos é coordenado com flock: lock partilhado para ler o
+    ficheiro, exclusivo para escrever. Cada thread usa o seu próprio descritor, pois
+    o flock é por descrição de ficheiro aberto. Cada processo mantém uma réplica local
+    (CatalogueIndex) que serve as consultas; quando a versão do ficheiro avança, a
+    réplica reaplica só as alterações do anel (ou recarrega tudo se ficou para trás).
+    """
+
+    def __init__(self, path, capacity=4_194_304, change_retention=100_000, compact_min_bytes=16 * 1024 * 1024):
+        self.path = path
+        self.compact_min_bytes = compact_min_bytes
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._local = threading.local()
+        self._lock_fds = []
+        self._lock_fds_lock = threading.Lock()
+        # Protege a réplica local e o mapeamento dentro do processo
+        self._lock = RWLock()
+        self._replica = CatalogueIndex()
+        self._replica_version = -1
+        self._replica_generation = -1
+        self._mm = None
+        self._mm_size = 0
+        # Conteúdo original das entradas da tabela e do anel alteradas pela escrita em curso
+        self._undo = []
+
+        with self._flock(fcntl.LOCK_EX):
+            if os.fstat(self._fd).st_size == 0:
+                self._initialize(capacity, change_retention)
+            self._remap(os.fstat(self._fd).st_size)
+            header = _Header(self._mm)
+        self.storage_id = header.storage_id.rstrip(b"\0").decode()
+        self.capacity = header.capacity
+        self.ring_size = header.ring_size
+        self._table_start = _HEADER_SIZE
+        self._ring_start = self._table_start + header.capacity * _SLOT.size
+        self._heap_start = _align(self._ring_start + header.ring_size * _CHANGE.size)
+
+    # --- Ficheiro, mapeamento e locks ---
+
+    def _initialize(self, capacity, ring_size):
+        ring_size = max(ring_size, 1)
+        heap_start = _align(_HEADER_SIZE + capacity * _SLOT.size + ring_size * _CHANGE.size)
+        size = heap_start + _GROWTH
+        # O ficheiro é esparso: a tabela e o anel só ocupam memória à medida que são usados.
+        os.ftruncate(self._fd, size)
+        header = bytearray(_HEADER.size)
+        _HEADER.pack_into(
+            header, 0, _MAGIC, uuid.uuid4().hex[:12].encode(), capacity, ring_size, size,
+            1, 0, heap_start, 0, 0, 1,
+        )
+        os.pwrite(self._fd, bytes(header), 0)
+
+    def _remap(self, size):
+        """Mapeia o ficheiro com o tamanho atual. O mapeamento antigo é libertado quando deixar de ser usado."""
+        self._mm = mmap.mmap(self._fd, size)
+        self._mm_size = size
+
+    def _lock_fd(self):
+        local = self._local
+        # Um descritor herdado num fork partilharia o flock com o processo pai.
+        if getattr(local, "pid", None) != os.getpid():
+            local.fd = os.open(self.path, os.O_RDWR)
+            local.pid = os.getpid()
+            with self._lock_fds_lock:
+                self._lock_fds.append(local.fd)
+        return local.fd
+
+    @contextmanager
+    def _flock(self, mode):
+        fd = self._lock_fd()
+        fcntl.flock(fd, mode)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _peek_version(self):
+        return _VERSION.unpack_from(self._mm, _VERSION_OFFSET)[0]
+
+    # --- Réplica local ---
+
+    def _sync(self):
+        """
+        Atualiza o mapeamento e a réplica local para o estado do ficheiro e retorna o
+        cabeçalho. Chamar com o flock (partilhado ou exclusivo) e o lock de escrita local.
+        """
+        header = _Header(self._mm)
+        if header.file_size > self._mm_size:
+            self._remap(header.file_size)
+        version = self._replica_version
+        if header.version == version and header.generation == self._replica_generation:
+            return header
+        behind = header.version - version
+        if (
+            header.generation != self._replica_generation or version < 0 or behind < 0
+            or behind > header.ring_size or version + 1 < header.history_start
+        ):
+            self._reload(header)
+        else:
+            for change_version in range(version + 1, header.version + 1):
+                _, op, product_id, offset = self._read_change(change_version)
+                if op in (OP_CREATE, OP_UPDATE):
+                    self._replica.put(self._read_product(offset), change_version)
+                elif op == OP_DELETE:
+                    self._replica.remove(product_id)
+                else:
+                    self._replica.clear()
+        self._replica_version = header.version
+        self._replica_generation = header.generation
+        return header
+
+    def _reload(self, header):
+        products, versions = {}, {}
+        start = self._table_start + _SLOT.size
+        slots = self._mm[start:start + (header.next_id - 1) * _SLOT.size]
+        for product_id, (offset, version) in enumerate(_SLOT.iter_unpack(slots), 1):
+            if offset:
+                products[product_id] = self._read_product(offset)
+                versions[product_id] = version
+        self._replica.load(products, versions)
+
+    def _refresh(self):
+        """Sincroniza a réplica local se outro processo alterou o ficheiro."""
+        if self._peek_version() != self._replica_version:
+            with self._flock(fcntl.LOCK_SH), self._lock.write():
+                self._sync()
+
+    @contextmanager
+    def _reading(self):
+        """Dá acesso à réplica local (lock de leitura), sincronizada com o ficheiro."""
+        self._refresh()
+        with self._lock.read():
+            yield self._replica
+
+    @contextmanager
+    def _writing(self):
+        """
+        Escrita exclusiva entre processos; o cabeçalho alterado é gravado no fim.
+        Se a escrita falhar a meio, as entradas da tabela e do anel já gravadas são
+        repostas (o cabeçalho antigo continua a valer) e a réplica local, que pode
+        já ter parte das alterações, é recarregada na próxima sincronização.
+        """
+        with self._flock(fcntl.LOCK_EX), self._lock.write():
+            header = self._sync()
+            self._undo = []
+            try:
+                yield header
+            except BaseException:
+                for position, data in reversed(self._undo):
+                    self._mm[position:position + len(data)] = data
+                self._replica_version = -1
+                raise
+            finally:
+                self._undo = []
+            if header.heap_end - self._heap_start > max(self.compact_min_bytes, 2 * header.live_bytes):
+                self._compact(header)
+            header.write(self._mm)
+            self._replica_version = header.version
+            self._replica_generation = header.generation
+
+    # --- Registos ---
+
+    def _slot_offset(self, product_id):
+        return self._table_start + product_id * _SLOT.size
+
+    def _read_product(self, offset):
+        (length,) = _RECORD_LENGTH.unpack_from(self._mm, offset)
+        start = offset + _RECORD_LENGTH.size
+        return Product.from_dict(loads(self._mm[start:start + length]))
+
+    def _record_size(self, offset):
+        return _RECORD_LENGTH.size + _RECORD_LENGTH.unpack_from(self._mm, offset)[0]
+
+    def _read_change(self, version):
+        position = self._ring_start + (version % self.ring_size) * _CHANGE.size
+        change_version, op, product_id, offset = _CHANGE.unpack_from(self._mm, position)
+        return change_version, _OPS[op], product_id, offset
+
+    def _append_record(self, header, product):
+        data = product.to_json()
+        size = _RECORD_LENGTH.size + len(data)
+        offset = header.heap_end
+        if offset + size > header.file_size:
+            header.file_size = _align(max(2 * header.file_size, offset + size + _GROWTH))
+            os.ftruncate(self._fd, header.file_size)
+            self._remap(header.file_size)
+        _RECORD_LENGTH.pack_into(self._mm, offset, len(data))
+        self._mm[offset + _RECORD_LENGTH.size:offset + size] = data
+        header.heap_end += size
+        header.live_bytes += size
+        return offset
+
+    def _record_write(self, header, op, product_id, offset, slot):
+        """Avança a versão global, grava a entrada da tabela e regista a alteração no anel."""
+        header.version += 1
+        if product_id:
+            self._save_for_undo(self._slot_offset(product_id), _SLOT.size)
+            _SLOT.pack_into(self._mm, self._slot_offset(product_id), *slot(header.version))
+        position = self._ring_start + (header.version % self.ring_size) * _CHANGE.size
+        self._save_for_undo(position, _CHANGE.size)
+        _CHANGE.pack_into(self._mm, position, header.version, _OPS.index(op), product_id, offset)
+
+    def _save_for_undo(self, position, size):
+        self._undo.append((position, self._mm[position:position + size]))
+
+    def _compact(self, header):
+        """
+        Move os registos vivos para o início do heap. As posições antigas deixam de
+        valer, por isso o histórico anterior deixa de estar disponível.
+        """
+        mm = self._mm
+        live = []
+        for product_id in self._replica.products:
+            offset, version = _SLOT.unpack_from(mm, self._slot_offset(product_id))
+            live.append((offset, product_id, version))
+        live.sort()
+        position = self._heap_start
+        for offset, product_id, version in live:
+            size = self._record_size(offset)
+            if offset != position:
+                mm.move(position, offset, size)
+                _SLOT.pack_into(mm, self._slot_offset(product_id), position, version)
+            position += size
+        header.heap_end = position
+        header.live_bytes = position - self._heap_start
+        header.generation += 1
+        header.history_start = header.version + 1
+
+    # --- Escritas ---
+
+    def _insert(self, header, product_data):
+        product_id = header.next_id
+        product = Product(product_id, product_data["name"], product_data["price"], product_data.get("description"))
+        offset = self._append_record(header, product)
+        self._record_write(header, OP_CREATE, product_id, offset, lambda version: (offset, version))
+        header.next_id += 1
+        self._replica.put(product, header.version)
+        return product
+
+    def _update(self, header, product_id, product_data):
+        current = self._replica.products.get(product_id)
+        if current is None:
+            return None
+        updated = current.replace(**{k: v for k, v in product_data.items() if k in Product.WRITABLE_FIELDS})
+        old_offset, _ = _SLOT.unpack_from(self._mm, self._slot_offset(product_id))
+        header.live_bytes -= self._record_size(old_offset)
+        offset = self._append_record(header, updated)
+        self._record_write(header, OP_UPDATE, product_id, offset, lambda version: (offset, version))
+        self._replica.put(updated, header.version)
+        return updated
+
+    def _delete(self, header, product_id):
+        if product_id not in self._replica.products:
+            return False
+        offset, _ = _SLOT.unpack_from(self._mm, self._slot_offset(product_id))
+        header.live_bytes -= self._record_size(offset)
+        self._record_write(header, OP_DELETE, product_id, 0, lambda version: (0, 0))
+        self._replica.remove(product_id)
+        return True
+
+    def save(self, product_data):
+        return self.save_many([product_data])[0]
+
+    def save_many(self, items):
+        items = list(items)
+        with self._writing() as header:
+            # O lote inteiro é verificado antes de alterar o ficheiro ou a réplica
+            if header.next_id + len(items) > self.capacity:
+                raise RuntimeError("A capacidade de IDs do armazenamento partilhado foi esgotada.")
+            return [self._insert(header, product_data) for product_data in items]
+
+    def update(self, product_id, product_data):
+        return self.update_many([(product_id, product_data)])[0]
+
+    def update_many(self, changes):
+        with self._writing() as header:
+            return [self._update(header, product_id, product_data) for product_id, product_data in changes]
+
+    def delete(self, product_id):
+        return self.delete_many([product_id])[0]
+
+    def delete_many(self, product_ids):
+        with self._writing() as header:
+            return [self._delete(header, product_id) for product_id in product_ids]
+
+    def clear(self):
+        with self._writing() as header:
+            start = self._slot_offset(1)
+            self._save_for_undo(start, (header.next_id - 1) * _SLOT.size)
+            self._mm[start:start + (header.next_id - 1) * _SLOT.size] = bytes((header.next_id - 1) * _SLOT.size)
+            header.next_id = 1
+            # Os registos antigos ficam no heap (o histórico ainda os referencia) até à próxima compactação.
+            header.live_bytes = 0
+            self._record_write(header, OP_CLEAR, 0, 0, None)
+            self._replica.clear()
+
+    # --- Leituras ---
+
+    def find_all(self):
+        with self._reading() as catalogue:
+            return list(catalogue.products.values())
+
+    def find_page(self, limit, after=None, sort="id", min_price=None, max_price=None):
+        with self._reading() as catalogue:
+            return catalogue.page(limit, after, sort, min_price, max_price)
+
+    def find_by_id(self, product_id):
+        # Como no repositório em memória, a réplica substitui produtos inteiros, por
+        # isso uma leitura de um único passo dispensa o lock local.
+        self._refresh()
+        return self._replica.products.get(product_id)
+
+    def find_by_name(self, name):
+        with self._reading() as catalogue:
+            return catalogue.search(name)
+
+    def autocomplete(self, prefix, limit):
+        with self._reading() as catalogue:
+            return catalogue.autocomplete(prefix, limit)
+
+    def count(self):
+        self._refresh()
+        return len(self._replica.products)
+
+    def get_version(self):
+        return self._peek_version()
+
+    def get_product_version(self, product_id):
+        self._refresh()
+        return self._replica.versions.get(product_id)
+
+    def get_price_summary(self):
+        with self._reading() as catalogue:
+            return catalogue.price_summary()
+
+    def count_by_price(self, edges):
+        with self._reading() as catalogue:
+            return catalogue.count_by_price(edges)
+
+    def get_changes(self, since, limit):
+        """Alterações lidas do anel partilhado; os produtos vêm dos registos (imutáveis) do heap."""
+        with self._flock(fcntl.LOCK_SH), self._lock.write():
+            header = self._sync()
+            if since >= header.version:
+                return []
+            oldest = max(header.history_start, header.version - self.ring_size + 1)
+            if since + 1 < oldest:
+                return None
+            changes = []
+            for version in range(since + 1, min(header.version, since + limit) + 1):
+                _, op, product_id, offset = self._read_change(version)
+                product = self._read_product(offset) if offset else None
+                changes.append((version, op, product_id or None, product))
+            return changes
+
+    def close(self):
+        with self._lock_fds_lock:
+            fds, self._lock_fds = self._lock_fds, []
+        for fd in fds:
+            os.close(fd)
+        self._local = threading.local()
+        self._mm.close()
+        os.close(self._fd)
@@ -0,0 +1,147 @@
+# /app/repositories/sorted_index.py
+from bisect import bisect_left, bisect_right, insort
+
+
+class SortedIndex:
+    """
+    Índice secundário ordenado de chaves únicas (por exemplo, tuplos (preço, id)).
+    As chaves ficam em blocos ordenados de tamanho limitado, por isso inserir e
+    remover custa O(log n + tamanho do bloco) em vez de deslocar uma lista com o
+    catálogo inteiro, e as consultas por intervalo começam com uma busca binária.
+    Os tamanhos dos blocos ficam numa árvore de Fenwick, por isso `rank` também
+    é logarítmico (a árvore é refeita, em O(número de blocos), só quando um bloco
+    é dividido ou desaparece).
+    Não é thread-safe: o repositório deve protegê-lo com o seu próprio lock.
+    """
+
+    def __init__(self, block_size=1024):
+        self.block_size = block_size
+        self._blocks = []
+        # Maior chave de cada bloco, para localizar o bloco com bisect
+        self._maxes = []
+        # Árvore de Fenwick (índices a partir de 1) dos tamanhos dos blocos
+        self._tree = [0]
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def add(self, key):
+        blocks, maxes = self._blocks, self._maxes
+        self._len += 1
+        if not blocks:
+            blocks.append([key])
+            maxes.append(key)
+            self._rebuild_tree()
+            return
+        pos = bisect_left(maxes, key)
+        if pos == len(maxes):
+            pos -= 1
+            blocks[pos].append(key)
+            maxes[pos] = key
+        else:
+            insort(blocks[pos], key)
+        block = blocks[pos]
+        if len(block) > 2 * self.block_size:
+            # Divide o bloco ao meio para manter o custo das inserções limitado
+            half = len(block) // 2
+            blocks[pos:pos + 1] = [block[:half], block[half:]]
+            maxes[pos:pos + 1] = [block[half - 1], block[-1]]
+            self._rebuild_tree()
+        else:
+            self._tree_add(pos, 1)
+
+    def remove(self, key):
+        """Remove `key` do índice; não faz nada se ela não existir."""
+        blocks, maxes = self._blocks, self._maxes
+        pos = bisect_left(maxes, key)
+        if pos == len(maxes):
+            return
+        block = blocks[pos]
+        i = bisect_left(block, key)
+        if i == len(block) or block[i] != key:
+            return
+        del block[i]
+        self._len -= 1
+        if block:
+            maxes[pos] = block[-1]
+            self._tree_add(pos, -1)
+        else:
+            del blocks[pos]
+            del maxes[pos]
+            self._rebuild_tree()
+
+    def _rebuild_tree(self):
+        """Reconstrói a árvore de Fenwick a partir dos tamanhos dos blocos, em O(número de blocos)."""
+        tree = [0] + [len(block) for block in self._blocks]
+        size = len(tree)
+        for i in range(1, size):
+            parent = i + (i & -i)
+            if parent < size:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, pos, delta):
+        tree = self._tree
+        i = pos + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _count_before(self, pos):
+        """Total de chaves nos blocos anteriores ao bloco `pos`."""
+        tree = self._tree
+        total = 0
+        while pos:
+            total += tree[pos]
+            pos -= pos & -pos
+        return total
+
+    def first(self):
+        """Menor chave do índice, ou None se estiver vazio."""
+        return self._blocks[0][0] if self._blocks else None
+
+    def last(self):
+        """Maior chave do índice, ou None se estiver vazio."""
+        return self._maxes[-1] if self._maxes else None
+
+    def rank(self, key):
+        """Número de chaves menores que `key`: O(log n), com a árvore de Fenwick dos blocos."""
+        blocks = self._blocks
+        pos = bisect_left(self._maxes, key)
+        if pos == len(blocks):
+            return self._len
+        return self._count_before(pos) + bisect_left(blocks[pos], key)
+
+    def irange(self, start=None, inclusive=True):
+        """
+        Percorre, em ordem, as chaves a partir de `start` (todas, se None). Com
+        `inclusive=False` começa na primeira chave estritamente maior que `start`.
+        """
+        blocks = self._blocks
+        if start is None:
+            pos, i = 0, 0
+        else:
+            find = bisect_left if inclusive else bisect_right
+            pos = find(self._maxes, start)
+            if pos == len(blocks):
+                return
+            i = find(blocks[pos], start)
+        for block in blocks[pos:]:
+            yield from block[i:] if i else block
+            i = 0
+
+    def load(self, keys):
+        """Substitui o conteúdo por `keys` (em qualquer ordem), ordenando uma única vez."""
+        keys = sorted(keys)
+        size = self.block_size
+        self._blocks = [keys[i:i + size] for i in range(0, len(keys), size)]
+        self._maxes = [block[-1] for block in self._blocks]
+        self._len = len(keys)
+        self._rebuild_tree()
+
+    def clear(self):
+        self._blocks = []
+        self._maxes = []
+        self._tree = [0]
+        self._len = 0
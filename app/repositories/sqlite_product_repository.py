@@ -0,0 +1,395 @@
+# /app/repositories/sqlite_product_repository.py
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from fractions import Fraction
+from .base_repository import BaseProductRepository
+from .change_feed import OP_CLEAR, OP_CREATE, OP_DELETE, OP_UPDATE
+from .prefix_index import TERM_LENGTH, matches_prefix, normalize_text, prefix_terms
+from ..models.product_model import Product
+from ..utils.json_codec import loads
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        name_lower TEXT NOT NULL,
+        -- Sem tipo declarado (sem afinidade): int e float voltam como foram gravados
+        price NOT NULL,
+        description TEXT,
+        version INTEGER NOT NULL
+    )
+    """,
+    # Versão global do catálogo e identificador desta base de dados (usado nas ETags)
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)",
+    "INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0)",
+    "CREATE INDEX IF NOT EXISTS idx_products_name ON products (name_lower)",
+    "CREATE INDEX IF NOT EXISTS idx_products_price ON products (price)",
+    # Histórico das últimas alterações, uma linha por versão global
+    """
+    CREATE TABLE IF NOT EXISTS changes (
+        version INTEGER PRIMARY KEY,
+        op TEXT NOT NULL,
+        product_id INTEGER,
+        product TEXT
+    )
+    """,
+    # Prefixos normalizados dos nomes para o autocompletar (ver prefix_index.prefix_terms)
+    """
+    CREATE TABLE IF NOT EXISTS product_terms (
+        rank INTEGER NOT NULL,
+        term TEXT NOT NULL,
+        product_id INTEGER NOT NULL,
+        PRIMARY KEY (rank, term, product_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_product_terms_product ON product_terms (product_id)",
+)
+
+# As consultas são parametrizadas: o sqlite3 mantém-nas preparadas na cache de
+# statements de cada conexão do pool (a listagem tem poucas variantes de filtro e ordem).
+_SELECT = "SELECT id, name, price, description FROM products"
+_SQL_FIND_ALL = _SELECT + " ORDER BY id"
+_SQL_FIND_BY_ID = _SELECT + " WHERE id = ?"
+_SQL_FIND_BY_NAME = _SELECT + " WHERE instr(name_lower, ?) > 0 ORDER BY id"
+_SQL_INSERT = "INSERT INTO products (name, name_lower, price, description, version) VALUES (?, ?, ?, ?, ?)"
+_SQL_UPDATE = "UPDATE products SET name = ?, name_lower = ?, price = ?, description = ?, version = ? WHERE id = ?"
+_SQL_DELETE = "DELETE FROM products WHERE id = ? RETURNING price"
+_SQL_COUNT = "SELECT COUNT(*) FROM products"
+_SQL_GET_VERSION = "SELECT value FROM meta WHERE key = 'version'"
+_SQL_BUMP_VERSION = "UPDATE meta SET value = value + 1 WHERE key = 'version' RETURNING value"
+_SQL_PRODUCT_VERSION = "SELECT version FROM products WHERE id = ?"
+_SQL_RECORD_CHANGE = "INSERT INTO changes (version, op, product_id, product) VALUES (?, ?, ?, ?)"
+_SQL_PRUNE_CHANGES = "DELETE FROM changes WHERE version <= ?"
+_SQL_FIRST_CHANGE = "SELECT MIN(version) FROM changes"
+_SQL_FIND_CHANGES = "SELECT version, op, product_id, product FROM changes WHERE version > ? ORDER BY version LIMIT ?"
+# Soma exata dos preços ('numerador/denominador'), mantida pelas escritas
+_SQL_GET_PRICE_TOTAL = "SELECT value FROM meta WHERE key = 'price_sum'"
+_SQL_SET_PRICE_TOTAL = "UPDATE meta SET value = ? WHERE key = 'price_sum'"
+# Subconsultas separadas: só assim o SQLite resolve MIN e MAX pelo índice de preços.
+_SQL_PRICE_SUMMARY = (
+    "SELECT (SELECT COUNT(*) FROM products), (SELECT value FROM meta WHERE key = 'price_sum'),"
+    " (SELECT MIN(price) FROM products), (SELECT MAX(price) FROM products)"
+)
+_SQL_COUNT_PRICE_FROM = "SELECT COUNT(*) FROM products WHERE price >= ?"
+_SQL_COUNT_PRICE_RANGE = _SQL_COUNT_PRICE_FROM + " AND price < ?"
+_SQL_INSERT_TERM = "INSERT OR IGNORE INTO product_terms (rank, term, product_id) VALUES (?, ?, ?)"
+_SQL_DELETE_TERMS = "DELETE FROM product_terms WHERE product_id = ?"
+# Intervalo [prefixo, prefixo + maior carácter) na chave primária, já na ordem do resultado
+_SQL_FIND_BY_PREFIX = (
+    "SELECT p.id, p.name, p.price, p.description FROM product_terms t JOIN products p ON p.id = t.product_id"
+    " WHERE t.rank = ? AND t.term >= ? AND t.term < ? ORDER BY t.term, t.product_id"
+)
+# Coluna de cada ordenação da listagem; o ID desempata (e vem de graça nos
+# índices, que incluem o rowid).
+_SORT_COLUMNS = {"id": "id", "name": "name_lower", "price": "price"}
+
+
+def _index_terms(conn, product_id, name):
+    conn.executemany(_SQL_INSERT_TERM, [(rank, term, product_id) for rank, term in prefix_terms(name)])
+
+
+def _add_price_total(conn, delta):
+    """Soma `delta` (Fraction) ao total exato dos preços, uma vez por transação."""
+    if delta:
+        total = Fraction(conn.execute(_SQL_GET_PRICE_TOTAL).fetchone()[0]) + delta
+        conn.execute(_SQL_SET_PRICE_TOTAL, (str(total),))
+
+
+def _row_to_product(row):
+    return Product(*row)
+
+
+def _product_to_params(product):
+    # O nome em minúsculas é calculado em Python para manter a mesma semântica
+    # de busca do repositório em memória (o lower() do SQLite só trata ASCII).
+    return product.name, product.name.lower(), product.price, product.description
+
+
+class _ConnectionPool:
+    """Pool de conexões SQLite reutilizadas entre threads (uma thread por conexão de cada vez)."""
+
+    def __init__(self, database_path, max_idle):
+        self.database_path = database_path
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.database_path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=256,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class SQLiteProductRepository(BaseProductRepository):
+    """Repositório de produtos persistido em SQLite (modo WAL, conexões em pool)."""
+
+    def __init__(self, database_path, pool_size=8, change_retention=100_000):
+        self.change_retention = change_retention
+        self._pool = _ConnectionPool(database_path, pool_size)
+        with self._pool.connection() as conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('storage_id', ?)", (uuid.uuid4().hex[:12],))
+            self.storage_id = conn.execute("SELECT value FROM meta WHERE key = 'storage_id'").fetchone()[0]
+        self._backfill_price_total()
+        self._backfill_terms()
+
+    def _backfill_price_total(self):
+        """
+        Calcula a soma exata dos preços de uma base que ainda não a tem (uma única
+        vez) e descarta o total em float das versões anteriores, que acumulava erros.
+        """
+        with self._transaction() as conn:
+            if conn.execute(_SQL_GET_PRICE_TOTAL).fetchone():
+                return
+            total = sum((Fraction(price) for (price,) in conn.execute("SELECT price FROM products")), Fraction(0))
+            conn.execute("INSERT INTO meta (key, value) VALUES ('price_sum', ?)", (str(total),))
+            conn.execute("DELETE FROM meta WHERE key = 'price_total'")
+
+    def _backfill_terms(self):
+        """Indexa os prefixos dos produtos de uma base criada antes do autocompletar (uma única vez)."""
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'prefix_index'").fetchone():
+                return
+            for product_id, name in conn.execute("SELECT id, name FROM products").fetchall():
+                _index_terms(conn, product_id, name)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('prefix_index', 1)")
+
+    @contextmanager
+    def _transaction(self):
+        """Transação de escrita: BEGIN IMMEDIATE garante a exclusividade desde o início."""
+        with self._pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _record_change(self, conn, version, op, product_id=None, product=None):
+        """Regista a alteração no histórico (na transação da escrita) e poda o excesso."""
+        payload = product.to_json().decode() if product is not None else None
+        conn.execute(_SQL_RECORD_CHANGE, (version, op, product_id, payload))
+        conn.execute(_SQL_PRUNE_CHANGES, (version - self.change_retention,))
+
+    def find_all(self):
+        with self._pool.connection() as conn:
+            return [_row_to_product(row) for row in conn.execute(_SQL_FIND_ALL)]
+
+    def find_page(self, limit, after=None, sort="id", min_price=None, max_price=None):
+        column = _SORT_COLUMNS[sort]
+        conditions, params = [], []
+        if min_price is not None:
+            conditions.append("price >= ?")
+            params.append(min_price)
+        if max_price is not None:
+            conditions.append("price <= ?")
+            params.append(max_price)
+        if after is not None:
+            if sort == "id":
+                conditions.append("id > ?")
+                params.append(after)
+            else:
+                conditions.append(f"({column}, id) > (?, ?)")
+                params.extend(after)
+        sql = _SELECT
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY id LIMIT ?" if sort == "id" else f" ORDER BY {column}, id LIMIT ?"
+        params.append(limit + 1)
+
+        with self._pool.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        has_more = len(rows) > limit
+        products = [_row_to_product(row) for row in rows[:limit]]
+        next_key = products[-1].sort_key(sort) if has_more else None
+        return products, next_key
+
+    def find_by_id(self, product_id):
+        with self._pool.connection() as conn:
+            row = conn.execute(_SQL_FIND_BY_ID, (product_id,)).fetchone()
+        return _row_to_product(row) if row else None
+
+    def find_by_name(self, name):
+        with self._pool.connection() as conn:
+            rows = conn.execute(_SQL_FIND_BY_NAME, (name.lower(),)).fetchall()
+        return [_row_to_product(row) for row in rows]
+
+    def autocomplete(self, prefix, limit):
+        """
+        Percorre a chave primária de product_terms por intervalo, primeiro os inícios
+        de nome e depois as palavras seguintes, até juntar `limit` produtos distintos.
+        """
+        query = normalize_text(prefix)
+        if not query or limit <= 0:
+            return []
+        probe = query[:TERM_LENGTH]
+        long_query = len(query) > TERM_LENGTH
+        results, seen = [], set()
+        with self._pool.connection() as conn:
+            for rank in (0, 1):
+                # O cursor é lido aos poucos: o SQLite só avança o que for consumido
+                for row in conn.execute(_SQL_FIND_BY_PREFIX, (rank, probe, probe + "\U0010ffff")):
+                    if row[0] in seen or (long_query and not matches_prefix(row[1], query, rank)):
+                        continue
+                    seen.add(row[0])
+                    results.append(_row_to_product(row))
+                    if len(results) == limit:
+                        return results
+        return results
+
+    def save(self, product_data):
+        return self.save_many([product_data])[0]
+
+    def save_many(self, items):
+        with self._transaction() as conn:
+            saved = []
+            delta = Fraction(0)
+            for product_data in items:
+                product = Product.from_dict(product_data)
+                version = conn.execute(_SQL_BUMP_VERSION).fetchone()[0]
+                cursor = conn.execute(_SQL_INSERT, (*_product_to_params(product), version))
+                delta += Fraction(product.price)
+                product.id = cursor.lastrowid
+                _index_terms(conn, product.id, product.name)
+                self._record_change(conn, version, OP_CREATE, product.id, product)
+                saved.append(product)
+            _add_price_total(conn, delta)
+        return saved
+
+    def update(self, product_id, product_data):
+        return self.update_many([(product_id, product_data)])[0]
+
+    def update_many(self, changes):
+        results = []
+        with self._transaction() as conn:
+            delta = Fraction(0)
+            for product_id, product_data in changes:
+                row = conn.execute(_SQL_FIND_BY_ID, (product_id,)).fetchone()
+                if row is None:
+                    results.append(None)
+                    continue
+                fields = {k: v for k, v in product_data.items() if k in Product.WRITABLE_FIELDS}
+                updated = _row_to_product(row).replace(**fields)
+                version = conn.execute(_SQL_BUMP_VERSION).fetchone()[0]
+                conn.execute(_SQL_UPDATE, (*_product_to_params(updated), version, product_id))
+                if updated.price != row[2]:
+                    delta += Fraction(updated.price) - Fraction(row[2])
+                if updated.name != row[1]:
+                    conn.execute(_SQL_DELETE_TERMS, (product_id,))
+                    _index_terms(conn, product_id, updated.name)
+                self._record_change(conn, version, OP_UPDATE, product_id, updated)
+                results.append(updated)
+            _add_price_total(conn, delta)
+        return results
+
+    def delete(self, product_id):
+        return self.delete_many([product_id])[0]
+
+    def delete_many(self, product_ids):
+        results = []
+        with self._transaction() as conn:
+            delta = Fraction(0)
+            for product_id in product_ids:
+                row = conn.execute(_SQL_DELETE, (product_id,)).fetchone()
+                if row is not None:
+                    version = conn.execute(_SQL_BUMP_VERSION).fetchone()[0]
+                    delta -= Fraction(row[0])
+                    conn.execute(_SQL_DELETE_TERMS, (product_id,))
+                    self._record_change(conn, version, OP_DELETE, product_id)
+                results.append(row is not None)
+            _add_price_total(conn, delta)
+        return results
+
+    def count(self):
+        with self._pool.connection() as conn:
+            return conn.execute(_SQL_COUNT).fetchone()[0]
+
+    def get_version(self):
+        with self._pool.connection() as conn:
+            return conn.execute(_SQL_GET_VERSION).fetchone()[0]
+
+    def get_product_version(self, product_id):
+        with self._pool.connection() as conn:
+            row = conn.execute(_SQL_PRODUCT_VERSION, (product_id,)).fetchone()
+        return row[0] if row else None
+
+    def get_changes(self, since, limit):
+        with self._pool.connection() as conn:
+            # Lidos na mesma transação para que a versão e o histórico sejam coerentes
+            conn.execute("BEGIN")
+            try:
+                version = conn.execute(_SQL_GET_VERSION).fetchone()[0]
+                if since >= version:
+                    return []
+                first = conn.execute(_SQL_FIRST_CHANGE).fetchone()[0]
+                if first is None or since + 1 < first:
+                    return None
+                rows = conn.execute(_SQL_FIND_CHANGES, (since, limit)).fetchall()
+            finally:
+                conn.execute("COMMIT")
+        return [
+            (change_version, op, product_id, Product.from_dict(loads(product)) if product else None)
+            for change_version, op, product_id, product in rows
+        ]
+
+    def get_price_summary(self):
+        with self._pool.connection() as conn:
+            count, total, minimum, maximum = conn.execute(_SQL_PRICE_SUMMARY).fetchone()
+        return count, float(Fraction(total)) if count else 0, minimum, maximum
+
+    def count_by_price(self, edges):
+        """Uma contagem por faixa, cada uma resolvida por intervalo no índice de preços."""
+        with self._pool.connection() as conn:
+            counts = [
+                conn.execute(_SQL_COUNT_PRICE_RANGE, (low, high)).fetchone()[0]
+                for low, high in zip(edges, edges[1:])
+            ]
+            if edges:
+                counts.append(conn.execute(_SQL_COUNT_PRICE_FROM, (edges[-1],)).fetchone()[0])
+        return counts
+
+    def clear(self):
+        with self._transaction() as conn:
+            version = conn.execute(_SQL_BUMP_VERSION).fetchone()[0]
+            self._record_change(conn, version, OP_CLEAR)
+            conn.execute("DELETE FROM products")
+            conn.execute("DELETE FROM product_terms")
+            conn.execute("DELETE FROM sqlite_sequence WHERE name = 'products'")
+            conn.execute(_SQL_SET_PRICE_TOTAL, ("0",))
+
+    def close(self):
+        self._pool.close()
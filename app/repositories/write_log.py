@@ -0,0 +1,327 @@
+# /app/repositories/write_log.py
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from ..models.product_model import Product
+
+OP_PUT = 1
+OP_DELETE = 2
+OP_CLEAR = 3
+
+# Registo do log: operação, tamanho e CRC32 do payload, seguidos do payload.
+_RECORD_HEADER = struct.Struct("<BII")
+_PRODUCT_ID = struct.Struct("<Q")
+# Snapshot: assinatura, geração do primeiro log não incluído, próximo ID, versão
+# global e número de blocos. Cada bloco é um array JSON com até _SNAPSHOT_CHUNK
+# pares [versão, produto], precedido do seu tamanho: decodificar blocos inteiros é
+# bem mais rápido do que produto a produto.
+_SNAPSHOT_HEADER = struct.Struct("<8sQQQQ")
+_SNAPSHOT_MAGIC = b"PRODSNP3"
+_SNAPSHOT_LENGTH = struct.Struct("<I")
+_SNAPSHOT_CHUNK = 4096
+
+_SNAPSHOT_FILE = "products.snapshot"
+_LOG_PREFIX = "products.log."
+
+
+def _encode(op, payload):
+    return _RECORD_HEADER.pack(op, len(payload), zlib.crc32(payload)) + payload
+
+
+class ProductWriteLog:
+    """
+    Log de escrita (append-only) com snapshots para o repositório em memória.
+
+    Cada escrita é acrescentada ao buffer com `append_*` (sob o lock de escrita do
+    repositório, preservando a ordem) e tornada durável com `commit`, fora desse
+    lock. O primeiro escritor que chega a `commit` grava e faz fsync de todos os
+    registos pendentes de uma só vez (group commit); os outros apenas esperam.
+
+    Cada registo corresponde a exatamente uma alteração da versão global do
+    repositório, por isso a versão é reconstruída contando os registos reaplicados.
+
+    Se uma gravação falhar, não se sabe quanto do lote chegou ao disco: o log
+    passa a estar em falha e todos os `commit` seguintes lançam OSError, em vez
+    de confirmarem registos que podem não existir.
+
+    O log é dividido em gerações. Um snapshot regista o estado completo e a
+    geração a partir da qual o log ainda deve ser aplicado; os segmentos
+    anteriores são apagados. A recuperação lê o snapshot via mmap e reaplica a cauda.
+    """
+
+    def __init__(self, directory, snapshot_every=100_000, fsync=True):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        self._cond = threading.Condition(threading.Lock())
+        self._buffer = []
+        self._appended = 0
+        self._durable = 0
+        self._flushing = False
+        self._since_snapshot = 0
+        self._snapshot_source = None
+        self._snapshot_running = threading.Lock()
+        self._generation = None
+        self._file = None
+        self._failure = None
+
+    # --- Recuperação ---
+
+    def recover(self):
+        """
+        Reconstrói o estado a partir do snapshot e dos segmentos de log. Retorna
+        (produtos por ID, versões por ID, próximo ID, versão global) e abre uma nova
+        geração de log.
+        """
+        state, first_generation = self._load_snapshot()
+        generations = self._log_generations()
+        for generation in generations:
+            if generation < first_generation:
+                os.remove(self._log_path(generation))
+                continue
+            final = generation == generations[-1]
+            self._since_snapshot += self._replay(self._log_path(generation), state, final)
+        last = max([first_generation - 1] + generations)
+        self._open_generation(last + 1)
+        return state["products"], state["versions"], state["next_id"], state["version"]
+
+    def _load_snapshot(self):
+        path = os.path.join(self.directory, _SNAPSHOT_FILE)
+        state = {"products": {}, "versions": {}, "next_id": 1, "version": 0}
+        if not os.path.exists(path) or not os.path.getsize(path):
+            return state, 0
+        products = state["products"]
+        versions = state["versions"]
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, generation, next_id, version, chunks = _SNAPSHOT_HEADER.unpack_from(data, 0)
+            if magic != _SNAPSHOT_MAGIC:
+                raise ValueError(f"Snapshot inválido: {path}")
+            offset = _SNAPSHOT_HEADER.size
+            unpack_length = _SNAPSHOT_LENGTH.unpack_from
+            for _ in range(chunks):
+                (length,) = unpack_length(data, offset)
+                offset += _SNAPSHOT_LENGTH.size
+                for product_version, fields in json.loads(data[offset:offset + length]):
+                    product = Product.from_dict(fields)
+                    products[product.id] = product
+                    versions[product.id] = product_version
+                offset += length
+        state["next_id"] = next_id
+        state["version"] = version
+        return state, generation
+
+    def _replay(self, path, state, final=True):
+        """
+        Aplica um segmento de log ao estado e retorna o número de registos aplicados.
+        No último segmento, um registo final incompleto (queda a meio da escrita) é
+        descartado. Num segmento anterior isso não pode acontecer (cada rotação
+        grava o segmento inteiro): continuar deixaria um buraco e desalinharia
+        todas as versões seguintes, por isso a recuperação é interrompida.
+        """
+        products = state["products"]
+        versions = state["versions"]
+        with open(path, "rb") as f:
+            data = f.read()
+        offset = 0
+        replayed = 0
+        while offset + _RECORD_HEADER.size <= len(data):
+            op, length, crc = _RECORD_HEADER.unpack_from(data, offset)
+            start = offset + _RECORD_HEADER.size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            state["version"] += 1
+            if op == OP_PUT:
+                product = Product.from_dict(json.loads(payload))
+                products[product.id] = product
+                versions[product.id] = state["version"]
+                state["next_id"] = max(state["next_id"], product.id + 1)
+            elif op == OP_DELETE:
+                product_id = _PRODUCT_ID.unpack(payload)[0]
+                products.pop(product_id, None)
+                versions.pop(product_id, None)
+            elif op == OP_CLEAR:
+                products.clear()
+                versions.clear()
+                state["next_id"] = 1
+            offset = start + length
+            replayed += 1
+        if offset < len(data):
+            if not final:
+                raise ValueError(f"Registo corrompido no segmento de log {path} (posição {offset}).")
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+        return replayed
+
+    # --- Escrita ---
+
+    def append_put(self, product):
+        return self._append(_encode(OP_PUT, product.to_json()))
+
+    def append_delete(self, product_id):
+        return self._append(_encode(OP_DELETE, _PRODUCT_ID.pack(product_id)))
+
+    def append_clear(self):
+        return self._append(_encode(OP_CLEAR, b""))
+
+    def _append(self, record):
+        with self._cond:
+            self._buffer.append(record)
+            self._appended += 1
+            self._since_snapshot += 1
+            return self._appended
+
+    def commit(self, seq):
+        """
+        Bloqueia até que o registo `seq` (e todos os anteriores) esteja em disco.
+        Lança OSError se o log estiver em falha.
+        """
+        with self._cond:
+            seq = min(seq, self._appended)
+            while self._durable < seq:
+                self._check_failure_locked()
+                if self._flushing:
+                    self._cond.wait()
+                    continue
+                self._flush_locked()
+            due = self._since_snapshot >= self.snapshot_every
+        if due and self._snapshot_source is not None:
+            self._start_snapshot()
+
+    def _check_failure_locked(self):
+        if self._failure is not None:
+            raise OSError(f"O log de escrita está em falha desde um erro de gravação: {self._failure}")
+
+    def _flush_locked(self):
+        """Grava o buffer pendente; chamado com o lock adquirido, liberta-o durante a E/S."""
+        self._check_failure_locked()
+        self._flushing = True
+        pending, self._buffer = self._buffer, []
+        target = self._appended
+        file = self._file
+        self._cond.release()
+        try:
+            file.write(b"".join(pending))
+            file.flush()
+            if self.fsync:
+                os.fsync(file.fileno())
+        except BaseException as e:
+            self._cond.acquire()
+            # Parte do lote pode já estar no ficheiro: reenviá-lo duplicaria registos
+            self._failure = e
+            self._flushing = False
+            self._cond.notify_all()
+            raise
+        self._cond.acquire()
+        self._flushing = False
+        self._durable = target
+        self._cond.notify_all()
+
+    # --- Snapshots ---
+
+    def set_snapshot_source(self, source):
+        """
+        Regista a função que captura o estado para o snapshot. Ela deve, sob o lock
+        de escrita do repositório, chamar `rotate()` e retornar
+        (geração, pares (versão, produto), próximo ID, versão global).
+        """
+        self._snapshot_source = source
+
+    def rotate(self):
+        """Torna durável o segmento atual e abre o seguinte. Retorna a nova geração."""
+        with self._cond:
+            while self._flushing:
+                self._cond.wait()
+            if self._durable < self._appended:
+                self._flush_locked()
+            self._file.close()
+            self._open_generation(self._generation + 1)
+            self._since_snapshot = 0
+            return self._generation
+
+    def _start_snapshot(self):
+        if not self._snapshot_running.acquire(blocking=False):
+            return
+        thread = threading.Thread(target=self._snapshot_in_background, daemon=True)
+        thread.start()
+
+    def _snapshot_in_background(self):
+        try:
+            self.snapshot()
+        finally:
+            self._snapshot_running.release()
+
+    def snapshot(self):
+        """Compacta o log: grava um snapshot do estado atual e apaga os segmentos cobertos."""
+        source = self._snapshot_source
+        if source is None:
+            return
+        generation, entries, next_id, version = source()
+        path = os.path.join(self.directory, _SNAPSHOT_FILE)
+        tmp_path = path + ".tmp"
+        chunks = -(-len(entries) // _SNAPSHOT_CHUNK)
+        with open(tmp_path, "wb") as f:
+            f.write(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, generation, next_id, version, chunks))
+            for start in range(0, len(entries), _SNAPSHOT_CHUNK):
+                chunk = [
+                    (product_version, product.to_dict())
+                    for product_version, product in entries[start:start + _SNAPSHOT_CHUNK]
+                ]
+                encoded = json.dumps(chunk).encode()
+                f.write(_SNAPSHOT_LENGTH.pack(len(encoded)))
+                f.write(encoded)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        # O novo snapshot só substitui o anterior em disco depois do fsync do diretório;
+        # até lá, os segmentos que ele cobre ainda são necessários.
+        self._fsync_directory()
+        for old in self._log_generations():
+            if old < generation:
+                os.remove(self._log_path(old))
+
+    # --- Ficheiros ---
+
+    def _log_path(self, generation):
+        return os.path.join(self.directory, f"{_LOG_PREFIX}{generation:08d}")
+
+    def _log_generations(self):
+        return sorted(
+            int(name[len(_LOG_PREFIX):])
+            for name in os.listdir(self.directory)
+            if name.startswith(_LOG_PREFIX) and name[len(_LOG_PREFIX):].isdigit()
+        )
+
+    def _open_generation(self, generation):
+        self._generation = generation
+        self._file = open(self._log_path(generation), "ab")
+        # A entrada do novo segmento no diretório também tem de ser durável
+        if self.fsync:
+            self._fsync_directory()
+
+    def _fsync_directory(self):
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def close(self):
+        """Grava o que estiver pendente e fecha o log. Não deve ser chamado sob o lock do repositório."""
+        self._snapshot_source = None
+        # Espera um snapshot em curso terminar antes de fechar o segmento atual.
+        with self._snapshot_running:
+            pass
+        with self._cond:
+            while self._flushing:
+                self._cond.wait()
+            # Com o log em falha, o que estiver pendente já não pode ser gravado com segurança
+            if self._durable < self._appended and self._failure is None:
+                self._flush_locked()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
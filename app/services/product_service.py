@@ -1,34 +1,205 @@
 # /app/services/product_service.py
+from http import HTTPStatus
+from ..models.product_model import Product
 from ..repositories.product_repository import ProductRepository
+from .search_cache import SearchResultCache
+
+
+def _item_success(index, status, product):
+    return {"index": index, "status": status, "data": product}
+
+
+def _item_error(index, status, message):
+    return {"index": index, "status": status, "erro": {"message": message}}
+
+
+def _change_to_dict(change):
+    version, op, product_id, product = change
+    return {"version": version, "op": op, "id": product_id, "data": product}
 
 
 class ProductService:
-    def __init__(self):
-        self.repository = ProductRepository()
+    def __init__(self, repository=None, search_cache_max_results=0):
+        self.repository = repository or ProductRepository()
+        # Resultados da busca por nome, válidos até à próxima escrita (0 desativa)
+        self.search_cache = SearchResultCache(search_cache_max_results) if search_cache_max_results > 0 else None
 
     def get_all_products(self):
         return self.repository.find_all()
 
+    def get_products_page(self, limit, after=None, sort="id", min_price=None, max_price=None):
+        return self.repository.find_page(limit, after, sort, min_price, max_price)
+
+    def get_encoded_products_page(self, limit, after=None, sort="id", min_price=None, max_price=None, fields=None):
+        return self.repository.find_page_encoded(limit, after, sort, min_price, max_price, fields)
+
+    def iter_product_batches(self, batch_size):
+        return self.repository.iter_batches(batch_size)
+
+    def iter_encoded_product_batches(self, batch_size, fields=None):
+        return self.repository.iter_encoded_batches(batch_size, fields)
+
     def get_product_by_id(self, pid):
         return self.repository.find_by_id(pid)
 
+    def get_encoded_product(self, pid, fields=None):
+        return self.repository.find_by_id_encoded(pid, fields)
+
     def get_products_by_name(self, name):
-        return self.repository.find_by_name(name)
+        """
+        Produtos cujo nome contém `name` (sem diferenciar maiúsculas). Com a cache
+        ativa, a consulta em minúsculas e a versão do repositório formam a chave.
+        """
+        if self.search_cache is None:
+            return self.repository.find_by_name(name)
+        query = name.lower()
+        return self.search_cache.get_or_load(
+            query, self.repository.get_version(), lambda: self.repository.find_by_name(query)
+        )
+
+    def get_autocomplete(self, prefix, k):
+        """Até `k` sugestões (ID e nome) para o prefixo digitado."""
+        return [{"id": product.id, "name": product.name} for product in self.repository.autocomplete(prefix, k)]
 
     def get_products_count(self):
         return self.repository.count()
 
+    def get_changes(self, since, limit):
+        """
+        Alterações posteriores à versão `since` (até `limit`). Retorna (alterações,
+        mensagem de erro); o erro indica que o histórico retido já não chega a `since`.
+        """
+        changes = self.repository.get_changes(since, limit)
+        if changes is None:
+            return None, "O histórico de alterações já não inclui a versão pedida; sincronize a listagem completa."
+        return [_change_to_dict(change) for change in changes], None
+
+    def wait_for_changes(self, since, timeout):
+        return self.repository.wait_for_changes(since, timeout)
+
+    def get_catalogue_stats(self, bucket_edges):
+        """
+        Estatísticas de preço do catálogo e o histograma das faixas definidas por
+        `bucket_edges`, a partir dos agregados mantidos pelo repositório (sem varredura).
+        """
+        count, total, minimum, maximum = self.repository.get_price_summary()
+        counts = self.repository.count_by_price(bucket_edges)
+        upper_edges = list(bucket_edges[1:]) + [None]
+        return {
+            "total_produtos": count,
+            "preco_total": total,
+            "preco_medio": total / count if count else None,
+            "preco_minimo": minimum,
+            "preco_maximo": maximum,
+            "histograma": [
+                {"de": low, "ate": high, "total": bucket_count}
+                for low, high, bucket_count in zip(bucket_edges, upper_edges, counts)
+            ],
+        }
+
+    @property
+    def storage_id(self):
+        return self.repository.storage_id
+
+    def get_catalogue_version(self):
+        return self.repository.get_version()
+
+    def get_product_version(self, pid):
+        return self.repository.get_product_version(pid)
+
     def create_product(self, data):
-        if not data.get("name") or not data.get("price"):
-            return None, "Nome e preço são obrigatórios."
-        if data["price"] < 0:
-            return None, "O preço do produto não pode ser negativo."
+        error_message = Product.validate(data)
+        if error_message:
+            return None, error_message
         return self.repository.save(data), None
 
+    @staticmethod
+    def validate_product_changes(pid, data):
+        """
+        Valida os campos de uma atualização com as regras da criação. O 'id' pode ser
+        enviado, mas não alterado. Retorna (alterações, mensagem de erro).
+        """
+        if isinstance(data, dict) and "id" in data:
+            if data["id"] != pid:
+                return None, "O campo 'id' não pode ser alterado."
+            data = {k: v for k, v in data.items() if k != "id"}
+        error_message = Product.validate(data, partial=True)
+        if error_message:
+            return None, error_message
+        return data, None
+
+    def create_products(self, items):
+        """
+        Cria vários produtos de uma vez, validando cada item com as regras de
+        'create_product'. Os itens válidos são gravados numa única operação do
+        repositório. Retorna um resultado por item, na ordem recebida.
+        """
+        results = [None] * len(items)
+        valid = []
+        for index, data in enumerate(items):
+            error_message = Product.validate(data)
+            if error_message:
+                results[index] = _item_error(index, HTTPStatus.BAD_REQUEST, error_message)
+            else:
+                valid.append((index, data))
+
+        saved = self.repository.save_many([data for _, data in valid])
+        for (index, _), product in zip(valid, saved):
+            results[index] = _item_success(index, HTTPStatus.CREATED, product)
+        return results
+
+    def update_products(self, items):
+        """
+        Atualiza vários produtos de uma vez. Cada item deve conter o 'id' e os campos
+        a alterar; os campos enviados seguem as mesmas regras da criação.
+        """
+        results = [None] * len(items)
+        valid = []
+        for index, data in enumerate(items):
+            if not isinstance(data, dict) or not isinstance(data.get("id"), int) or isinstance(data["id"], bool):
+                results[index] = _item_error(index, HTTPStatus.BAD_REQUEST, "O campo 'id' é obrigatório.")
+                continue
+            changes, error_message = self.validate_product_changes(data["id"], data)
+            if error_message:
+                results[index] = _item_error(index, HTTPStatus.BAD_REQUEST, error_message)
+            else:
+                valid.append((index, data["id"], changes))
+
+        updated = self.repository.update_many([(pid, changes) for _, pid, changes in valid])
+        for (index, pid, _), product in zip(valid, updated):
+            if product is None:
+                results[index] = _item_error(index, HTTPStatus.NOT_FOUND, f"Produto com ID {pid} não encontrado.")
+            else:
+                results[index] = _item_success(index, HTTPStatus.OK, product)
+        return results
+
+    def delete_products(self, ids):
+        """Exclui vários produtos de uma vez. Retorna um resultado por ID."""
+        results = [None] * len(ids)
+        valid = []
+        for index, pid in enumerate(ids):
+            if not isinstance(pid, int) or isinstance(pid, bool):
+                results[index] = _item_error(index, HTTPStatus.BAD_REQUEST, "ID inválido.")
+            else:
+                valid.append((index, pid))
+
+        deleted = self.repository.delete_many([pid for _, pid in valid])
+        for (index, pid), success in zip(valid, deleted):
+            if success:
+                results[index] = {"index": index, "status": HTTPStatus.NO_CONTENT, "id": pid}
+            else:
+                results[index] = _item_error(index, HTTPStatus.NOT_FOUND, f"Produto com ID {pid} não encontrado.")
+        return results
+
     def update_product(self, pid, data):
-        if not self.repository.find_by_id(pid):
-            return None, f"Produto com ID {pid} não encontrado."
-        return self.repository.update(pid, data), None
+        """
+        Valida e aplica a atualização. Retorna (produto, None), (None, mensagem) se
+        os dados são inválidos ou (None, None) se o produto não existe.
+        """
+        changes, error_message = self.validate_product_changes(pid, data)
+        if error_message:
+            return None, error_message
+        return self.repository.update(pid, changes), None
 
     def delete_product(self, pid):
         if not self.repository.delete(pid):
@@ -0,0 +1,102 @@
+# /app/services/search_cache.py
+import threading
+from collections import OrderedDict
+
+
+class _Flight:
+    """Uma busca em curso: as requisições iguais que chegam entretanto esperam pelo seu resultado."""
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SearchResultCache:
+    """
+    Cache LRU dos resultados da busca por nome, limitada no total de produtos
+    referenciados (cada consulta conta como o tamanho do resultado mais um).
+    Cada entrada guarda a versão do repositório com que foi calculada: uma
+    consulta que a encontra com uma versão anterior descarta-a logo. Falhas
+    iguais e simultâneas (mesma consulta e versão) são agrupadas: só a primeira
+    percorre o índice e as outras recebem o mesmo resultado (single-flight).
+    """
+
+    def __init__(self, max_results=1_000_000):
+        self.max_results = max_results
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def _discard_locked(self, key):
+        entry = self._entries.pop(key)
+        self._size -= len(entry[1]) + 1
+
+    def get_or_load(self, key, version, load):
+        """Resultado de `key` na versão `version`, calculado com `load()` numa falha."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(entry[1])
+            if entry is not None and entry[0] < version:
+                self._discard_locked(key)
+            flight = self._flights.get((key, version))
+            leader = flight is None
+            if leader:
+                flight = self._flights[(key, version)] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return list(flight.result)
+
+        try:
+            flight.result = tuple(load())
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[(key, version)]
+                if flight.error is None and len(flight.result) < self.max_results:
+                    # Nunca substitui uma entrada já calculada para uma versão mais recente
+                    current = self._entries.get(key)
+                    if current is None or current[0] <= version:
+                        if current is not None:
+                            self._discard_locked(key)
+                        self._entries[key] = (version, flight.result)
+                        self._size += len(flight.result) + 1
+                        while self._size > self.max_results:
+                            self._discard_locked(next(iter(self._entries)))
+            flight.done.set()
+        return list(flight.result)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        """Contadores para ajuste do limite: acertos, falhas, pedidos agrupados, ocupação e taxa de acerto."""
+        with self._lock:
+            requests = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "entries": len(self._entries),
+                "results": self._size,
+                "max_results": self.max_results,
+                "hit_ratio": self.hits / requests if requests else 0.0,
+            }
@@ -0,0 +1,124 @@
+# /app/utils/compression.py
+import zlib
+from flask import current_app, request
+
+# brotli é opcional: sem ele, só gzip e deflate são negociados.
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende do ambiente
+    brotli = None
+
+HAS_BROTLI = brotli is not None
+
+# Parâmetro wbits do zlib para cada codificação: 31 gera o cabeçalho gzip (sem
+# data de modificação, por isso o resultado é determinístico) e 15 o formato
+# zlib, que é o que o HTTP chama 'deflate'.
+_ZLIB_WBITS = {"gzip": 31, "deflate": 15}
+SUPPORTED_ENCODINGS = ("br", "gzip", "deflate") if HAS_BROTLI else ("gzip", "deflate")
+
+
+def negotiate_encoding():
+    """
+    Codificação a usar na resposta à requisição atual, segundo o Accept-Encoding
+    (maior qualidade; em empate, a ordem de COMPRESSION_ENCODINGS), ou None.
+    """
+    accept = request.accept_encodings
+    best, best_quality = None, 0
+    for encoding in current_app.config["COMPRESSION_ENCODINGS"]:
+        if encoding not in SUPPORTED_ENCODINGS:
+            continue
+        quality = accept[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def should_compress(body):
+    return len(body) >= current_app.config["COMPRESSION_MIN_SIZE"]
+
+
+def _compressor(encoding):
+    config = current_app.config
+    if encoding == "br":
+        return brotli.Compressor(quality=config["COMPRESSION_BROTLI_QUALITY"])
+    return zlib.compressobj(config["COMPRESSION_LEVEL"], zlib.DEFLATED, _ZLIB_WBITS[encoding])
+
+
+def compress(body, encoding):
+    """Comprime um corpo inteiro com a codificação indicada."""
+    compressor = _compressor(encoding)
+    if encoding == "br":
+        return compressor.process(body) + compressor.finish()
+    return compressor.compress(body) + compressor.flush()
+
+
+def compress_chunks(chunks, encoding, compressor):
+    """
+    Comprime um corpo em streaming com um compressor já criado (ver _compressor):
+    o gerador só corre depois de o contexto da aplicação ter terminado. Cada
+    bloco é enviado assim que comprimido (flush de sincronização), para o
+    cliente não esperar pelo fim da exportação.
+    """
+    if encoding == "br":
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def encoded_etag(etag, encoding):
+    """ETag da variante comprimida: cada codificação é uma representação diferente."""
+    return f"{etag}-{encoding}"
+
+
+def _is_compressible(response):
+    return response.mimetype in current_app.config["COMPRESSION_MIMETYPES"]
+
+
+def compress_response(response):
+    """
+    Comprime a resposta se o cliente aceitar uma das codificações configuradas:
+    respostas normais a partir de COMPRESSION_MIN_SIZE bytes e respostas em
+    streaming sempre. Respostas já codificadas (por exemplo, servidas da cache já
+    comprimidas) e tipos não listados em COMPRESSION_MIMETYPES ficam como estão.
+    """
+    if not _is_compressible(response):
+        return response
+    response.vary.add("Accept-Encoding")
+    if (
+        "Content-Encoding" in response.headers
+        or response.status_code < 200
+        or response.status_code in (204, 304)
+        or request.method == "HEAD"
+    ):
+        return response
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_chunks(response.iter_encoded(), encoding, _compressor(encoding))
+        response.headers.pop("Content-Length", None)
+    else:
+        body = response.get_data()
+        if not should_compress(body):
+            return response
+        response.set_data(compress(body, encoding))
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(encoded_etag(etag, encoding), weak)
+    return response
+
+
+def init_app(app):
+    """Regista a compressão das respostas na aplicação."""
+    if app.config["COMPRESSION_ENCODINGS"]:
+        app.after_request(compress_response)
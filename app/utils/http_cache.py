@@ -0,0 +1,107 @@
+# /app/utils/http_cache.py
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from flask import current_app, request
+from .compression import compress, encoded_etag, negotiate_encoding, should_compress, SUPPORTED_ENCODINGS
+
+
+class ResponseCache:
+    """
+    Cache LRU de corpos de resposta já serializados, limitada em bytes. Cada entrada
+    guarda a versão do repositório com que foi gerada: qualquer escrita muda a
+    versão, e uma entrada com versão diferente é tratada como ausente e substituída.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, key, version, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous[1])
+            self._entries[key] = (version, body)
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self._size}
+
+
+def not_modified_response(etag):
+    """
+    Retorna uma resposta 304 se o cliente já tem a representação com esta ETag
+    (ou a de uma das suas variantes comprimidas), ou None.
+    """
+    if_none_match = request.if_none_match
+    for candidate in (etag, *(encoded_etag(etag, encoding) for encoding in SUPPORTED_ENCODINGS)):
+        if if_none_match.contains(candidate):
+            response = current_app.response_class(status=HTTPStatus.NOT_MODIFIED)
+            response.set_etag(candidate)
+            return response
+    return None
+
+
+def cached_success_response(key, version, etag, load_body):
+    """
+    Resposta de sucesso para leituras com ETag: responde 304 a um If-None-Match
+    correspondente e serve o corpo da cache enquanto a versão não mudar.
+    `load_body` produz o corpo serializado numa falha da cache; se retornar None,
+    retorna None (recurso inexistente) para o controlador responder 404.
+    A variante comprimida para a codificação negociada também fica em cache,
+    por isso cada versão do corpo é comprimida uma única vez.
+    """
+    response = not_modified_response(etag)
+    if response is not None:
+        return response
+
+    cache = current_app.extensions["response_cache"]
+    body = cache.get(key, version)
+    if body is None:
+        body = load_body()
+        if body is None:
+            return None
+        cache.put(key, version, body)
+
+    encoding = negotiate_encoding() if current_app.config["COMPRESSION_ENCODINGS"] else None
+    if encoding is not None and should_compress(body):
+        compressed_key = (key, encoding)
+        compressed = cache.get(compressed_key, version)
+        if compressed is None:
+            compressed = compress(body, encoding)
+            cache.put(compressed_key, version, compressed)
+        response = current_app.response_class(compressed, mimetype="application/json")
+        response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        response.set_etag(encoded_etag(etag, encoding))
+        return response
+
+    response = current_app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    return response
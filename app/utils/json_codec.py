@@ -0,0 +1,85 @@
+# /app/utils/json_codec.py
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+# orjson é opcional: quando instalado, é usado para toda a serialização JSON da API.
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+HAS_ORJSON = orjson is not None
+
+
+def _json_default(obj):
+    """
+    Converte objetos do domínio (com `to_dict`, como Product) e os mesmos tipos
+    extra que o provider padrão do Flask: datas (formato HTTP), Decimal, UUID,
+    dataclasses e objetos com `__html__`.
+    """
+    to_dict = getattr(obj, "to_dict", None)
+    if to_dict is not None:
+        return to_dict()
+    if isinstance(obj, date):
+        return http_date(obj)
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, "__html__"):
+        return str(obj.__html__())
+    raise TypeError(f"Objeto do tipo {type(obj).__name__} não é serializável em JSON")
+
+
+def dumps_bytes(obj):
+    """Serializa `obj` em JSON compacto (UTF-8), com orjson quando disponível."""
+    if orjson is not None:
+        try:
+            # As datas passam por _json_default, para saírem no mesmo formato sem orjson
+            return orjson.dumps(
+                obj, default=_json_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+            )
+        except TypeError:
+            # O orjson não aceita inteiros fora dos 64 bits, entre outros casos que o json aceita
+            pass
+    return json.dumps(obj, default=_json_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class DomainJSONProvider(DefaultJSONProvider):
+    """Provider JSON padrão do Flask que também serializa os modelos do domínio (via `to_dict`)."""
+
+    default = staticmethod(_json_default)
+
+
+class FastJSONProvider(DomainJSONProvider):
+    """
+    Provider JSON do Flask baseado em orjson (com o fallback de `dumps_bytes`).
+    As chaves não são ordenadas e a saída é sempre compacta.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
@@ -0,0 +1,375 @@
+# /app/utils/metrics.py
+import hmac
+import math
+import threading
+import weakref
+from bisect import bisect_left
+from time import perf_counter
+from flask import Response, current_app, g, has_app_context, request
+from .responses import unauthorized_error
+
+# Limites (segundos) dos histogramas de latência
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+LOCK_BUCKETS = (0.000001, 0.000005, 0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+# Número de threads registadas a partir do qual se juntam as séries das que já terminaram
+_COLLECT_DEAD_THREADS = 256
+
+
+class Histogram:
+    """
+    Histograma com limites fixos e etiquetas. `observe` escreve apenas nos
+    contadores da thread atual, sem lock; as séries de todas as threads só são
+    somadas quando as métricas são lidas (`MetricsRegistry.collect`).
+    """
+
+    def __init__(self, registry, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, labels=()):
+        """Regista uma observação; `labels` segue a ordem de `labelnames`."""
+        registry = self.registry
+        if not registry.enabled:
+            return
+        try:
+            series = registry._local.series
+        except AttributeError:
+            series = registry._register_thread()
+        key = (self, labels)
+        data = series.get(key)
+        if data is None:
+            # Contagem de cada faixa (a última é +Inf) seguida da soma dos valores
+            data = series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        data[bisect_left(self.buckets, value)] += 1
+        data[-1] += value
+
+    def time(self, labels=()):
+        """Context manager que observa a duração do bloco."""
+        return _Timer(self, labels)
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_labels", "_start")
+
+    def __init__(self, histogram, labels):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._histogram.observe(perf_counter() - self._start, self._labels)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Registo das métricas da aplicação. Cada thread tem o seu próprio dicionário
+    de séries, por isso registar uma observação não disputa nenhum lock. Os
+    dicionários das threads que já terminaram são juntados num total acumulado,
+    para que servidores que criam uma thread por requisição não os acumulem.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Pares (referência fraca para a thread, séries da thread)
+        self._threads = []
+        self._retired = {}
+        self._collect_at = _COLLECT_DEAD_THREADS
+        self._metrics = []
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        histogram = Histogram(self, name, help_text, labelnames, buckets)
+        with self._lock:
+            self._metrics.append(histogram)
+        return histogram
+
+    def _register_thread(self):
+        series = self._local.series = {}
+        with self._lock:
+            self._threads.append((weakref.ref(threading.current_thread()), series))
+            if len(self._threads) >= self._collect_at:
+                self._retire_dead_threads()
+        return series
+
+    def _retire_dead_threads(self):
+        """Junta no total acumulado as séries das threads que já terminaram (com o lock)."""
+        alive = []
+        for ref, series in self._threads:
+            thread = ref()
+            if thread is not None and thread.is_alive():
+                alive.append((ref, series))
+            else:
+                _merge_series(self._retired, series)
+        self._threads = alive
+        self._collect_at = max(_COLLECT_DEAD_THREADS, 2 * len(alive))
+
+    def _merged_series(self):
+        with self._lock:
+            self._retire_dead_threads()
+            merged = {}
+            _merge_series(merged, self._retired)
+            for _, series in self._threads:
+                # Cópia primeiro: a thread dona pode estar a inserir séries novas
+                _merge_series(merged, dict(series))
+            return merged, list(self._metrics)
+
+    def reset(self):
+        """Zera todas as séries (usado nos testes)."""
+        with self._lock:
+            for _, series in self._threads:
+                series.clear()
+            self._retired = {}
+
+    def collect(self):
+        """
+        Retorna as métricas somadas de todas as threads:
+        {histograma: {etiquetas: (contagens por faixa, soma)}}.
+        """
+        merged, _ = self._merged_series()
+        result = {}
+        for (histogram, labels), data in merged.items():
+            result.setdefault(histogram, {})[labels] = (data[:-1], data[-1])
+        return result
+
+    def render(self, collectors=()):
+        """
+        Texto no formato de exposição do Prometheus (versão 0.0.4). Cada coletor é
+        uma função que retorna métricas calculadas na hora, em tuplos
+        (nome, tipo, ajuda, [(etiquetas, valor), ...]).
+        """
+        merged, metrics = self._merged_series()
+        by_metric = {}
+        for (histogram, labels), data in merged.items():
+            by_metric.setdefault(histogram, []).append((labels, data))
+
+        lines = []
+        for histogram in metrics:
+            lines.append(f"# HELP {histogram.name} {_escape_help(histogram.help)}")
+            lines.append(f"# TYPE {histogram.name} histogram")
+            for labels, data in sorted(by_metric.get(histogram, ()), key=lambda item: item[0]):
+                pairs = list(zip(histogram.labelnames, labels))
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (math.inf,), data):
+                    cumulative += count
+                    le = "+Inf" if bound == math.inf else repr(float(bound))
+                    lines.append(f"{histogram.name}_bucket{_format_labels(pairs + [('le', le)])} {cumulative}")
+                lines.append(f"{histogram.name}_sum{_format_labels(pairs)} {_format_value(data[-1])}")
+                lines.append(f"{histogram.name}_count{_format_labels(pairs)} {cumulative}")
+        for collector in collectors:
+            for name, kind, help_text, samples in collector():
+                lines.append(f"# HELP {name} {_escape_help(help_text)}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _merge_series(target, source):
+    for key, data in source.items():
+        current = target.get(key)
+        if current is None:
+            target[key] = list(data)
+        else:
+            for i, value in enumerate(data):
+                current[i] += value
+
+
+def _escape_help(text):
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+
+# Registo global: o repositório em memória e o token_required também são globais ao processo
+metrics = MetricsRegistry()
+
+
+def metrics_enabled():
+    """
+    Se as observações devem ser registadas: dentro de uma aplicação, conforme o
+    METRICS_ENABLED dessa aplicação (ver init_app); fora dela (CLI, scripts), conforme o registo.
+    """
+    if has_app_context():
+        return current_app.extensions.get("metrics") is not None
+    return metrics.enabled
+
+REQUEST_LATENCY = metrics.histogram(
+    "http_request_duration_seconds",
+    "Latência das requisições HTTP por endpoint, método e status.",
+    ("endpoint", "method", "status"),
+)
+JWT_DECODE_LATENCY = metrics.histogram(
+    "jwt_decode_duration_seconds",
+    "Tempo de verificação e decodificação dos tokens JWT (falhas da cache de tokens).",
+    ("result",),
+)
+LOCK_WAIT = metrics.histogram(
+    "repository_lock_wait_seconds",
+    "Tempo de espera para adquirir o lock do repositório de produtos.",
+    ("lock", "mode"),
+    LOCK_BUCKETS,
+)
+LOCK_HOLD = metrics.histogram(
+    "repository_lock_hold_seconds",
+    "Tempo durante o qual o lock do repositório de produtos fica adquirido.",
+    ("lock", "mode"),
+    LOCK_BUCKETS,
+)
+
+
+class _TimedGuard:
+    """Guard de um lock que observa o tempo de espera e o tempo de posse."""
+    __slots__ = ("_guard", "_labels", "_acquired")
+
+    def __init__(self, guard, labels):
+        self._guard = guard
+        self._labels = labels
+
+    def __enter__(self):
+        start = perf_counter()
+        self._guard.__enter__()
+        self._acquired = perf_counter()
+        LOCK_WAIT.observe(self._acquired - start, self._labels)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        held = perf_counter() - self._acquired
+        self._guard.__exit__(exc_type, exc, tb)
+        LOCK_HOLD.observe(held, self._labels)
+        return False
+
+
+class TimedRWLock:
+    """
+    Envolve um lock com a interface de RWLock (`read()`/`write()`) e mede a espera
+    e a posse de cada aquisição. Com as métricas desligadas devolve os guards do
+    lock original, sem custo adicional.
+    """
+
+    def __init__(self, lock, name):
+        self.lock = lock
+        self._read_labels = (name, "read")
+        self._write_labels = (name, "write")
+
+    def read(self):
+        if not metrics_enabled():
+            return self.lock.read()
+        return _TimedGuard(self.lock.read(), self._read_labels)
+
+    def write(self):
+        if not metrics_enabled():
+            return self.lock.write()
+        return _TimedGuard(self.lock.write(), self._write_labels)
+
+
+def init_app(app):
+    """
+    Regista a instrumentação das requisições e a rota /metrics na aplicação. O
+    estado fica em app.extensions["metrics"] (None se METRICS_ENABLED está
+    desligado), por isso várias aplicações no mesmo processo não se sobrepõem.
+    """
+    enabled = app.config["METRICS_ENABLED"]
+    app.extensions["metrics"] = metrics if enabled else None
+    if not enabled:
+        return
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = perf_counter()
+
+    @app.after_request
+    def _observe_request(response):
+        start = g.pop("_metrics_start", None)
+        if start is not None:
+            # Para respostas em streaming mede até ao início do envio do corpo
+            labels = (request.endpoint or "unmatched", request.method, str(response.status_code))
+            REQUEST_LATENCY.observe(perf_counter() - start, labels)
+        return response
+
+    def _cache_metrics():
+        token_stats = app.extensions["token_cache"].stats()
+        response_stats = app.extensions["response_cache"].stats()
+        return [
+            ("token_cache_requests_total", "counter", "Consultas à cache de tokens JWT verificados.",
+             [({"result": "hit"}, token_stats["hits"]), ({"result": "miss"}, token_stats["misses"])]),
+            ("token_cache_entries", "gauge", "Tokens guardados na cache.", [({}, token_stats["size"])]),
+            ("response_cache_requests_total", "counter", "Consultas à cache de respostas de /produtos.",
+             [({"result": "hit"}, response_stats["hits"]), ({"result": "miss"}, response_stats["misses"])]),
+            ("response_cache_bytes", "gauge", "Bytes ocupados pela cache de respostas.",
+             [({}, response_stats["bytes"])]),
+        ]
+
+    def _search_cache_metrics():
+        search_cache = app.extensions["product_service"].search_cache
+        if search_cache is None:
+            return []
+        stats = search_cache.stats()
+        return [
+            ("search_cache_requests_total", "counter",
+             "Buscas por nome: acertos, falhas e pedidos agrupados com uma busca igual em curso.",
+             [({"result": result}, stats[key]) for result, key in
+              (("hit", "hits"), ("miss", "misses"), ("coalesced", "coalesced"))]),
+            ("search_cache_entries", "gauge", "Consultas guardadas na cache de buscas.", [({}, stats["entries"])]),
+            ("search_cache_results", "gauge", "Produtos referenciados pelos resultados da cache de buscas.",
+             [({}, stats["results"])]),
+        ]
+
+    def _repository_metrics():
+        service = app.extensions["product_service"]
+        return [
+            ("product_repository_products", "gauge", "Produtos no catálogo.", [({}, service.repository.count())]),
+            ("product_repository_version", "gauge", "Versão atual do catálogo.",
+             [({}, service.repository.get_version())]),
+        ]
+
+    def _rate_limit_metrics():
+        rate_limiter = app.extensions["rate_limiter"]
+        if rate_limiter is None:
+            return []
+        stats = rate_limiter.stats()
+        return [
+            ("rate_limit_requests_total", "counter", "Requisições admitidas e rejeitadas (429) por parceiro.",
+             [({"client_id": client_id, "result": "admitted"}, partner["admitted"]) for client_id, partner in stats.items()]
+             + [({"client_id": client_id, "result": f"rejected_{reason}"}, count)
+                for client_id, partner in stats.items() for reason, count in partner["rejected"].items()]),
+            ("rate_limit_active_requests", "gauge", "Requisições em curso por parceiro.",
+             [({"client_id": client_id}, partner["active"]) for client_id, partner in stats.items()]),
+        ]
+
+    # Os histogramas são globais ao processo; as caches, os limites e o repositório são desta aplicação
+    collectors = (_cache_metrics, _search_cache_metrics, _rate_limit_metrics, _repository_metrics)
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        # Expõe os client_id dos parceiros: com METRICS_TOKEN definido, só o scraper autorizado a lê
+        token = app.config["METRICS_TOKEN"]
+        # Compara bytes: com str, compare_digest rejeita (TypeError) texto não ASCII
+        authorization = request.headers.get("Authorization", "").encode()
+        if token and not hmac.compare_digest(authorization, f"Bearer {token}".encode()):
+            return unauthorized_error("Token de métricas inválido ou ausente.")
+        return Response(metrics.render(collectors), mimetype="text/plain; version=0.0.4; charset=utf-8")
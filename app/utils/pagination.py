@@ -0,0 +1,113 @@
+# /app/utils/pagination.py
+import base64
+import json
+import math
+
+
+def encode_cursor(value):
+    """Codifica a posição da última linha de uma página num cursor opaco."""
+    raw = json.dumps(value, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decodifica um cursor gerado por `encode_cursor`. Lança ValueError se inválido."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError, RecursionError):
+        # RecursionError: JSON aninhado demais (ex.: milhares de '['), que nunca vem de encode_cursor
+        raise ValueError("Cursor inválido.")
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _parse_price(args, name):
+    raw = args.get(name)
+    if raw is None or raw == "":
+        return None
+    try:
+        value = float(raw)
+    except ValueError:
+        value = None
+    if value is None or not math.isfinite(value):
+        raise ValueError(f"O parâmetro '{name}' deve ser numérico.")
+    return value
+
+
+def parse_filter_args(args, sort_fields):
+    """
+    Lê os parâmetros 'sort', 'min_price' e 'max_price' da query string.
+    Retorna (sort, min_price, max_price). Lança ValueError com uma mensagem para o cliente.
+    """
+    sort = args.get("sort") or "id"
+    if sort not in sort_fields:
+        raise ValueError(f"O parâmetro 'sort' deve ser um de: {', '.join(sort_fields)}.")
+    min_price = _parse_price(args, "min_price")
+    max_price = _parse_price(args, "max_price")
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise ValueError("O parâmetro 'min_price' não pode ser maior que 'max_price'.")
+    return sort, min_price, max_price
+
+
+def parse_fields_arg(args, fields):
+    """
+    Lê o parâmetro 'fields' (campos separados por vírgula) da query string.
+    Retorna os campos pedidos na ordem de `fields`, ou None sem o parâmetro ou
+    quando todos foram pedidos. Lança ValueError com uma mensagem para o cliente.
+    """
+    raw = args.get("fields")
+    if raw is None:
+        return None
+    requested = {name.strip() for name in raw.split(",")} - {""}
+    if not requested:
+        raise ValueError("O parâmetro 'fields' deve indicar pelo menos um campo.")
+    unknown = requested.difference(fields)
+    if unknown:
+        raise ValueError(
+            f"Campos desconhecidos em 'fields': {', '.join(sorted(unknown))}. Use: {', '.join(fields)}."
+        )
+    selected = tuple(field for field in fields if field in requested)
+    return None if len(selected) == len(fields) else selected
+
+
+def parse_limit_arg(args, default_limit, max_limit, name="limit"):
+    """Lê o limite `name` ('limit') da query string. Lança ValueError com uma mensagem para o cliente."""
+    raw_limit = args.get(name)
+    if raw_limit is None:
+        return default_limit
+    try:
+        limit = int(raw_limit)
+    except ValueError:
+        raise ValueError(f"O parâmetro '{name}' deve ser um número inteiro.")
+    if not 1 <= limit <= max_limit:
+        raise ValueError(f"O parâmetro '{name}' deve estar entre 1 e {max_limit}.")
+    return limit
+
+
+def parse_page_args(args, default_limit, max_limit, sort="id"):
+    """
+    Lê os parâmetros 'limit' e 'cursor' da query string.
+    Retorna (limit, after), onde `after` é a chave do último item da página anterior
+    na ordenação `sort` (o ID, ou um par (valor, ID)) ou None na primeira página.
+    Lança ValueError com uma mensagem para o cliente.
+    """
+    limit = parse_limit_arg(args, default_limit, max_limit)
+    cursor = args.get("cursor")
+    if not cursor:
+        return limit, None
+    after = decode_cursor(cursor)
+    if sort == "id":
+        valid = _is_int(after) and after >= 0
+    else:
+        value_type = str if sort == "name" else (int, float)
+        valid = (
+            isinstance(after, list) and len(after) == 2 and _is_int(after[1])
+            and isinstance(after[0], value_type) and not isinstance(after[0], bool)
+        )
+        after = tuple(after) if valid else None
+    if not valid:
+        raise ValueError("Cursor inválido.")
+    return limit, after
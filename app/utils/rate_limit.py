@@ -0,0 +1,130 @@
+# /app/utils/rate_limit.py
+import math
+import threading
+from time import monotonic
+from flask import g
+
+# Motivos de rejeição, usados nas mensagens e nas métricas
+RATE_LIMITED = "rate"
+CONCURRENCY_LIMITED = "concurrency"
+
+
+class PartnerLimiter:
+    """
+    Limites de um parceiro: token bucket de `requests_per_second` com capacidade
+    `burst`, e no máximo `max_concurrent` requisições em curso. Qualquer limite
+    None fica desativado. O lock é só deste parceiro e protege meia dúzia de
+    operações aritméticas: parceiros diferentes nunca esperam uns pelos outros.
+    """
+
+    __slots__ = (
+        "rate", "burst", "max_concurrent", "admitted", "rejected", "active",
+        "_tokens", "_updated", "_lock",
+    )
+
+    def __init__(self, requests_per_second=None, burst=None, max_concurrent=None):
+        self.rate = requests_per_second
+        self.burst = burst if burst is not None else requests_per_second
+        self.max_concurrent = max_concurrent
+        self.admitted = 0
+        self.rejected = {RATE_LIMITED: 0, CONCURRENCY_LIMITED: 0}
+        self.active = 0
+        self._tokens = self.burst
+        self._updated = monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Tenta admitir uma requisição. Retorna (None, 0) se foi admitida (chamar
+        `release` no fim) ou (motivo, segundos até haver capacidade).
+        """
+        with self._lock:
+            if self.max_concurrent is not None and self.active >= self.max_concurrent:
+                self.rejected[CONCURRENCY_LIMITED] += 1
+                # Não há como prever quando uma requisição em curso termina
+                return CONCURRENCY_LIMITED, 1.0
+            if self.rate is not None:
+                now = monotonic()
+                tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if tokens < 1:
+                    self._tokens = tokens
+                    self.rejected[RATE_LIMITED] += 1
+                    return RATE_LIMITED, (1 - tokens) / self.rate
+                self._tokens = tokens - 1
+            self.active += 1
+            self.admitted += 1
+            return None, 0.0
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+
+
+class RateLimiter:
+    """
+    Controlo de admissão por client_id, com os limites de cada parceiro
+    ('rate_limit' em AUTHORIZED_PARTNERS) ou, na falta deles, os limites padrão.
+    Os limitadores são criados no primeiro pedido de cada parceiro e ficam em memória.
+    """
+
+    def __init__(self, partners, default_limits=None):
+        self.partners = partners
+        self.default_limits = default_limits
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def limiter_for(self, client_id):
+        """Limitador do parceiro, ou None se ele não tem limites."""
+        try:
+            return self._limiters[client_id]
+        except KeyError:
+            pass
+        partner = self.partners.get(client_id) or {}
+        limits = partner.get("rate_limit", self.default_limits)
+        with self._lock:
+            return self._limiters.setdefault(client_id, PartnerLimiter(**limits) if limits else None)
+
+    def stats(self):
+        """Contadores por parceiro: admitidas, rejeitadas por motivo e requisições em curso."""
+        with self._lock:
+            limiters = [(client_id, limiter) for client_id, limiter in self._limiters.items() if limiter is not None]
+        return {
+            client_id: {"admitted": limiter.admitted, "rejected": dict(limiter.rejected), "active": limiter.active}
+            for client_id, limiter in limiters
+        }
+
+
+def retry_after_seconds(wait):
+    """Valor do cabeçalho Retry-After: segundos inteiros, arredondados para cima (mínimo 1)."""
+    return max(1, math.ceil(wait))
+
+
+def admit(client_id, limiter):
+    """
+    Aplica os limites do parceiro à requisição atual. Retorna (motivo, segundos
+    de espera) se ela deve ser rejeitada, ou (None, 0). A vaga de concorrência é
+    libertada no fim do pedido (teardown registado por init_app); nas respostas
+    em streaming, quando a view retorna, antes do envio do corpo.
+    """
+    partner_limiter = limiter.limiter_for(client_id)
+    if partner_limiter is None:
+        return None, 0.0
+    reason, wait = partner_limiter.acquire()
+    if reason is None:
+        g._rate_limit_slot = partner_limiter
+    return reason, wait
+
+
+def init_app(app):
+    """Cria o controlo de admissão (se RATE_LIMIT_ENABLED) e liberta as vagas no fim de cada pedido."""
+    from ..controllers.auth_controller import AUTHORIZED_PARTNERS
+
+    enabled = app.config["RATE_LIMIT_ENABLED"]
+    app.extensions["rate_limiter"] = RateLimiter(AUTHORIZED_PARTNERS, app.config["RATE_LIMIT_DEFAULT"]) if enabled else None
+
+    @app.teardown_request
+    def _release_slot(exc=None):
+        slot = g.pop("_rate_limit_slot", None)
+        if slot is not None:
+            slot.release()
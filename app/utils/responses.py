@@ -1,6 +1,9 @@
 # /app/utils/responses.py
-from flask import jsonify
+from flask import jsonify, Response
 from http import HTTPStatus
+from .json_codec import dumps_bytes
+
+_SUCCESS_PREFIX = b'{"status":"success","data":'
 
 def success_response(data=None, status_code=HTTPStatus.OK):
     """
@@ -13,6 +16,55 @@ def success_response(data=None, status_code=HTTPStatus.OK):
     }
     return jsonify(response_data), status_code
 
+def success_body(data=None):
+    """Serializa o envelope de sucesso (o mesmo de 'success_response') em bytes."""
+    return dumps_bytes({"status": "success", "data": data})
+
+def success_item_body(fragment):
+    """Monta o envelope de sucesso à volta de um item já codificado em JSON."""
+    return b"".join((_SUCCESS_PREFIX, fragment, b"}"))
+
+def success_page_body(fragments, next_cursor):
+    """
+    Monta o corpo de uma página de listagem a partir dos produtos já codificados
+    em JSON (fragmentos em cache no repositório), sem voltar a serializá-los.
+    """
+    return b"".join((
+        _SUCCESS_PREFIX, b'{"items":[', b",".join(fragments),
+        b'],"next_cursor":', dumps_bytes(next_cursor), b"}}",
+    ))
+
+def streamed_list_response(encoded_batches, status_code=HTTPStatus.OK):
+    """
+    Cria uma resposta JSON em streaming (chunked) com o mesmo envelope de
+    'success_response', onde 'data' é uma lista. Recebe um iterável de lotes de
+    itens já codificados em JSON, emitindo um lote por vez para manter a memória limitada.
+    """
+    def generate():
+        yield _SUCCESS_PREFIX + b"["
+        separator = b""
+        for batch in encoded_batches:
+            if batch:
+                yield separator + b",".join(batch)
+                separator = b","
+        yield b"]}"
+
+    return Response(generate(), status=status_code, mimetype="application/json")
+
+def sse_event(event, data, event_id=None):
+    """Codifica um evento Server-Sent Events com os dados em JSON."""
+    head = f"id: {event_id}\nevent: {event}\n" if event_id is not None else f"event: {event}\n"
+    return b"".join((head.encode(), b"data: ", dumps_bytes(data), b"\n\n"))
+
+def event_stream_response(events):
+    """Cria uma resposta Server-Sent Events a partir de um iterável de eventos já codificados."""
+    return Response(
+        events,
+        mimetype="text/event-stream",
+        # Sem cache e sem buffering em proxies: cada evento deve chegar de imediato
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 def error_response(message, status_code):
     """
     Cria uma resposta JSON de erro padronizada.
@@ -38,3 +90,9 @@ def unauthorized_error(message="Acesso não autorizado."):
     """Cria uma resposta para erro 401 Unauthorized."""
     return error_response(message, HTTPStatus.UNAUTHORIZED)
 
+def too_many_requests_error(message, retry_after):
+    """Cria uma resposta para erro 429 Too Many Requests, com o cabeçalho Retry-After (segundos)."""
+    response, status_code = error_response(message, HTTPStatus.TOO_MANY_REQUESTS)
+    response.headers["Retry-After"] = str(retry_after)
+    return response, status_code
+
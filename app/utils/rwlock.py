@@ -0,0 +1,87 @@
+# /app/utils/rwlock.py
+import threading
+
+
+class _Guard:
+    """Context manager reutilizável que chama as funções de aquisição e liberação."""
+    __slots__ = ("_acquire", "_release")
+
+    def __init__(self, acquire, release):
+        self._acquire = acquire
+        self._release = release
+
+    def __enter__(self):
+        self._acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._release()
+        return False
+
+
+class RWLock:
+    """
+    Lock de leitura/escrita: vários leitores em paralelo, escritores exclusivos.
+    Escritores têm preferência (novos leitores esperam enquanto há escritor na fila),
+    evitando que um fluxo contínuo de leituras impeça as escritas.
+
+        with lock.read(): ...
+        with lock.write(): ...
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+        self._read_guard = _Guard(self.acquire_read, self.release_read)
+        self._write_guard = _Guard(self.acquire_write, self.release_write)
+
+    def acquire_read(self):
+        with self._lock:
+            # Caminho rápido: sem escritor ativo ou à espera, entra sem usar a Condition.
+            if not self._writer and not self._writers_waiting:
+                self._readers += 1
+                return
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._lock:
+            self._readers -= 1
+            if not self._readers and self._writers_waiting:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    def read(self):
+        return self._read_guard
+
+    def write(self):
+        return self._write_guard
+
+
+class ExclusiveLock:
+    """Mutex simples com a mesma interface de RWLock (leituras também são exclusivas)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def read(self):
+        return self._lock
+
+    def write(self):
+        return self._lock
@@ -1,8 +1,71 @@
 # /app/utils/security.py
+import threading
+import time
 import jwt
+from collections import OrderedDict
 from functools import wraps
+from time import perf_counter
 from flask import request, g, current_app
-from .responses import unauthorized_error, bad_request_error
+from .metrics import JWT_DECODE_LATENCY, metrics_enabled
+from .rate_limit import RATE_LIMITED, admit, retry_after_seconds
+from .responses import unauthorized_error, bad_request_error, too_many_requests_error
+
+
+class VerifiedTokenCache:
+    """
+    Cache LRU limitado de tokens JWT já verificados. Um acerto devolve o payload
+    sem refazer a verificação HMAC nem o parsing. Cada entrada respeita o 'exp'
+    do próprio token, e a cache é esvaziada quando a SECRET_KEY muda.
+    """
+
+    def __init__(self, max_size=10_000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._secret_key = None
+        self._lock = threading.Lock()
+
+    def _check_secret_locked(self, secret_key):
+        if secret_key != self._secret_key:
+            self._entries.clear()
+            self._secret_key = secret_key
+
+    def get(self, token, secret_key):
+        """Retorna o payload de um token válido em cache, ou None."""
+        with self._lock:
+            self._check_secret_locked(secret_key)
+            entry = self._entries.get(token)
+            if entry is not None:
+                payload, expires_at = entry
+                if expires_at is None or expires_at > time.time():
+                    self._entries.move_to_end(token)
+                    self.hits += 1
+                    return payload
+                del self._entries[token]
+            self.misses += 1
+            return None
+
+    def put(self, token, payload, secret_key):
+        """Guarda o payload de um token acabado de verificar."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._check_secret_locked(secret_key)
+            self._entries[token] = (payload, payload.get("exp"))
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        """Contadores para acompanhamento: acertos, falhas e ocupação."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "max_size": self.max_size}
+
+def _observe_jwt_decode(start, result):
+    """Regista o tempo de decodificação se a aplicação atual tem as métricas ligadas."""
+    if metrics_enabled():
+        JWT_DECODE_LATENCY.observe(perf_counter() - start, (result,))
 
 def token_required(f):
     """Decorator para validar o token JWT."""
@@ -20,15 +83,36 @@ def token_required(f):
         if not token:
             return unauthorized_error("Token de autenticação ausente.")
 
-        try:
-            secret_key = current_app.config['SECRET_KEY']
-            data = jwt.decode(token, secret_key, algorithms=["HS256"])
-            # Armazena os dados do usuário no contexto da requisição
-            g.current_user = data
-        except jwt.ExpiredSignatureError:
-            return unauthorized_error("Token expirado.")
-        except jwt.InvalidTokenError:
-            return unauthorized_error("Token inválido.")
+        secret_key = current_app.config['SECRET_KEY']
+        token_cache = current_app.extensions["token_cache"]
+        data = token_cache.get(token, secret_key)
+        if data is None:
+            start = perf_counter()
+            try:
+                data = jwt.decode(token, secret_key, algorithms=["HS256"])
+            except jwt.ExpiredSignatureError:
+                _observe_jwt_decode(start, "expired")
+                return unauthorized_error("Token expirado.")
+            except jwt.InvalidTokenError:
+                _observe_jwt_decode(start, "invalid")
+                return unauthorized_error("Token inválido.")
+            _observe_jwt_decode(start, "valid")
+            token_cache.put(token, data, secret_key)
+
+        # Armazena os dados do usuário no contexto da requisição
+        g.current_user = dict(data)
+
+        # Limites do parceiro, aplicados antes de qualquer trabalho no repositório
+        rate_limiter = current_app.extensions["rate_limiter"]
+        if rate_limiter is not None:
+            reason, wait = admit(data.get("client_id"), rate_limiter)
+            if reason is not None:
+                retry_after = retry_after_seconds(wait)
+                if reason == RATE_LIMITED:
+                    message = f"Limite de requisições excedido. Tente novamente em {retry_after} s."
+                else:
+                    message = "Demasiadas requisições simultâneas. Tente novamente mais tarde."
+                return too_many_requests_error(message, retry_after)
 
         return f(*args, **kwargs)
     return decorated
@@ -0,0 +1,9 @@
+# /asgi.py
+import os
+from app.asgi import create_asgi_app
+
+# Ponto de entrada do modo assíncrono, por exemplo: uvicorn asgi:app
+# O ambiente vem de FLASK_ENV, como em run.py.
+env_name = os.getenv('FLASK_ENV') or 'default'
+
+app = create_asgi_app(env_name)
@@ -0,0 +1,280 @@
+# /benchmarks/bench_concurrency.py
+"""
+Benchmark de capacidade de conexões simultâneas: abre N streams SSE
+(/produtos/changes/stream) parados no servidor WSGI com uma thread por conexão
+e no adaptador ASGI, e mede threads e memória do processo, a latência de
+GET /produtos/{id} com os streams abertos e o tempo até uma escrita chegar a todos.
+
+    python -m benchmarks.bench_concurrency --connections 100 500 1000 --json concurrency.json
+
+O modo ASGI usa um servidor HTTP/1.1 mínimo em asyncio incluído aqui (sem
+dependências), suficiente para a medição; em produção use `uvicorn asgi:app`.
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+from app import create_app
+from app.asgi import ASGIAdapter
+from app.repositories.product_repository import ProductRepository
+from benchmarks.bench_http import CREDENTIALS, QuietRequestHandler
+from benchmarks.common import latency_summary, percentile, write_results
+
+SERVERS = ("threaded", "asgi")
+
+
+def _rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+# --- Servidor HTTP mínimo para o modo ASGI ---
+
+async def _serve_connection(asgi_app, reader, writer):
+    """Uma requisição por conexão (Connection: close), com corpo em chunked quando não há Content-Length."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except (asyncio.IncompleteReadError, ConnectionError):
+        writer.close()
+        return
+    request_line, *header_lines = head.decode("latin-1").split("\r\n")
+    method, target, _ = request_line.split(" ", 2)
+    headers = []
+    for line in header_lines:
+        if line:
+            name, value = line.split(":", 1)
+            headers.append((name.strip().lower().encode("latin-1"), value.strip().encode("latin-1")))
+    length = int(dict(headers).get(b"content-length", b"0"))
+    body = await reader.readexactly(length) if length else b""
+    path, _, query = target.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "query_string": query.encode("latin-1"), "root_path": "",
+        "headers": headers, "client": writer.get_extra_info("peername"), "server": writer.get_extra_info("sockname"),
+    }
+    body_sent = False
+    chunked = False
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # O cliente não envia mais nada nesta conexão: só o fecho interessa
+        await reader.read(1)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal chunked
+        if message["type"] == "http.response.start":
+            names = {name for name, _ in message["headers"]}
+            chunked = b"content-length" not in names
+            lines = [f"HTTP/1.1 {message['status']} {http.client.responses.get(message['status'], '')}".encode()]
+            lines += [name + b": " + value for name, value in message["headers"]]
+            lines.append(b"Connection: close")
+            if chunked:
+                lines.append(b"Transfer-Encoding: chunked")
+            writer.write(b"\r\n".join(lines) + b"\r\n\r\n")
+        else:
+            data = message.get("body", b"")
+            if chunked:
+                if data:
+                    writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+                if not message.get("more_body", False):
+                    writer.write(b"0\r\n\r\n")
+            else:
+                writer.write(data)
+            await writer.drain()
+
+    try:
+        await asgi_app(scope, receive, send)
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+def _start_asgi_server(asgi_app):
+    """Corre o servidor mínimo num event loop próprio, numa thread; retorna (porta, função de paragem)."""
+    ready = threading.Event()
+    state = {}
+
+    def run():
+        loop = asyncio.new_event_loop()
+        server = loop.run_until_complete(asyncio.start_server(
+            lambda r, w: _serve_connection(asgi_app, r, w), "127.0.0.1", 0, backlog=4096
+        ))
+        state["port"] = server.sockets[0].getsockname()[1]
+        state["loop"], state["server"] = loop, server
+        ready.set()
+        loop.run_forever()
+        loop.close()
+
+    async def shutdown():
+        state["server"].close()
+        # As conexões terminam quando os clientes fecham; as que sobrarem são canceladas
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        if tasks:
+            await asyncio.wait(tasks, timeout=10)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    ready.wait()
+
+    def stop():
+        asyncio.run_coroutine_threadsafe(shutdown(), state["loop"]).result()
+        state["loop"].call_soon_threadsafe(state["loop"].stop)
+        thread.join()
+    return state["port"], stop
+
+
+def _start_threaded_server(app):
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietRequestHandler)
+    server.request_queue_size = 4096
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def stop():
+        server.shutdown()
+        server.server_close()
+    return server.server_port, stop
+
+# --- Clientes ---
+
+def _login(port):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.request("POST", "/auth/login", body=CREDENTIALS, headers={"Content-Type": "application/json"})
+    token = json.loads(conn.getresponse().read())["data"]["token"]
+    conn.close()
+    return token
+
+
+async def _read_until(reader, buffer, marker):
+    while marker not in buffer:
+        data = await reader.read(65536)
+        if not data:
+            raise ConnectionError("conexão fechada pelo servidor")
+        buffer += data
+    return buffer[buffer.index(marker) + len(marker):]
+
+
+async def _open_stream(port, token):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"GET /produtos/changes/stream HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Bearer {token}\r\n\r\n".encode()
+    )
+    rest = await _read_until(reader, b"", b"event: ready")
+    return reader, writer, rest
+
+
+async def _probe(port, token, count):
+    """Latência de GET /produtos/1 em conexões novas, com os streams abertos."""
+    latencies = []
+    request = f"GET /produtos/1 HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Bearer {token}\r\nConnection: close\r\n\r\n"
+    for _ in range(count):
+        start = time.perf_counter()
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request.encode())
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = next(
+            int(line.split(b":", 1)[1]) for line in head.split(b"\r\n") if line.lower().startswith(b"content-length:")
+        )
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+        writer.close()
+    return latencies
+
+
+async def _measure(port, token, connections, probes, timeout):
+    opened = time.perf_counter()
+    results = await asyncio.gather(*(_open_stream(port, token) for _ in range(connections)), return_exceptions=True)
+    streams = [result for result in results if not isinstance(result, BaseException)]
+    open_seconds = time.perf_counter() - opened
+    row = {
+        "connections": connections,
+        "streams_opened": len(streams),
+        "open_seconds": open_seconds,
+        "threads": threading.active_count(),
+        "rss_mb": _rss_mb(),
+    }
+    probe = await asyncio.wait_for(_probe(port, token, probes), timeout)
+    row.update({f"probe_{name}": value for name, value in latency_summary(probe).items()})
+
+    # Uma escrita e o tempo até o evento chegar a cada stream aberto
+    written = time.perf_counter()
+    ProductRepository().save({"name": "Alteração do benchmark", "price": 1.0})
+
+    async def delivery(stream):
+        reader, _, rest = stream
+        await _read_until(reader, rest, b"event: create")
+        return time.perf_counter() - written
+
+    deliveries = await asyncio.wait_for(asyncio.gather(*(delivery(stream) for stream in streams)), timeout)
+    row["fanout_p50_ms"] = percentile(deliveries, 0.50) * 1000
+    row["fanout_max_ms"] = max(deliveries, default=0.0) * 1000
+    for _, writer, _ in streams:
+        writer.close()
+    return row
+
+
+def run(server_name, connections, probes, timeout):
+    app = create_app("testing")
+    repo = ProductRepository()
+    repo.clear()
+    repo.save({"name": "Produto", "price": 1.0})
+    adapter = None
+    if server_name == "asgi":
+        adapter = ASGIAdapter(app)
+        port, stop = _start_asgi_server(adapter)
+    else:
+        port, stop = _start_threaded_server(app)
+    try:
+        token = _login(port)
+        row = asyncio.run(_measure(port, token, connections, probes, timeout))
+    finally:
+        stop()
+        if adapter is not None:
+            adapter.close()
+    # Dá tempo às threads dos streams fechados para terminarem antes da medição seguinte
+    deadline = time.time() + 30
+    while threading.active_count() > 2 and time.time() < deadline:
+        time.sleep(0.1)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, nargs="+", default=[100, 500, 1000])
+    parser.add_argument("--servers", nargs="+", choices=SERVERS, default=list(SERVERS))
+    parser.add_argument("--probes", type=int, default=100, help="Requisições GET medidas com os streams abertos.")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", help="Arquivo onde gravar os resultados em JSON.")
+    args = parser.parse_args()
+
+    results = []
+    for connections in args.connections:
+        for server_name in args.servers:
+            row = run(server_name, connections, args.probes, args.timeout)
+            row.update({"case": f"concurrency/{server_name}/{connections}", "server": server_name})
+            results.append(row)
+            print(f"{server_name:>8} {connections:>5} streams: {row['streams_opened']} abertos em "
+                  f"{row['open_seconds']:.2f} s, {row['threads']} threads, {row['rss_mb']:.0f} MB, "
+                  f"GET p50 {row['probe_p50_ms']:.2f} ms p99 {row['probe_p99_ms']:.2f} ms, "
+                  f"entrega p50 {row['fanout_p50_ms']:.1f} ms máx {row['fanout_max_ms']:.1f} ms")
+
+    if args.json:
+        write_results(args.json, "concurrency", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+# /benchmarks/bench_http.py
+"""
+Benchmark HTTP da API: mede requisições por segundo e latências p50/p99 de
+login, listagem paginada, busca por nome e leitura por ID. Corre em dois modos:
+'test_client' (a aplicação chamada em processo, sem rede) e 'wsgi' (servidor
+WSGI local com uma thread por conexão e clientes HTTP/1.1 com keep-alive).
+
+    python -m benchmarks.bench_http --products 10000 --threads 1 8 --json http.json
+"""
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import quote
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from app import create_app
+from app.controllers.auth_controller import AUTHORIZED_PARTNERS
+from app.repositories.product_repository import ProductRepository
+from benchmarks.common import latency_summary, write_results
+
+MODES = ("test_client", "wsgi")
+CLIENT_ID = next(iter(AUTHORIZED_PARTNERS))
+CREDENTIALS = json.dumps({"client_id": CLIENT_ID, "client_secret": AUTHORIZED_PARTNERS[CLIENT_ID]["secret"]})
+
+
+def scenarios(products):
+    """Cenários medidos: (método, caminho para a amostra i, corpo, precisa de token)."""
+    rng = random.Random(7)
+    ids = [rng.randint(1, products) for _ in range(4096)]
+    return {
+        "login": lambda i: ("POST", "/auth/login", CREDENTIALS, False),
+        "list": lambda i: ("GET", "/produtos?limit=100", None, True),
+        "search": lambda i: ("GET", "/produtos/search?name=" + quote(f"modelo {i % 97}"), None, True),
+        "by_id": lambda i: ("GET", f"/produtos/{ids[i % len(ids)]}", None, True),
+    }
+
+
+def seed(products):
+    repo = ProductRepository()
+    repo.clear()
+    for start in range(1, products + 1, 10_000):
+        repo.save_many([
+            {"name": f"Produto {i} modelo {i % 97}", "price": float(i % 500)}
+            for i in range(start, min(start + 10_000, products + 1))
+        ])
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Não escreve uma linha de log por requisição (distorceria a medição)."""
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class TestClientTransport:
+    """Chama a aplicação em processo através do cliente de teste do Flask."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body, headers):
+        response = self.client.open(path, method=method, data=body, headers=headers)
+        response.get_data()
+        return response.status_code
+
+    def close(self):
+        pass
+
+
+class HTTPTransport:
+    """Conexão HTTP/1.1 persistente com o servidor local (reconecta se o servidor a fechar)."""
+
+    def __init__(self, port):
+        self.port = port
+        self.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+
+    def request(self, method, path, body, headers):
+        try:
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+        except (http.client.HTTPException, ConnectionError):
+            self.conn.close()
+            self.conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+        response.read()
+        return response.status
+
+    def close(self):
+        self.conn.close()
+
+
+def _login(transport):
+    # O token vem do próprio endpoint, como faria um parceiro
+    if isinstance(transport, TestClientTransport):
+        response = transport.client.post("/auth/login", data=CREDENTIALS, content_type="application/json")
+        return response.get_json()["data"]["token"]
+    transport.conn.request("POST", "/auth/login", body=CREDENTIALS, headers={"Content-Type": "application/json"})
+    return json.loads(transport.conn.getresponse().read())["data"]["token"]
+
+
+def _client(make_transport, scenario, deadline, latencies, errors, index):
+    transport = make_transport()
+    token = _login(transport)
+    headers = {"Content-Type": "application/json", "Authorization": f"Bearer {token}"}
+    plain_headers = {"Content-Type": "application/json"}
+    perf_counter = time.perf_counter
+    local = []
+    failed = 0
+    i = index * 1_000_003
+    while perf_counter() < deadline:
+        method, path, body, auth = scenario(i)
+        start = perf_counter()
+        status = transport.request(method, path, body, headers if auth else plain_headers)
+        local.append(perf_counter() - start)
+        if status >= 400:
+            failed += 1
+        i += 1
+    transport.close()
+    latencies[index] = local
+    errors[index] = failed
+
+
+def run_scenario(make_transport, scenario, threads, duration):
+    latencies = [None] * threads
+    errors = [0] * threads
+    deadline = time.perf_counter() + duration
+    pool = [
+        threading.Thread(target=_client, args=(make_transport, scenario, deadline, latencies, errors, i))
+        for i in range(threads)
+    ]
+    started = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+    merged = [value for values in latencies for value in values]
+    return {"requests": len(merged), "errors": sum(errors), "rps": len(merged) / elapsed, **latency_summary(merged)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--duration", type=float, default=2.0, help="Segundos por cenário.")
+    parser.add_argument("--json", help="Arquivo onde gravar os resultados em JSON.")
+    args = parser.parse_args()
+
+    app = create_app("testing")
+    seed(args.products)
+    results = []
+    for mode in args.modes:
+        server = None
+        if mode == "wsgi":
+            server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietRequestHandler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            make_transport = lambda: HTTPTransport(server.server_port)
+        else:
+            make_transport = lambda: TestClientTransport(app)
+        try:
+            for threads in args.threads:
+                for name, scenario in scenarios(args.products).items():
+                    row = run_scenario(make_transport, scenario, threads, args.duration)
+                    row.update({"case": f"http/{mode}/{threads}/{name}", "mode": mode,
+                                "threads": threads, "scenario": name})
+                    results.append(row)
+                    print(f"{mode:>11} {threads:>3} threads {name:<7} {row['rps']:>9.0f} req/s "
+                          f"p50 {row['p50_ms']:.3f} ms p99 {row['p99_ms']:.3f} ms"
+                          + (f" ({row['errors']} erros)" if row["errors"] else ""))
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+    if args.json:
+        write_results(args.json, "http", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
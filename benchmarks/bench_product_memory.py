@@ -0,0 +1,56 @@
+# /benchmarks/bench_product_memory.py
+"""
+Benchmark de memória por produto: compara produtos guardados como dicts livres
+com o modelo Product (__slots__), medindo com tracemalloc.
+
+    python -m benchmarks.bench_product_memory --size 1000000
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+
+from app.models.product_model import Product
+
+
+def _build_dicts(size):
+    return {i: {"name": f"Produto {i}", "price": float(i % 1000), "id": i} for i in range(1, size + 1)}
+
+
+def _build_products(size):
+    return {i: Product(i, f"Produto {i}", float(i % 1000)) for i in range(1, size + 1)}
+
+
+def _measure(build, size):
+    gc.collect()
+    tracemalloc.start()
+    data = build(size)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--json", help="Arquivo onde gravar os resultados em JSON.")
+    args = parser.parse_args()
+
+    dict_bytes = _measure(_build_dicts, args.size)
+    model_bytes = _measure(_build_products, args.size)
+    result = {
+        "products": args.size,
+        "dict_total_mb": dict_bytes / 2**20,
+        "dict_bytes_per_product": dict_bytes / args.size,
+        "model_total_mb": model_bytes / 2**20,
+        "model_bytes_per_product": model_bytes / args.size,
+    }
+    print(json.dumps(result, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
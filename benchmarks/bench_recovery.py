@@ -0,0 +1,65 @@
+# /benchmarks/bench_recovery.py
+"""
+Benchmark de recuperação do repositório em memória em modo durável: mede o
+tempo para reconstruir o catálogo a partir do snapshot (via mmap) e da cauda do log.
+
+    python -m benchmarks.bench_recovery --size 1000000 --tail 10000
+"""
+import argparse
+import json
+import tempfile
+import time
+
+from app.repositories import product_repository
+from app.repositories.product_repository import ProductRepository, enable_durability, disable_durability
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--tail", type=int, default=10_000, help="Escritas no log após o snapshot.")
+    parser.add_argument("--json", help="Arquivo onde gravar os resultados em JSON.")
+    args = parser.parse_args()
+
+    repo = ProductRepository()
+    with tempfile.TemporaryDirectory() as directory:
+        repo.clear()
+        # Sem fsync na carga inicial: o que se mede aqui é a recuperação.
+        enable_durability(directory, snapshot_every=args.size * 10, fsync=False)
+        start = time.perf_counter()
+        for i in range(args.size):
+            repo.save({"name": f"Produto {i}", "price": float(i % 1000)})
+        load_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        product_repository._write_log.snapshot()
+        snapshot_seconds = time.perf_counter() - start
+
+        for i in range(args.tail):
+            repo.update(i + 1, {"price": 1.5})
+
+        disable_durability()
+        repo.clear()
+        start = time.perf_counter()
+        enable_durability(directory)
+        recovery_seconds = time.perf_counter() - start
+        recovered = repo.count()
+        disable_durability()
+        repo.clear()
+
+    result = {
+        "products": args.size,
+        "log_tail": args.tail,
+        "load_seconds": load_seconds,
+        "snapshot_seconds": snapshot_seconds,
+        "recovery_seconds": recovery_seconds,
+        "recovered": recovered,
+    }
+    print(json.dumps(result, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# /benchmarks/bench_repository.py
+"""
+Microbenchmarks das operações do repositório de produtos (find_by_id,
+find_by_name, find_all, save, update) com catálogos de vários tamanhos.
+Usa sementes fixas, por isso duas execuções fazem exatamente as mesmas operações.
+
+    python -m benchmarks.bench_repository --sizes 1000 100000 1000000 --json repo.json
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from app.repositories.product_repository import ProductRepository
+from app.repositories.shared_product_repository import SharedMemoryProductRepository
+from app.repositories.sqlite_product_repository import SQLiteProductRepository
+from benchmarks.common import latency_summary, measure, write_results
+
+BACKENDS = ("memory", "sqlite", "shared")
+# Os nomes repetem o sufixo "modelo N": cada termo comum corresponde a 1/97 do catálogo
+MODELS = 97
+SEED_BATCH = 10_000
+
+
+def _product_data(i):
+    return {"name": f"Produto {i} modelo {i % MODELS}", "price": float(i % 500), "description": "Benchmark"}
+
+
+def open_repository(backend, directory, size, max_samples):
+    if backend == "memory":
+        repo = ProductRepository()
+        repo.clear()
+        return repo
+    if backend == "sqlite":
+        return SQLiteProductRepository(os.path.join(directory, "products.db"))
+    return SharedMemoryProductRepository(
+        os.path.join(directory, "products.store"), capacity=size + max_samples + 1
+    )
+
+
+def seed(repo, size):
+    """Carrega o catálogo em lotes (uma aquisição do lock / transação por lote)."""
+    for start in range(1, size + 1, SEED_BATCH):
+        repo.save_many([_product_data(i) for i in range(start, min(start + SEED_BATCH, size + 1))])
+
+
+def operations(repo, size, seed_value):
+    """Operações medidas; cada uma recebe o índice da amostra e escolhe os argumentos com um RNG fixo."""
+    rng = random.Random(seed_value)
+    ids = [rng.randint(1, size) for _ in range(4096)]
+    next_name = iter(range(size + 1, 2 * size + 10_000_000))
+    return {
+        "find_by_id": lambda i: repo.find_by_id(ids[i % len(ids)]),
+        # Nome que identifica um único produto (o espaço final exclui "Produto 12" de "Produto 123")
+        "find_by_name_rare": lambda i: repo.find_by_name(f"Produto {ids[i % len(ids)]} "),
+        "find_by_name_common": lambda i: repo.find_by_name(f"modelo {i % MODELS}"),
+        "find_all": lambda i: repo.find_all(),
+        "save": lambda i: repo.save(_product_data(next(next_name))),
+        "update": lambda i: repo.update(ids[i % len(ids)], {"price": float(i % 1000)}),
+    }
+
+
+def run(backend, size, max_samples, max_seconds, seed_value):
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        repo = open_repository(backend, directory, size, max_samples)
+        start = time.perf_counter()
+        seed(repo, size)
+        seed_seconds = time.perf_counter() - start
+        print(f"{backend:>6} {size:>9}: carga em {seed_seconds:.2f} s")
+        for name, operation in operations(repo, size, seed_value).items():
+            latencies = measure(operation, max_samples, max_seconds)
+            row = {
+                "case": f"repository/{backend}/{size}/{name}",
+                "backend": backend,
+                "size": size,
+                "operation": name,
+                "samples": len(latencies),
+                "ops_per_sec": len(latencies) / sum(latencies),
+                **latency_summary(latencies),
+            }
+            rows.append(row)
+            print(f"{'':>17} {name:<20} {row['ops_per_sec']:>12.0f} ops/s "
+                  f"p50 {row['p50_ms']:.4f} ms p99 {row['p99_ms']:.4f} ms ({row['samples']} amostras)")
+        rows.append({"case": f"repository/{backend}/{size}/seed", "backend": backend, "size": size,
+                     "operation": "seed", "seconds": seed_seconds, "ops_per_sec": size / seed_seconds})
+        close = getattr(repo, "close", None)
+        if close is not None:
+            close()
+        if backend == "memory":
+            repo.clear()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=["memory"])
+    parser.add_argument("--samples", type=int, default=2_000, help="Máximo de chamadas por operação.")
+    parser.add_argument("--max-seconds", type=float, default=2.0, help="Tempo máximo por operação.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Arquivo onde gravar os resultados em JSON.")
+    args = parser.parse_args()
+
+    results = []
+    for backend in args.backends:
+        for size in args.sizes:
+            results.extend(run(backend, size, args.samples, args.max_seconds, args.seed))
+
+    if args.json:
+        write_results(args.json, "repository", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# /benchmarks/bench_repository_contention.py
+"""
+Benchmark de contenção do ProductRepository: compara o RWLock com um mutex
+exclusivo (comportamento anterior) numa carga mista de leituras e escritas.
+Reporta a vazão total e a latência p99 das leituras por página.
+
+    python -m benchmarks.bench_repository_contention --threads 8 16 32
+"""
+import argparse
+import json
+import random
+import threading
+import time
+
+from app.repositories import product_repository
+from app.repositories.product_repository import ProductRepository
+from app.utils.rwlock import ExclusiveLock, RWLock
+
+LOCKS = {"mutex": ExclusiveLock, "rwlock": RWLock}
+
+
+def seed(repo, size):
+    repo.clear()
+    for i in range(size):
+        repo.save({"name": f"Produto {i} modelo {i % 97}", "price": float(i % 500)})
+
+
+def worker(repo, size, write_ratio, deadline, counter, latencies, index):
+    rng = random.Random(index)
+    ops = 0
+    perf_counter = time.perf_counter
+    while perf_counter() < deadline:
+        roll = rng.random()
+        pid = rng.randint(1, size)
+        if roll < write_ratio:
+            repo.update(pid, {"price": rng.random() * 100})
+        elif roll < 0.5:
+            repo.find_by_id(pid)
+        elif roll < 0.9:
+            start = perf_counter()
+            repo.find_page(20, pid)
+            latencies.append(perf_counter() - start)
+        else:
+            repo.find_by_name(f"Produto {pid}")
+        ops += 1
+    counter[index] = ops
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def run(lock_name, threads, size, write_ratio, duration):
+    product_repository._db_lock = LOCKS[lock_name]()
+    repo = ProductRepository()
+    seed(repo, size)
+    counter = [0] * threads
+    latencies = []
+    deadline = time.perf_counter() + duration
+    pool = [
+        threading.Thread(target=worker, args=(repo, size, write_ratio, deadline, counter, latencies, i))
+        for i in range(threads)
+    ]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return {
+        "ops_per_sec": sum(counter) / duration,
+        "page_read_p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--size", type=int, default=10_000)
+    parser.add_argument("--write-ratio", type=float, default=0.05)
+    parser.add_argument("--duration", type=float, default=2.0)
+    parser.add_argument("--json", help="Arquivo onde gravar os resultados em JSON.")
+    args = parser.parse_args()
+
+    original_lock = product_repository._db_lock
+    results = []
+    try:
+        for threads in args.threads:
+            row = {"threads": threads}
+            for lock_name in LOCKS:
+                row[lock_name] = run(lock_name, threads, args.size, args.write_ratio, args.duration)
+            row["speedup"] = row["rwlock"]["ops_per_sec"] / row["mutex"]["ops_per_sec"]
+            results.append(row)
+            print(f"{threads:>3} threads: " + " | ".join(
+                f"{name} {row[name]['ops_per_sec']:>8.0f} ops/s p99 {row[name]['page_read_p99_ms']:.3f} ms"
+                for name in LOCKS
+            ) + f" | x{row['speedup']:.2f}")
+    finally:
+        product_repository._db_lock = original_lock
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# /benchmarks/common.py
+"""
+Funções partilhadas pelos benchmarks: percentis, medição com orçamento de
+tempo e gravação dos resultados em JSON com os metadados do ambiente (commit,
+versão do Python, CPU), para comparar execuções com `benchmarks.compare`.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def latency_summary(latencies):
+    """p50, p99 e média das latências (em segundos), convertidos para milissegundos."""
+    if not latencies:
+        return {"p50_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0}
+    return {
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+    }
+
+
+def measure(operation, max_samples, max_seconds, min_samples=3):
+    """
+    Chama `operation(i)` até `max_samples` vezes ou até esgotar `max_seconds`
+    (com pelo menos `min_samples` chamadas) e retorna a latência de cada chamada.
+    """
+    latencies = []
+    perf_counter = time.perf_counter
+    deadline = perf_counter() + max_seconds
+    for i in range(max_samples):
+        start = perf_counter()
+        operation(i)
+        end = perf_counter()
+        latencies.append(end - start)
+        if end > deadline and len(latencies) >= min_samples:
+            break
+    return latencies
+
+
+def _git(*args):
+    try:
+        output = subprocess.run(
+            ["git", *args], capture_output=True, text=True, timeout=10,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.strip() if output.returncode == 0 else None
+
+
+def environment():
+    """Metadados que identificam a execução: commit, alterações locais, Python e máquina."""
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def write_results(path, benchmark, params, results):
+    """Grava os resultados; cada linha de `results` tem um 'case' único usado na comparação."""
+    with open(path, "w") as f:
+        json.dump(
+            {"benchmark": benchmark, "environment": environment(), "params": params, "results": results},
+            f, indent=2,
+        )
@@ -0,0 +1,61 @@
+# /benchmarks/compare.py
+"""
+Compara dois resultados em JSON dos benchmarks (por exemplo, de dois commits)
+e assinala as regressões: vazão menor ou p99 maior do que o limiar relativo.
+Termina com código 1 se houver alguma regressão.
+
+    python -m benchmarks.compare antes.json depois.json --threshold 0.10
+"""
+import argparse
+import json
+import sys
+
+# Métricas comparadas e se um valor maior é melhor
+METRICS = (("ops_per_sec", True), ("rps", True), ("p50_ms", False), ("p99_ms", False))
+
+
+def load(path):
+    with open(path) as f:
+        data = json.load(f)
+    return data.get("environment", {}), {row["case"]: row for row in data["results"]}
+
+
+def compare(before, after, threshold):
+    """Retorna linhas (caso, métrica, antes, depois, variação relativa, regressão?)."""
+    rows = []
+    for case in sorted(before.keys() & after.keys()):
+        for metric, higher_is_better in METRICS:
+            old, new = before[case].get(metric), after[case].get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            regressed = change < -threshold if higher_is_better else change > threshold
+            rows.append((case, metric, old, new, change, regressed))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Variação relativa tolerada.")
+    args = parser.parse_args()
+
+    before_env, before = load(args.before)
+    after_env, after = load(args.after)
+    print(f"antes:  {before_env.get('commit')} ({before_env.get('timestamp')})")
+    print(f"depois: {after_env.get('commit')} ({after_env.get('timestamp')})")
+    for case in sorted(before.keys() ^ after.keys()):
+        print(f"  só num dos ficheiros: {case}")
+
+    rows = compare(before, after, args.threshold)
+    for case, metric, old, new, change, regressed in rows:
+        marker = "REGRESSÃO" if regressed else ""
+        print(f"{case:<50} {metric:<12} {old:>12.4f} -> {new:>12.4f} {change:>+8.1%} {marker}")
+    regressions = sum(1 for row in rows if row[-1])
+    print(f"{regressions} regressões acima de {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
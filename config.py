@@ -1,5 +1,6 @@
 # /config.py
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Carrega as variáveis de ambiente do arquivo .env
@@ -11,6 +12,66 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'uma-chave-secreta-muito-dificil-de-adivinhar'
     TESTING = False
     DEBUG = False
+    # Número máximo de tokens verificados mantidos em cache (0 desativa)
+    TOKEN_CACHE_SIZE = 10_000
+    # Serializa o JSON com orjson quando estiver instalado (opcional, ver requirements.txt)
+    FAST_JSON_PROVIDER = True
+    # Memória máxima da cache de respostas das leituras de produtos (0 desativa)
+    RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    # Resultados de /produtos/search guardados até à próxima escrita, limitados no total de
+    # produtos referenciados (cerca de 8 bytes cada, os produtos são partilhados com o repositório; 0 desativa)
+    SEARCH_CACHE_MAX_RESULTS = 1_000_000
+    # Paginação por cursor e exportação em streaming de /produtos
+    PRODUCTS_PAGE_SIZE = 100
+    PRODUCTS_MAX_PAGE_SIZE = 1000
+    PRODUCTS_STREAM_BATCH_SIZE = 500
+    # Número máximo de itens por requisição em /produtos/batch
+    PRODUCTS_MAX_BATCH_SIZE = 10_000
+    # Limites das faixas de preço do histograma de /produtos/stats (o cliente pode enviar outros)
+    PRODUCTS_STATS_BUCKETS = (0, 10, 50, 100, 500, 1000)
+    PRODUCTS_STATS_MAX_BUCKETS = 100
+    # Sugestões retornadas por /produtos/autocomplete ('k' por omissão e máximo)
+    AUTOCOMPLETE_DEFAULT_K = 10
+    AUTOCOMPLETE_MAX_K = 50
+    # Alterações recentes guardadas para /produtos/changes (clientes mais atrasados recebem 410)
+    CHANGE_LOG_RETENTION = 100_000
+    CHANGES_PAGE_SIZE = 1000
+    # Intervalo (segundos) dos comentários de keep-alive do stream de alterações
+    CHANGES_STREAM_HEARTBEAT = 15
+    # Threads do adaptador ASGI (app/asgi.py) para correr as requisições; streams SSE não ocupam nenhuma
+    ASGI_THREADS = 32
+    # Tamanho máximo do corpo das requisições no adaptador ASGI, se MAX_CONTENT_LENGTH não estiver definido
+    ASGI_MAX_BODY_SIZE = 16 * 1024 * 1024
+    # Compressão negociada pelo Accept-Encoding, por ordem de preferência ('br' só com o pacote brotli).
+    # Uma lista vazia desativa a compressão.
+    COMPRESSION_ENCODINGS = ("br", "gzip", "deflate")
+    # Tamanho mínimo do corpo (bytes) para comprimir; respostas em streaming são sempre comprimidas
+    COMPRESSION_MIN_SIZE = 1024
+    COMPRESSION_MIMETYPES = ("application/json", "text/csv", "text/plain")
+    COMPRESSION_LEVEL = 6
+    COMPRESSION_BROTLI_QUALITY = 5
+    # Histogramas de latência (requisições, JWT, lock do repositório) expostos em /metrics
+    METRICS_ENABLED = True
+    # Token exigido em /metrics ('Authorization: Bearer <token>'); sem ele a rota fica aberta
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    # Limites por parceiro (token bucket e requisições simultâneas), respondidos com 429.
+    # Os parceiros sem 'rate_limit' em AUTHORIZED_PARTNERS usam RATE_LIMIT_DEFAULT (None: sem limites).
+    RATE_LIMIT_ENABLED = True
+    RATE_LIMIT_DEFAULT = {"requests_per_second": 50, "burst": 100, "max_concurrent": 8}
+    # Backend do repositório de produtos: 'memory', 'sqlite' ou 'shared'
+    PRODUCT_REPOSITORY = os.environ.get('PRODUCT_REPOSITORY') or 'memory'
+    SQLITE_DATABASE_PATH = os.environ.get('SQLITE_DATABASE_PATH') or os.path.join(basedir, 'products.db')
+    SQLITE_POOL_SIZE = 8
+    # Backend 'shared': ficheiro mapeado em memória partilhado pelos workers (de preferência em /dev/shm)
+    SHARED_STORE_PATH = os.environ.get('SHARED_STORE_PATH') or os.path.join(
+        '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'df-products.store'
+    )
+    # Número máximo de IDs alocados durante a vida do ficheiro (os IDs não são reutilizados)
+    SHARED_STORE_CAPACITY = 4_194_304
+    # Durabilidade opcional do backend 'memory': log de escrita + snapshots neste diretório
+    PRODUCT_STORE_DIR = os.environ.get('PRODUCT_STORE_DIR')
+    PRODUCT_STORE_SNAPSHOT_EVERY = 100_000
+    PRODUCT_STORE_FSYNC = True
 
 class DevelopmentConfig(Config):
     """Configuração para o ambiente de desenvolvimento."""
@@ -20,6 +81,10 @@ class TestingConfig(Config):
     """Configuração para o ambiente de testes."""
     TESTING = True
     SECRET_KEY = 'test_secret_key' # Chave consistente para testes
+    PRODUCT_REPOSITORY = 'memory'
+    PRODUCT_STORE_DIR = None
+    # Os testes e os benchmarks fazem rajadas com um único parceiro
+    RATE_LIMIT_ENABLED = False
 
 class ProductionConfig(Config):
     """Configuração para o ambiente de produção."""
@@ -27,6 +92,8 @@ class ProductionConfig(Config):
     SECRET_KEY = os.environ.get('SECRET_KEY')
     if not SECRET_KEY:
         raise ValueError("Nenhuma SECRET_KEY definida para o ambiente de produção")
+    # /metrics lista os client_id dos parceiros: em produção só existe com METRICS_TOKEN
+    METRICS_ENABLED = bool(Config.METRICS_TOKEN)
 
 # Dicionário que mapeia os nomes dos ambientes para as classes de configuração.
 config_by_name = {
@@ -0,0 +1,174 @@
+# /tests/test_asgi.py
+import asyncio
+import json
+import pytest
+from app import create_app
+from app.asgi import ASGIAdapter
+from app.repositories.product_repository import ProductRepository
+
+# --- Fixtures de Teste ---
+
+@pytest.fixture
+def adapter():
+    # Apenas duas threads: os streams SSE abertos não podem ocupá-las
+    asgi_app = ASGIAdapter(create_app('testing'), max_workers=2)
+    yield asgi_app
+    asgi_app.close()
+
+@pytest.fixture(autouse=True)
+def clean_db():
+    repo = ProductRepository()
+    repo.clear()
+    repo.save({'name': 'Produto Base de Teste', 'price': 10.0})
+
+
+def _scope(method, path, headers=(), query=b""):
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query, "root_path": "",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers],
+        "client": ("127.0.0.1", 50000), "server": ("testserver", 80),
+    }
+
+
+async def _open(adapter, method, path, headers=(), body=b"", query=b""):
+    """Inicia uma requisição; retorna a fila de mensagens enviadas, a fila de entrada e a tarefa."""
+    inbox, outbox = asyncio.Queue(), asyncio.Queue()
+    await inbox.put({"type": "http.request", "body": body, "more_body": False})
+    task = asyncio.ensure_future(adapter(_scope(method, path, headers, query), inbox.get, outbox.put))
+    return outbox, inbox, task
+
+
+async def _request(adapter, method, path, headers=(), body=b"", query=b""):
+    outbox, _, task = await _open(adapter, method, path, headers, body, query)
+    await asyncio.wait_for(task, 5)
+    messages = [outbox.get_nowait() for _ in range(outbox.qsize())]
+    start = messages[0]
+    return (
+        start["status"],
+        {name.decode(): value.decode() for name, value in start["headers"]},
+        b"".join(message.get("body", b"") for message in messages[1:]),
+    )
+
+
+async def _login(adapter):
+    body = json.dumps({"client_id": "partner_123", "client_secret": "super_secret_key_123"}).encode()
+    status, _, data = await _request(
+        adapter, "POST", "/auth/login", [("Content-Type", "application/json")], body
+    )
+    assert status == 200
+    return [("Authorization", f"Bearer {json.loads(data)['data']['token']}")]
+
+# --- Testes das Rotas ---
+
+def test_same_routes_and_envelope_as_wsgi(adapter):
+    async def scenario():
+        headers = await _login(adapter)
+        status, _, data = await _request(
+            adapter, "POST", "/produtos", headers + [("Content-Type", "application/json")],
+            json.dumps({"name": "Novo", "price": 5.0}).encode(),
+        )
+        assert status == 201
+        assert json.loads(data) == {"status": "success", "data": {"id": 2, "name": "Novo", "price": 5.0}}
+
+        status, response_headers, data = await _request(adapter, "GET", "/produtos", headers, query=b"limit=1")
+        assert status == 200
+        assert json.loads(data)["data"]["items"] == [{"id": 1, "name": "Produto Base de Teste", "price": 10.0}]
+        assert "etag" in response_headers
+
+        # A exportação em streaming é lida bloco a bloco
+        status, _, data = await _request(adapter, "GET", "/produtos", headers)
+        assert [p["id"] for p in json.loads(data)["data"]] == [1, 2]
+
+        status, _, data = await _request(adapter, "GET", "/produtos/999", headers)
+        assert status == 404
+        assert json.loads(data)["status"] == "error"
+
+        status, _, _ = await _request(adapter, "GET", "/produtos")
+        assert status == 401
+
+    asyncio.run(scenario())
+
+def test_request_body_is_limited(adapter):
+    """Corpos acima de MAX_CONTENT_LENGTH (ou de ASGI_MAX_BODY_SIZE) recebem 413 sem serem lidos até ao fim."""
+    adapter.app.config["MAX_CONTENT_LENGTH"] = 200
+    big = json.dumps({"name": "x" * 500, "price": 1}).encode()
+
+    async def chunked(body, size=64):
+        """Entrega o corpo em vários http.request, sem Content-Length; retorna quantos foram lidos."""
+        inbox, outbox = asyncio.Queue(), asyncio.Queue()
+        for i in range(0, len(body), size):
+            await inbox.put({"type": "http.request", "body": body[i:i + size], "more_body": i + size < len(body)})
+        await asyncio.wait_for(adapter(_scope("POST", "/produtos"), inbox.get, outbox.put), 5)
+        return outbox.get_nowait(), outbox.get_nowait(), inbox.qsize()
+
+    async def scenario():
+        headers = await _login(adapter)
+        declared = headers + [("Content-Type", "application/json"), ("Content-Length", str(len(big)))]
+        status, _, data = await _request(adapter, "POST", "/produtos", declared, big)
+        assert status == 413
+        assert json.loads(data)["status"] == "error"
+
+        start, body, unread = await chunked(big)
+        assert start["status"] == 413
+        assert json.loads(body["body"])["status"] == "error"
+        assert unread > 0
+
+        small = json.dumps({"name": "Novo", "price": 1}).encode()
+        status, _, _ = await _request(adapter, "POST", "/produtos", headers + [("Content-Type", "application/json")], small)
+        assert status == 201
+
+    asyncio.run(scenario())
+
+    adapter.app.config["MAX_CONTENT_LENGTH"] = None
+    adapter.app.config["ASGI_MAX_BODY_SIZE"] = 100
+
+    async def fallback():
+        start, _, _ = await chunked(big)
+        assert start["status"] == 413
+
+    asyncio.run(fallback())
+
+# --- Testes do Stream de Alterações ---
+
+def test_change_streams_do_not_hold_worker_threads(adapter):
+    """Mais streams abertos do que threads no pool, e as outras requisições continuam a ser servidas."""
+    async def scenario():
+        headers = await _login(adapter)
+        streams = [await _open(adapter, "GET", "/produtos/changes/stream", headers) for _ in range(10)]
+        for outbox, _, _ in streams:
+            start = await asyncio.wait_for(outbox.get(), 5)
+            assert start["status"] == 200
+            ready = await asyncio.wait_for(outbox.get(), 5)
+            assert ready["body"].startswith(b"event: ready\n")
+
+        status, _, data = await _request(
+            adapter, "POST", "/produtos", headers + [("Content-Type", "application/json")],
+            json.dumps({"name": "Novo", "price": 5.0}).encode(),
+        )
+        assert status == 201
+
+        version = ProductRepository().get_version()
+        for outbox, _, _ in streams:
+            event = (await asyncio.wait_for(outbox.get(), 5))["body"].decode()
+            assert event.startswith(f"id: {version}\nevent: create\n")
+            assert '"name":"Novo"' in event
+
+        # O cliente desliga: o stream termina sem esperar por mais alterações
+        for _, inbox, task in streams:
+            await inbox.put({"type": "http.disconnect"})
+            await asyncio.wait_for(task, 5)
+
+    asyncio.run(scenario())
+
+
+def test_change_stream_rejects_invalid_since(adapter):
+    async def scenario():
+        headers = await _login(adapter)
+        status, _, data = await _request(
+            adapter, "GET", "/produtos/changes/stream", headers, query=b"since=abc"
+        )
+        assert status == 400
+        assert json.loads(data)["status"] == "error"
+
+    asyncio.run(scenario())
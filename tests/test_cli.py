@@ -0,0 +1,83 @@
+# /tests/test_cli.py
+import json
+import pytest
+from app import create_app
+from app.repositories.product_repository import ProductRepository
+
+# --- Fixtures de Teste ---
+
+@pytest.fixture(scope='module')
+def app():
+    return create_app('testing')
+
+@pytest.fixture
+def runner(app):
+    return app.test_cli_runner()
+
+@pytest.fixture(autouse=True)
+def clean_db():
+    ProductRepository().clear()
+
+# --- Testes de Importação ---
+
+def test_import_jsonl_in_batches_and_reports_invalid_lines(runner, tmp_path):
+    """Produtos válidos são gravados; linhas inválidas são rejeitadas com o número da linha."""
+    path = tmp_path / "produtos.jsonl"
+    path.write_text(
+        '{"name": "A", "price": 1.5}\n'
+        '{"id": 99, "name": "B", "price": 2, "description": "bbb"}\n'
+        '\n'
+        '{"name": "", "price": 3}\n'
+        'isto não é json\n'
+        '{"name": "C", "price": 4}\n',
+        encoding="utf-8",
+    )
+    result = runner.invoke(args=["products", "import", str(path), "--batch-size", "2"])
+
+    assert result.exit_code == 1
+    assert "Linha 4: Nome e preço são obrigatórios." in result.stderr
+    assert "Linha 5: JSON inválido." in result.stderr
+    assert "3 produtos importados, 2 rejeitados." in result.stdout
+    products = ProductRepository().find_all()
+    # O ID do ficheiro é ignorado: o repositório atribui IDs novos
+    assert [(p.id, p.name, p.price, p.description) for p in products] == [
+        (1, "A", 1.5, None), (2, "B", 2, "bbb"), (3, "C", 4, None),
+    ]
+
+
+def test_import_csv_from_stdin(runner):
+    csv_data = "name,price,description\nCadeira,49.9,\nMesa,abc,Madeira\nSofá,300,\"Três, lugares\"\n"
+    result = runner.invoke(args=["products", "import", "-", "--format", "csv"], input=csv_data)
+
+    assert result.exit_code == 1
+    assert "Linha 3: O preço do produto deve ser numérico." in result.stderr
+    products = ProductRepository().find_all()
+    assert [(p.name, p.price, p.description) for p in products] == [
+        ("Cadeira", 49.9, None), ("Sofá", 300.0, "Três, lugares"),
+    ]
+
+# --- Testes de Exportação ---
+
+def test_export_jsonl_writes_one_product_per_line(runner, tmp_path):
+    repo = ProductRepository()
+    repo.save_many([{"name": f"Produto {i}", "price": float(i)} for i in range(25)])
+    path = tmp_path / "backup.jsonl"
+    result = runner.invoke(args=["products", "export", str(path), "--batch-size", "10"])
+
+    assert result.exit_code == 0
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == [p.to_dict() for p in repo.find_all()]
+
+
+def test_export_then_import_csv_round_trip(runner, tmp_path):
+    repo = ProductRepository()
+    repo.save({"name": "Caneta, azul", "price": 1.25, "description": "Linha 1\nLinha 2"})
+    repo.save({"name": "Lápis", "price": 0.5})
+    path = tmp_path / "backup.csv"
+    assert runner.invoke(args=["products", "export", str(path)]).exit_code == 0
+    exported = [(p.name, p.price, p.description) for p in repo.find_all()]
+
+    repo.clear()
+    result = runner.invoke(args=["products", "import", str(path)])
+    assert result.exit_code == 0
+    assert [(p.name, p.price, p.description) for p in repo.find_all()] == exported
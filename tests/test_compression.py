@@ -0,0 +1,111 @@
+# /tests/test_compression.py
+import gzip
+import zlib
+import pytest
+from app import create_app
+from app.repositories.product_repository import ProductRepository
+from app.utils import http_cache
+from app.utils.compression import HAS_BROTLI
+
+# --- Fixtures de Teste ---
+
+@pytest.fixture(scope='module')
+def app():
+    return create_app('testing')
+
+@pytest.fixture
+def test_client(app):
+    with app.test_client() as testing_client:
+        with app.app_context():
+            yield testing_client
+
+@pytest.fixture
+def headers(test_client):
+    credentials = {"client_id": "partner_123", "client_secret": "super_secret_key_123"}
+    token = test_client.post('/auth/login', json=credentials).get_json()['data']['token']
+    return {'Authorization': f'Bearer {token}'}
+
+@pytest.fixture(autouse=True)
+def catalogue():
+    repo = ProductRepository()
+    repo.clear()
+    repo.save_many([{"name": f"Produto {i}", "price": float(i), "description": "Descrição"} for i in range(200)])
+
+# --- Testes de Negociação ---
+
+@pytest.mark.parametrize("accept, expected", [
+    ("gzip, deflate", "gzip"),
+    ("deflate;q=1.0, gzip;q=0.5", "deflate"),
+    ("gzip;q=0, deflate", "deflate"),
+    ("*", "br" if HAS_BROTLI else "gzip"),
+    ("identity", None),
+])
+def test_encoding_follows_accept_encoding(test_client, headers, accept, expected):
+    response = test_client.get('/produtos?limit=100', headers={**headers, 'Accept-Encoding': accept})
+    assert response.status_code == 200
+    assert response.headers.get('Content-Encoding') == expected
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+
+def test_small_bodies_are_not_compressed(test_client, headers):
+    """Abaixo de COMPRESSION_MIN_SIZE o corpo segue sem compressão."""
+    response = test_client.get('/produtos/1', headers={**headers, 'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+# --- Testes de Respostas Comprimidas ---
+
+def test_compressed_page_is_cached_and_has_its_own_etag(test_client, headers, monkeypatch):
+    """A variante gzip é comprimida uma vez por versão e tem uma ETag própria."""
+    plain = test_client.get('/produtos?limit=100', headers=headers)
+    calls = []
+    original = http_cache.compress
+    monkeypatch.setattr(http_cache, "compress", lambda body, encoding: calls.append(encoding) or original(body, encoding))
+
+    gzip_headers = {**headers, 'Accept-Encoding': 'gzip'}
+    first = test_client.get('/produtos?limit=100', headers=gzip_headers)
+    second = test_client.get('/produtos?limit=100', headers=gzip_headers)
+    assert calls == ["gzip"]
+    assert first.headers['Content-Encoding'] == 'gzip'
+    assert first.get_data() == second.get_data()
+    assert gzip.decompress(first.get_data()) == plain.get_data()
+    assert len(first.get_data()) * 5 < len(plain.get_data())
+    assert first.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+
+    # A ETag da variante comprimida também serve para pedidos condicionais
+    response = test_client.get(
+        '/produtos?limit=100', headers={**gzip_headers, 'If-None-Match': first.headers['ETag']}
+    )
+    assert response.status_code == 304
+    assert response.headers['ETag'] == first.headers['ETag']
+
+
+def test_streamed_listing_is_compressed(test_client, headers):
+    plain = test_client.get('/produtos', headers=headers)
+    response = test_client.get('/produtos', headers={**headers, 'Accept-Encoding': 'deflate'})
+    assert response.is_streamed
+    assert response.headers['Content-Encoding'] == 'deflate'
+    assert zlib.decompress(response.get_data()) == plain.get_data()
+
+
+def test_compression_can_be_disabled(headers):
+    app = create_app('testing')
+    app.config["COMPRESSION_ENCODINGS"] = ()
+    with app.test_client() as client:
+        response = client.get('/produtos?limit=100', headers={**headers, 'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_streamed_compression_outside_app_context():
+    """O corpo em streaming é lido depois de o contexto da aplicação terminar, como num servidor real."""
+    app = create_app('testing')
+    client = app.test_client()
+    credentials = {"client_id": "partner_123", "client_secret": "super_secret_key_123"}
+    headers = {'Authorization': f"Bearer {client.post('/auth/login', json=credentials).get_json()['data']['token']}"}
+    plain = client.get('/produtos', headers=headers)
+    response = client.get('/produtos', headers={**headers, 'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()) == plain.get_data()
@@ -0,0 +1,148 @@
+# /tests/test_metrics.py
+import threading
+import pytest
+from app import create_app
+from app.repositories.product_repository import ProductRepository
+from app.utils.metrics import LOCK_HOLD, LOCK_WAIT, MetricsRegistry, metrics
+
+# --- Fixtures de Teste ---
+
+@pytest.fixture(scope='module')
+def test_client():
+    flask_app = create_app('testing')
+    with flask_app.test_client() as testing_client:
+        with flask_app.app_context():
+            yield testing_client
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    ProductRepository().clear()
+    metrics.reset()
+
+def get_auth_token(test_client):
+    credentials = {"client_id": "partner_123", "client_secret": "super_secret_key_123"}
+    response = test_client.post('/auth/login', json=credentials)
+    return response.get_json()['data']['token']
+
+# --- Testes do Registo ---
+
+def test_observations_from_many_threads_are_merged():
+    """Cada thread escreve nos seus contadores; a leitura soma todas, incluindo as já terminadas."""
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latência.", ("route",), buckets=(0.1, 1.0))
+
+    def worker():
+        for _ in range(1000):
+            latency.observe(0.05, ("a",))
+        latency.observe(5.0, ("b",))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    latency.observe(0.5, ("a",))
+
+    collected = registry.collect()[latency]
+    assert collected[("a",)][0] == [8000, 1, 0]
+    assert collected[("b",)] == ([0, 0, 8], 40.0)
+    # As threads terminadas foram juntadas ao total acumulado
+    assert len(registry._threads) == 1
+
+
+def test_render_prometheus_text_format():
+    """Faixas cumulativas, +Inf, _sum e _count, e etiquetas escapadas."""
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latência.", ("route",), buckets=(0.1, 1.0))
+    latency.observe(0.05, ('a"b',))
+    latency.observe(2.0, ('a"b',))
+    text = registry.render([lambda: [("items", "gauge", "Itens.", [({}, 3)])]])
+
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{route="a\\"b",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="a\\"b",le="1.0"} 1' in text
+    assert 'latency_seconds_bucket{route="a\\"b",le="+Inf"} 2' in text
+    assert 'latency_seconds_sum{route="a\\"b"} 2.05' in text
+    assert 'latency_seconds_count{route="a\\"b"} 2' in text
+    assert "# TYPE items gauge\nitems 3\n" in text
+
+
+def test_disabled_registry_ignores_observations():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latência.")
+    registry.enabled = False
+    latency.observe(1.0)
+    assert registry.collect() == {}
+
+
+def test_repository_lock_times_are_recorded():
+    """Escritas e leituras sob o lock do repositório em memória registam espera e posse."""
+    repo = ProductRepository()
+    repo.save({"name": "Produto", "price": 1.0})
+    repo.find_all()
+    collected = metrics.collect()
+    for histogram in (LOCK_WAIT, LOCK_HOLD):
+        assert sum(collected[histogram][("product_repository", "write")][0]) >= 1
+        assert sum(collected[histogram][("product_repository", "read")][0]) >= 1
+
+# --- Testes do Endpoint /metrics ---
+
+def test_metrics_endpoint_reports_latency_per_endpoint_and_status(test_client):
+    token = get_auth_token(test_client)
+    headers = {'Authorization': f'Bearer {token}'}
+    test_client.post('/produtos', headers=headers, json={"name": "Novo", "price": 5.0})
+    test_client.get('/produtos/999', headers=headers)
+    test_client.get('/produtos', headers={'Authorization': 'Bearer invalido'})
+
+    response = test_client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{endpoint="auth_api.login",method="POST",status="200"} 1' in text
+    assert 'endpoint="product_api.create_product",method="POST",status="201"' in text
+    assert 'endpoint="product_api.get_product_by_id",method="GET",status="404"' in text
+    assert 'jwt_decode_duration_seconds_count{result="valid"} 1' in text
+    assert 'jwt_decode_duration_seconds_count{result="invalid"} 1' in text
+    assert 'repository_lock_hold_seconds_count{lock="product_repository",mode="write"}' in text
+    assert 'token_cache_requests_total{result="hit"} 1' in text
+    assert 'product_repository_products 1' in text
+
+
+def test_metrics_endpoint_labels_unmatched_routes(test_client):
+    test_client.get('/nao-existe')
+    text = test_client.get('/metrics').get_data(as_text=True)
+    assert 'endpoint="unmatched",method="GET",status="404"' in text
+
+
+def test_metrics_switch_is_per_app(monkeypatch):
+    """Criar uma aplicação com as métricas desligadas não as desliga nas outras."""
+    from config import TestingConfig
+    enabled_app = create_app('testing')
+    monkeypatch.setattr(TestingConfig, 'METRICS_ENABLED', False)
+    disabled_app = create_app('testing')
+    assert disabled_app.extensions["metrics"] is None
+    assert disabled_app.test_client().get('/metrics').status_code == 404
+
+    with disabled_app.app_context():
+        ProductRepository().find_all()
+    assert LOCK_WAIT not in metrics.collect()
+
+    client = enabled_app.test_client()
+    headers = {'Authorization': f'Bearer {get_auth_token(client)}'}
+    client.post('/produtos', headers=headers, json={"name": "Novo", "price": 5.0})
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'endpoint="product_api.create_product",method="POST",status="201"' in text
+    assert 'jwt_decode_duration_seconds_count{result="valid"} 1' in text
+    assert 'repository_lock_hold_seconds_count{lock="product_repository",mode="write"}' in text
+
+
+def test_metrics_endpoint_requires_configured_token(monkeypatch):
+    from config import TestingConfig
+    monkeypatch.setattr(TestingConfig, 'METRICS_TOKEN', 'segredo-do-scraper')
+    client = create_app('testing').test_client()
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer outro'}).status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer é'}).status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer segredo-do-scraper'})
+    assert response.status_code == 200
+    assert 'product_repository_products' in response.get_data(as_text=True)
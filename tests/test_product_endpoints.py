@@ -1,6 +1,8 @@
 # /tests/test_product_endpoints.py
+import base64
 import pytest
 from app import create_app
+from app.repositories import product_repository
 from app.repositories.product_repository import ProductRepository
 
 # --- Fixtures de Teste ---
@@ -79,6 +81,20 @@ def test_create_product(test_client):
     assert response_data['data']['name'] == 'Novo Produto Criado'
     assert 'id' in response_data['data']
 
+def test_create_product_rejects_price_beyond_64_bits(monkeypatch):
+    """
+    Com o provider JSON padrão (que lê inteiros de qualquer tamanho), um preço
+    inteiro enorme é rejeitado na criação, em vez de quebrar as leituras seguintes.
+    """
+    from config import TestingConfig
+    monkeypatch.setattr(TestingConfig, 'FAST_JSON_PROVIDER', False)
+    client = create_app('testing').test_client()
+    headers = {'Authorization': f'Bearer {get_auth_token(client)}'}
+    response = client.post('/produtos', data='{"name": "Caro", "price": 100000000000000000000000}',
+                           content_type='application/json', headers=headers)
+    assert response.status_code == 400
+    assert client.get('/produtos', headers=headers).status_code == 200
+
 def test_get_product_by_id(test_client):
     """Testa a busca de um produto específico pelo ID."""
     token = get_auth_token(test_client)
@@ -113,6 +129,58 @@ def test_update_product(test_client):
     # Garante que o nome não foi alterado
     assert response_data['data']['name'] == 'Produto Base de Teste'
 
+def test_update_product_rejects_invalid_fields(test_client):
+    """Testa que a atualização aplica as mesmas regras de validação da criação."""
+    token = get_auth_token(test_client)
+    headers = {'Authorization': f'Bearer {token}'}
+    response = test_client.put('/produtos/1', json={'preco': 5}, headers=headers)
+    assert response.status_code == 400
+    response = test_client.patch('/produtos/1', json={'price': -1}, headers=headers)
+    assert response.status_code == 400
+    response = test_client.patch('/produtos/1', json={'id': 2, 'price': 1}, headers=headers)
+    assert response.status_code == 400
+    # Nenhuma das tentativas alterou o produto
+    assert test_client.get('/produtos/1', headers=headers).get_json()['data']['price'] == 10.0
+
+def test_update_missing_product(test_client):
+    """Dados inválidos respondem 400 mesmo sem o produto; dados válidos num ID inexistente, 404."""
+    token = get_auth_token(test_client)
+    headers = {'Authorization': f'Bearer {token}'}
+    assert test_client.put('/produtos/999', json={'price': -1}, headers=headers).status_code == 400
+    response = test_client.put('/produtos/999', json={'price': 1}, headers=headers)
+    assert response.status_code == 404
+    assert response.get_json()['status'] == 'error'
+
+def test_default_json_provider_serializes_products(monkeypatch):
+    """Com FAST_JSON_PROVIDER desligado, o provider padrão do Flask continua a serializar os produtos."""
+    from flask import jsonify
+    from app.models.product_model import Product
+    from app.utils.json_codec import DomainJSONProvider
+    from config import TestingConfig
+    monkeypatch.setattr(TestingConfig, 'FAST_JSON_PROVIDER', False)
+    flask_app = create_app('testing')
+    assert type(flask_app.json) is DomainJSONProvider
+    with flask_app.app_context():
+        data = jsonify(Product(1, 'Caneca', 2.5)).get_json()
+    assert data == {'id': 1, 'name': 'Caneca', 'price': 2.5}
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_created_product_reads_back_identically(backend, tmp_path, monkeypatch):
+    """O JSON do POST é o mesmo das leituras seguintes, com preço inteiro ou decimal, em cada backend."""
+    from config import TestingConfig
+    monkeypatch.setattr(TestingConfig, 'PRODUCT_REPOSITORY', backend)
+    monkeypatch.setattr(TestingConfig, 'SQLITE_DATABASE_PATH', str(tmp_path / 'products.db'))
+    client = create_app('testing').test_client()
+    headers = {'Authorization': f'Bearer {get_auth_token(client)}'}
+    for price in (50, 50.0, 12.5):
+        created = client.post('/produtos', json={'name': 'Caneca', 'price': price}, headers=headers).get_json()['data']
+        assert type(created['price']) is type(price)
+        # repr distingue 50 de 50.0, que a comparação com == considera iguais
+        fetched = client.get(f"/produtos/{created['id']}", headers=headers).get_json()['data']
+        assert repr(fetched) == repr(created)
+        page = client.get('/produtos?limit=100', headers=headers).get_json()['data']['items']
+        assert repr(created) in map(repr, page)
+
 def test_delete_product(test_client):
     """Testa a exclusão de um produto."""
     token = get_auth_token(test_client)
@@ -122,3 +190,283 @@ def test_delete_product(test_client):
     # Verifica se o produto foi realmente deletado
     get_response = test_client.get('/produtos/1', headers=headers)
     assert get_response.status_code == 404
+
+def test_get_products_paginated_with_cursor(test_client):
+    """Testa a paginação por cursor da listagem, ordenada por ID."""
+    token = get_auth_token(test_client)
+    headers = {'Authorization': f'Bearer {token}'}
+    repo = ProductRepository()
+    for i in range(4):
+        repo.save({'name': f'Produto {i}', 'price': 1.0 + i})
+
+    response = test_client.get('/produtos?limit=2', headers=headers)
+    assert response.status_code == 200
+    page = response.get_json()['data']
+    assert [p['id'] for p in page['items']] == [1, 2]
+    assert page['next_cursor']
+
+    seen = [p['id'] for p in page['items']]
+    while page['next_cursor']:
+        response = test_client.get(f"/produtos?limit=2&cursor={page['next_cursor']}", headers=headers)
+        page = response.get_json()['data']
+        seen.extend(p['id'] for p in page['items'])
+    assert seen == [1, 2, 3, 4, 5]
+
+def test_get_products_invalid_pagination(test_client):
+    """Testa a rejeição de parâmetros de paginação inválidos."""
+    token = get_auth_token(test_client)
+    headers = {'Authorization': f'Bearer {token}'}
+    assert test_client.get('/produtos?limit=0', headers=headers).status_code == 400
+    assert test_client.get('/produtos?limit=abc', headers=headers).status_code == 400
+    assert test_client.get('/produtos?cursor=%%%', headers=headers).status_code == 400
+    nested = base64.urlsafe_b64encode(b"[" * 5000).decode()
+    response = test_client.get(f'/produtos?cursor={nested}', headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()['erro']['message'] == "Cursor inválido."
+
+def test_get_products_filtered_by_price_and_sorted(test_client):
+    """Testa o filtro por faixa de preço com ordenação, percorrendo as páginas."""
+    token = get_auth_token(test_client)
+    headers = {'Authorization': f'Bearer {token}'}
+    repo = ProductRepository()
+    for name, price in [('Caneca', 45.0), ('Abajur', 12.5), ('Banco', 60.0), ('Dado', 30.0), ('Copo', 30.0)]:
+        repo.save({'name': name, 'price': price})
+
+    url = '/produtos?min_price=10&max_price=50&sort=price&limit=2'
+    seen = []
+    while url:
+        page = test_client.get(url, headers=headers).get_json()['data']
+        seen.extend((p['name'], p['price']) for p in page['items'])
+        url = page['next_cursor'] and f"/produtos?min_price=10&max_price=50&sort=price&limit=2&cursor={page['next_cursor']}"
+    assert seen == [('Produto Base de Teste', 10.0), ('Abajur', 12.5), ('Dado', 30.0), ('Copo', 30.0), ('Caneca', 45.0)]
+
+    response = test_client.get('/produtos?sort=name&max_price=30', headers=headers)
+    names = [p['name'] for p in response.get_json()['data']['items']]
+    assert names == ['Abajur', 'Copo', 'Dado', 'Produto Base de Teste']
+
+def test_get_products_invalid_filters(test_client):
+    """Testa a rejeição de filtros, ordenações e cursores inválidos."""
+    token = get_auth_token(test_client)
+    headers = {'Authorization': f'Bearer {token}'}
+    assert test_client.get('/produtos?sort=preco', headers=headers).status_code == 400
+    assert test_client.get('/produtos?min_price=barato', headers=headers).status_code == 400
+    assert test_client.get('/produtos?min_price=nan', headers=headers).status_code == 400
+    assert test_client.get('/produtos?min_price=50&max_price=10', headers=headers).status_code == 400
+    # Um cursor da ordenação por ID não serve para a ordenação por preço
+    assert test_client.get('/produtos?sort=price&cursor=MQ', headers=headers).status_code == 400
+
+def test_autocomplete_products(test_client):
+    """Testa as sugestões por prefixo, sem diferenciar maiúsculas nem acentos."""
+    token = get_auth_token(test_client)
+    headers = {'Authorization': f'Bearer {token}'}
+    repo = ProductRepository()
+    for name in ["Pão de forma", "Panela", "Farinha para pão", "Pano de prato"]:
+        repo.save({'name': name, 'price': 5.0})
+
+    response = test_client.get('/produtos/autocomplete?prefix=PAO', headers=headers)
+    assert response.status_code == 200
+    assert [item['name'] for item in response.get_json()['data']] == ["Pão de forma", "Farinha para pão"]
+    assert set(response.get_json()['data'][0]) == {'id', 'name'}
+
+    response = test_client.get('/produtos/autocomplete?prefix=pa&k=2', headers=headers)
+    assert [item['name'] for item in response.get_json()['data']] == ["Panela", "Pano de prato"]
+
+    assert test_client.get('/produtos/autocomplete', headers=headers).status_code == 400
+    assert test_client.get('/produtos/autocomplete?prefix=%20', headers=headers).status_code == 400
+    assert test_client.get('/produtos/autocomplete?prefix=pa&k=0', headers=headers).status_code == 400
+    assert test_client.get('/produtos/autocomplete?prefix=pa&k=muitos', headers=headers).status_code == 400
+
+def test_get_products_stats(test_client):
+    """Testa as estatísticas de preço e o histograma, inclusive após exclusões."""
+    token = get_auth_token(test_client)
+    headers = {'Authorization': f'Bearer {token}'}
+    repo = ProductRepository()
+    for price in (5.0, 20.0, 70.0):
+        repo.save({'name': 'Item', 'price': price})
+
+    response = test_client.get('/produtos/stats?buckets=0,10,50', headers=headers)
+    assert response.status_code == 200
+    stats = response.get_json()['data']
+    assert stats['total_produtos'] == 4
+    assert stats['preco_total'] == 105.0
+    assert stats['preco_medio'] == 26.25
+    assert (stats['preco_minimo'], stats['preco_maximo']) == (5.0, 70.0)
+    assert [b['total'] for b in stats['histograma']] == [1, 2, 1]
+    assert stats['histograma'][-1] == {'de': 50.0, 'ate': None, 'total': 1}
+
+    test_client.delete('/produtos/4', headers=headers)
+    stats = test_client.get('/produtos/stats', headers=headers).get_json()['data']
+    assert stats['preco_maximo'] == 20.0
+    assert len(stats['histograma']) == 6
+
+    assert test_client.get('/produtos/stats?buckets=10,5', headers=headers).status_code == 400
+    assert test_client.get('/produtos/stats?buckets=a,b', headers=headers).status_code == 400
+
+def test_get_product_changes_since_version(test_client):
+    """Testa a consulta incremental de alterações e a resposta 410 para versões fora do histórico."""
+    token = get_auth_token(test_client)
+    headers = {'Authorization': f'Bearer {token}'}
+    repo = ProductRepository()
+    since = repo.get_version()
+    test_client.post('/produtos', json={'name': 'Novo', 'price': 5.0}, headers=headers)
+    test_client.patch('/produtos/1', json={'price': 7.0}, headers=headers)
+    test_client.delete('/produtos/2', headers=headers)
+
+    response = test_client.get(f'/produtos/changes?since={since}&limit=2', headers=headers)
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert [(c['op'], c['id']) for c in data['changes']] == [('create', 2), ('update', 1)]
+    assert data['changes'][1]['data']['price'] == 7.0
+    assert data['has_more'] is True
+
+    data = test_client.get(f"/produtos/changes?since={data['next_since']}", headers=headers).get_json()['data']
+    assert [(c['op'], c['id'], c['data']) for c in data['changes']] == [('delete', 2, None)]
+    assert data['next_since'] == repo.get_version()
+
+    assert test_client.get('/produtos/changes', headers=headers).status_code == 400
+    assert test_client.get('/produtos/changes?since=-1', headers=headers).status_code == 400
+    assert test_client.get(f'/produtos/changes?since={since + 100}', headers=headers).status_code == 400
+
+def test_get_product_changes_outside_history(test_client, monkeypatch):
+    """Testa o 410 quando o histórico retido já não chega à versão pedida."""
+    token = get_auth_token(test_client)
+    headers = {'Authorization': f'Bearer {token}'}
+    monkeypatch.setattr(product_repository._change_feed, "retention", 2)
+    repo = ProductRepository()
+    since = repo.get_version()
+    for i in range(5):
+        repo.save({'name': f'P{i}', 'price': 1.0})
+    assert test_client.get(f'/produtos/changes?since={since}', headers=headers).status_code == 410
+
+def test_stream_product_changes(test_client):
+    """Testa o stream SSE: evento inicial, alterações em tempo real e keep-alive."""
+    token = get_auth_token(test_client)
+    headers = {'Authorization': f'Bearer {token}'}
+    config = test_client.application.config
+    heartbeat = config['CHANGES_STREAM_HEARTBEAT']
+    config['CHANGES_STREAM_HEARTBEAT'] = 0.01
+    response = test_client.get('/produtos/changes/stream', headers=headers, buffered=False)
+    try:
+        assert response.mimetype == 'text/event-stream'
+        events = iter(response.response)
+        assert next(events).startswith(b'event: ready\n')
+        product_id = ProductRepository().save({'name': 'Ao vivo', 'price': 3.0}).id
+        event = next(events)
+        assert event.startswith(b'id: ') and b'event: create\n' in event and b'"Ao vivo"' in event
+        assert next(events) == b': keep-alive\n\n'
+    finally:
+        response.close()
+        config['CHANGES_STREAM_HEARTBEAT'] = heartbeat
+
+    # Reconexão com Last-Event-ID retoma depois da última alteração recebida
+    last_id = int(event.split(b'\n')[0][4:])
+    ProductRepository().update(product_id, {'price': 4.0})
+    response = test_client.get('/produtos/changes/stream', headers={**headers, 'Last-Event-ID': str(last_id)}, buffered=False)
+    try:
+        events = iter(response.response)
+        next(events)
+        assert b'event: update\n' in next(events)
+    finally:
+        response.close()
+
+def test_get_all_products_streamed(test_client):
+    """Testa a exportação completa em streaming, atravessando vários lotes."""
+    token = get_auth_token(test_client)
+    headers = {'Authorization': f'Bearer {token}'}
+    repo = ProductRepository()
+    for i in range(1200):
+        repo.save({'name': f'Produto {i}', 'price': 1.0})
+    response = test_client.get('/produtos', headers=headers)
+    assert response.status_code == 200
+    assert response.is_streamed
+    data = response.get_json()['data']
+    assert len(data) == 1201
+    assert [p['id'] for p in data] == list(range(1, 1202))
+
+def test_batch_create_update_delete(test_client):
+    """Testa os endpoints em lote, com resultados por item."""
+    token = get_auth_token(test_client)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    items = [{'name': 'Lote A', 'price': 5.0}, {'name': 'Sem preço'}, {'name': 'Lote B', 'price': 7.5}]
+    response = test_client.post('/produtos/batch', json=items, headers=headers)
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert (data['succeeded'], data['failed']) == (2, 1)
+    assert [r['status'] for r in data['results']] == [201, 400, 201]
+    assert data['results'][1]['erro']['message'] == "Nome e preço são obrigatórios."
+    created_ids = [data['results'][0]['data']['id'], data['results'][2]['data']['id']]
+
+    changes = [{'id': created_ids[0], 'price': 6.0}, {'id': 999, 'price': 1.0}, {'id': created_ids[1], 'price': -1}]
+    response = test_client.put('/produtos/batch', json=changes, headers=headers)
+    results = response.get_json()['data']['results']
+    assert [r['status'] for r in results] == [200, 404, 400]
+    assert results[0]['data']['price'] == 6.0
+
+    response = test_client.delete('/produtos/batch', json=created_ids + [999], headers=headers)
+    results = response.get_json()['data']['results']
+    assert [r['status'] for r in results] == [204, 204, 404]
+    assert test_client.get('/produtos/count', headers=headers).get_json()['data']['total_produtos'] == 1
+
+def test_batch_rejects_invalid_body(test_client):
+    """Testa a rejeição de corpos que não são listas."""
+    token = get_auth_token(test_client)
+    headers = {'Authorization': f'Bearer {token}'}
+    assert test_client.post('/produtos/batch', json={'name': 'x'}, headers=headers).status_code == 400
+    assert test_client.post('/produtos/batch', json=[], headers=headers).status_code == 400
+
+def test_sparse_fieldsets(test_client):
+    """Testa o parâmetro 'fields' na listagem, na busca por ID e por nome e nos lotes."""
+    token = get_auth_token(test_client)
+    headers = {'Authorization': f'Bearer {token}'}
+    ProductRepository().save({'name': 'Caneta', 'price': 2.5, 'description': 'Azul'})
+
+    page = test_client.get('/produtos?limit=10&fields=price,id', headers=headers).get_json()['data']
+    assert page['items'] == [{'id': 1, 'price': 10.0}, {'id': 2, 'price': 2.5}]
+    assert test_client.get('/produtos?fields=id', headers=headers).get_json()['data'] == [{'id': 1}, {'id': 2}]
+    assert test_client.get('/produtos/2?fields=description', headers=headers).get_json()['data'] == {'description': 'Azul'}
+    # A variante completa continua disponível na cache depois da projeção
+    assert test_client.get('/produtos/2', headers=headers).get_json()['data']['name'] == 'Caneta'
+    search = test_client.get('/produtos/search?name=caneta&fields=name', headers=headers)
+    assert search.get_json()['data'] == [{'name': 'Caneta'}]
+
+    response = test_client.post('/produtos/batch?fields=id', json=[{'name': 'Lote', 'price': 1.0}], headers=headers)
+    assert response.get_json()['data']['results'][0]['data'] == {'id': 3}
+
+    for url in ('/produtos?fields=id,preco', '/produtos/1?fields=', '/produtos/search?name=x&fields=stock'):
+        response = test_client.get(url, headers=headers)
+        assert response.status_code == 400
+    response = test_client.post('/produtos/batch?fields=sku', json=[{'name': 'Lote', 'price': 1.0}], headers=headers)
+    assert response.status_code == 400
+    assert "sku" in response.get_json()['erro']['message']
+    assert ProductRepository().count() == 3
+
+def test_conditional_get_with_etag(test_client):
+    """Testa ETag e If-None-Match (304) nas leituras, e a invalidação após uma escrita."""
+    token = get_auth_token(test_client)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    for url in ('/produtos/1', '/produtos/count', '/produtos?limit=10', '/produtos'):
+        response = test_client.get(url, headers=headers)
+        assert response.status_code == 200
+        etag = response.headers['ETag']
+        cached = test_client.get(url, headers={**headers, 'If-None-Match': etag})
+        assert cached.status_code == 304
+        assert cached.data == b''
+
+    etag = test_client.get('/produtos/1', headers=headers).headers['ETag']
+    test_client.put('/produtos/1', json={'price': 12.5}, headers=headers)
+    response = test_client.get('/produtos/1', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['data']['price'] == 12.5
+    assert response.headers['ETag'] != etag
+
+def test_cached_responses_follow_writes(test_client):
+    """Garante que a cache de respostas não serve dados antigos após escritas."""
+    token = get_auth_token(test_client)
+    headers = {'Authorization': f'Bearer {token}'}
+    assert test_client.get('/produtos/count', headers=headers).get_json()['data']['total_produtos'] == 1
+    test_client.post('/produtos', json={'name': 'Outro', 'price': 3.0}, headers=headers)
+    assert test_client.get('/produtos/count', headers=headers).get_json()['data']['total_produtos'] == 2
+    test_client.delete('/produtos/1', headers=headers)
+    assert test_client.get('/produtos/1', headers=headers).status_code == 404
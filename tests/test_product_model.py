@@ -0,0 +1,57 @@
+# /tests/test_product_model.py
+import pytest
+from app.models.product_model import Product
+
+
+# --- Validação ---
+
+@pytest.mark.parametrize("data, message", [
+    ([], "Os dados do produto devem ser um objeto JSON."),
+    ({"name": "Mesa"}, "Nome e preço são obrigatórios."),
+    ({"name": "Mesa", "price": 1, "cor": "azul"}, "Campos desconhecidos: cor."),
+    ({"name": 10, "price": 1}, "O nome do produto deve ser um texto."),
+    ({"name": "Mesa", "price": "10"}, "O preço do produto deve ser numérico."),
+    ({"name": "Mesa", "price": True}, "O preço do produto deve ser numérico."),
+    ({"name": "Mesa", "price": -1}, "O preço do produto não pode ser negativo."),
+    ({"name": "Mesa", "price": 2**63}, "O preço do produto é grande demais."),
+    ({"name": "Mesa", "price": 1, "description": 5}, "A descrição do produto deve ser um texto."),
+])
+def test_validate_rejects_invalid_data(data, message):
+    """Testa as mensagens de erro da validação na criação."""
+    assert Product.validate(data) == message
+
+
+def test_validate_partial_checks_only_present_fields():
+    """Testa que a validação parcial (atualização) ignora os campos ausentes."""
+    assert Product.validate({"price": 5}, partial=True) is None
+    assert Product.validate({"description": "Nova"}, partial=True) is None
+    assert Product.validate({"price": -5}, partial=True) == "O preço do produto não pode ser negativo."
+    assert Product.validate({"price": 2**63 - 1}, partial=True) is None
+
+
+# --- Representação ---
+
+def test_replace_returns_new_object_and_json_cache_follows():
+    """Testa que 'replace' não altera o original e que o JSON em cache é do novo objeto."""
+    product = Product(1, "Mesa", 100)
+    assert product.to_json() == b'{"id":1,"name":"Mesa","price":100}'
+    updated = product.replace(price=80, description="Carvalho")
+    assert product.price == 100
+    assert updated.to_dict() == {"id": 1, "name": "Mesa", "price": 80, "description": "Carvalho"}
+    assert b'"price":80' in updated.to_json()
+
+
+def test_product_has_no_instance_dict():
+    """Testa que o modelo usa __slots__ (sem __dict__ por instância)."""
+    product = Product.from_dict({"id": 1, "name": "Mesa", "price": 1})
+    assert not hasattr(product, "__dict__")
+    assert product == Product(1, "Mesa", 1)
+
+
+def test_projection_keeps_only_requested_fields():
+    """Testa que 'fields' limita os campos sem afetar o JSON completo em cache."""
+    product = Product(1, "Mesa", 100, "Carvalho")
+    assert product.to_dict(("id", "price")) == {"id": 1, "price": 100}
+    assert product.to_json(("id", "price")) == b'{"id":1,"price":100}'
+    assert Product(2, "Cadeira", 50).to_dict(("name", "description")) == {"name": "Cadeira"}
+    assert product.to_json() == b'{"id":1,"name":"Mesa","price":100,"description":"Carvalho"}'
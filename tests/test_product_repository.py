@@ -0,0 +1,395 @@
+# /tests/test_product_repository.py
+import json
+import random
+import threading
+import pytest
+from app.repositories import product_repository
+from app.repositories.catalogue_index import CatalogueIndex
+from app.models.product_model import Product
+from app.repositories.prefix_index import TERM_LENGTH, normalize_text
+from app.repositories.product_repository import ProductRepository
+from app.repositories.shared_product_repository import SharedMemoryProductRepository
+from app.repositories.sqlite_product_repository import SQLiteProductRepository
+from app.services.product_service import ProductService
+from app.utils import json_codec
+
+
+# --- Fixtures de Teste ---
+
+@pytest.fixture(params=["memory", "sqlite", "shared"])
+def repo(request, tmp_path):
+    """Retorna um repositório limpo de cada backend suportado."""
+    if request.param == "memory":
+        repository = ProductRepository()
+    elif request.param == "sqlite":
+        repository = SQLiteProductRepository(str(tmp_path / "products.db"))
+    else:
+        # Anel de alterações pequeno, para exercitar também a recarga completa
+        repository = SharedMemoryProductRepository(str(tmp_path / "products.store"), capacity=4096, change_retention=16)
+    repository.clear()
+    yield repository
+    repository.clear()
+    repository.close()
+
+
+def naive_search(products, name):
+    """Semântica de referência da busca por nome: substring sem diferenciar maiúsculas."""
+    return [p for p in products if name.lower() in p.name.lower()]
+
+
+# --- Testes do Índice de Busca por Nome ---
+
+def test_find_by_name_matches_substring_semantics(repo):
+    """Compara a busca indexada com a varredura completa para várias consultas."""
+    rng = random.Random(42)
+    words = ["Caneta", "Azul", "caderno", "AZULEJO", "lápis", "Borracha", "ção", "x"]
+    for _ in range(300):
+        repo.save({"name": " ".join(rng.sample(words, 2)), "price": 1.0})
+
+    queries = ["azul", "AZ", "a", "ul c", "ÇÃO", "caneta azul", "inexistente", "x", "lápis b"]
+    for query in queries:
+        assert repo.find_by_name(query) == naive_search(repo.find_all(), query)
+
+
+def test_find_by_name_follows_update_and_delete(repo):
+    """Garante que o índice acompanha alterações de nome e exclusões."""
+    first = repo.save({"name": "Mouse sem fio", "price": 80.0})
+    second = repo.save({"name": "Teclado sem fio", "price": 120.0})
+
+    updated = repo.update(first.id, {"name": "Monitor"})
+    assert repo.find_by_name("sem fio") == [second]
+    assert repo.find_by_name("moni") == [updated]
+
+    repo.delete(second.id)
+    assert repo.find_by_name("sem fio") == []
+
+# --- Testes do Catálogo em Memória ---
+
+def test_catalogue_reload_never_exposes_partial_state(monkeypatch):
+    """Durante load, leitores sem lock continuam a ver o catálogo anterior completo."""
+    catalogue = CatalogueIndex()
+    old = {i: Product(i, f"Antigo {i}", 1.0) for i in range(1, 4)}
+    catalogue.load(old, {i: i for i in old})
+    new = {i: Product(i, f"Novo {i}", 2.0) for i in range(1, 6)}
+
+    seen = []
+    original_add = catalogue._name_index.add
+
+    def observing_add(key, text):
+        seen.append((dict(catalogue.products), len(catalogue.ids)))
+        original_add(key, text)
+
+    monkeypatch.setattr(catalogue._name_index, "add", observing_add)
+    catalogue.load(new, {i: 10 + i for i in new})
+    assert all(products == old and count == 3 for products, count in seen)
+    assert catalogue.products == new
+    assert catalogue.ids == [1, 2, 3, 4, 5]
+    assert catalogue.versions[5] == 15
+
+# --- Testes do Autocompletar ---
+
+def naive_autocomplete(products, prefix, limit):
+    """
+    Semântica de referência: nomes que começam pelo prefixo, depois nomes com uma
+    palavra seguinte que começa por ele, cada grupo ordenado pelo texto a partir
+    do ponto de correspondência (cortado em TERM_LENGTH) e pelo ID.
+    """
+    query = normalize_text(prefix)
+    first, other = [], []
+    for product in products:
+        words = normalize_text(product.name).split()
+        suffixes = [" ".join(words[i:]) for i in range(len(words))]
+        if suffixes and suffixes[0].startswith(query):
+            first.append((suffixes[0][:TERM_LENGTH], product.id, product))
+        matches = [suffix[:TERM_LENGTH] for suffix in suffixes[1:] if suffix.startswith(query)]
+        if matches and not suffixes[0].startswith(query):
+            other.append((min(matches), product.id, product))
+    return [product for _, _, product in sorted(first) + sorted(other)][:limit]
+
+
+def test_autocomplete_matches_reference_semantics(repo):
+    rng = random.Random(7)
+    words = ["Cadeira", "café", "Caderno", "CAFETEIRA", "Pão", "pano", "Mesa", "ação", "Avião"]
+    for _ in range(300):
+        repo.save({"name": " ".join(rng.sample(words, 3)), "price": 1.0})
+
+    queries = ["ca", "CAFE", "café c", "pao", "Ação", "avia", "m", "mesa pano", "x", "  caf  "]
+    for query in queries:
+        for limit in (1, 5, 50):
+            assert repo.autocomplete(query, limit) == naive_autocomplete(repo.find_all(), query, limit)
+
+
+def test_autocomplete_follows_writes_and_long_prefixes(repo):
+    long_name = "Conjunto de panelas antiaderentes com tampa de vidro"
+    first = repo.save({"name": long_name, "price": 300.0})
+    second = repo.save({"name": "Panela de pressão", "price": 150.0})
+
+    assert repo.autocomplete("PANEL", 10) == [second, first]
+    assert repo.autocomplete("conjunto de panelas antiaderentes com", 10) == [first]
+    assert repo.autocomplete("conjunto de panelas antiaderentes sem", 10) == []
+    assert repo.autocomplete("pressao", 10) == [second]
+
+    updated = repo.update(second.id, {"name": "Frigideira"})
+    assert repo.autocomplete("panel", 10) == [first]
+    assert repo.autocomplete("frig", 10) == [updated]
+
+    repo.delete(first.id)
+    assert repo.autocomplete("panel", 10) == []
+    repo.clear()
+    assert repo.autocomplete("frig", 10) == []
+
+
+# --- Testes do Contrato Comum dos Backends ---
+
+def test_crud_round_trip(repo):
+    """Exercita criação, leitura, atualização e exclusão em cada backend."""
+    product = repo.save({"name": "Cadeira", "price": 250, "description": "Madeira"})
+    assert product.id == 1
+    assert repo.find_by_id(1).to_dict() == {"id": 1, "name": "Cadeira", "price": 250, "description": "Madeira"}
+
+    updated = repo.update(1, {"price": 199.9})
+    assert updated.to_dict() == {"id": 1, "name": "Cadeira", "price": 199.9, "description": "Madeira"}
+    assert repo.update(99, {"price": 1}) is None
+
+    assert repo.count() == 1
+    assert repo.delete(1) is True
+    assert repo.delete(1) is False
+    assert repo.find_by_id(1) is None
+    assert repo.count() == 0
+
+
+@pytest.mark.parametrize("price, encoded", [(10, b'"price":10}'), (10.0, b'"price":10.0}')])
+def test_prices_keep_their_stored_type(repo, price, encoded):
+    """Preços inteiros voltam inteiros e 10.0 volta como 10.0, em todos os backends e leituras."""
+    saved = repo.save({"name": "Caneca", "price": price})
+    assert saved.to_json().endswith(encoded)
+    assert repo.find_by_id(saved.id).to_json() == saved.to_json()
+    assert repo.find_page(10)[0][0].to_json() == saved.to_json()
+
+
+def test_ids_are_not_reused_after_delete(repo):
+    """Garante que um ID excluído não é atribuído novamente."""
+    repo.save({"name": "A", "price": 1})
+    second = repo.save({"name": "B", "price": 2})
+    repo.delete(second.id)
+    assert repo.save({"name": "C", "price": 3}).id == 3
+
+
+def test_find_page_walks_catalogue_in_id_order(repo):
+    """Percorre o catálogo página a página e por lotes."""
+    for i in range(7):
+        repo.save({"name": f"P{i}", "price": i})
+    repo.delete(4)
+
+    page, next_id = repo.find_page(3)
+    assert [p.id for p in page] == [1, 2, 3]
+    page, next_id = repo.find_page(3, next_id)
+    assert [p.id for p in page] == [5, 6, 7]
+    assert next_id is None
+    assert [len(batch) for batch in repo.iter_batches(4)] == [4, 2]
+
+
+@pytest.mark.parametrize("sort", ["id", "name", "price"])
+@pytest.mark.parametrize("min_price, max_price", [(None, None), (20, None), (None, 35), (15, 40), (50, 10)])
+def test_find_page_filters_and_sorts_like_full_scan(repo, sort, min_price, max_price):
+    """Compara as páginas filtradas e ordenadas com uma varredura completa."""
+    rng = random.Random(7)
+    for i in range(60):
+        repo.save({"name": rng.choice(["Mesa", "cadeira", "Sofá", "banco"]) + f" {i % 5}", "price": rng.randint(0, 50)})
+    for pid in range(1, 61, 6):
+        repo.update(pid, {"price": rng.randint(0, 50), "name": f"Estante {pid}"})
+    for pid in range(3, 61, 9):
+        repo.delete(pid)
+
+    expected = [
+        p for p in repo.find_all()
+        if (min_price is None or p.price >= min_price) and (max_price is None or p.price <= max_price)
+    ]
+    expected.sort(key=lambda p: p.sort_key(sort))
+
+    seen, after = [], None
+    while True:
+        page, after = repo.find_page(7, after, sort, min_price, max_price)
+        seen.extend(page)
+        if after is None:
+            break
+    assert seen == expected
+
+
+def test_price_aggregates_follow_writes(repo):
+    """Compara os agregados mantidos incrementalmente com um cálculo por varredura."""
+    rng = random.Random(11)
+    for i in range(80):
+        repo.save({"name": f"P{i}", "price": rng.randint(0, 200)})
+    for pid in range(1, 81, 4):
+        repo.update(pid, {"price": rng.randint(0, 200)})
+    # Exclui o mais barato e o mais caro para forçar a troca do mínimo e do máximo
+    for _ in range(3):
+        products = repo.find_all()
+        repo.delete(min(products, key=lambda p: p.price).id)
+        repo.delete(max(products, key=lambda p: p.price).id)
+
+    prices = [p.price for p in repo.find_all()]
+    assert repo.get_price_summary() == (len(prices), sum(prices), min(prices), max(prices))
+    edges = (0, 50, 100.5, 150)
+    expected = [
+        sum(1 for price in prices if low <= price and (high is None or price < high))
+        for low, high in zip(edges, list(edges[1:]) + [None])
+    ]
+    assert repo.count_by_price(edges) == expected
+
+    repo.clear()
+    assert repo.get_price_summary() == (0, 0, None, None)
+    assert repo.count_by_price(edges) == [0, 0, 0, 0]
+
+
+def test_price_total_does_not_drift(repo):
+    """Somar e depois subtrair o mesmo preço deixa o total exato (sem resíduo de float)."""
+    first = repo.save({"name": "A", "price": 0.1})
+    repo.save({"name": "B", "price": 0.2})
+    repo.delete(first.id)
+    assert repo.get_price_summary()[1] == 0.2
+
+    for i in range(200):
+        repo.save({"name": f"C{i}", "price": 0.1 * (i % 7)})
+    repo.update_many([(pid, {"price": 1.1}) for pid in range(3, 203, 2)])
+    repo.delete_many(range(3, 203))
+    assert repo.get_price_summary()[1] == 0.2
+
+
+def test_sqlite_recomputes_legacy_price_total(tmp_path):
+    """Bases com o antigo total em float têm a soma exata recalculada ao abrir."""
+    path = str(tmp_path / "legacy.db")
+    repository = SQLiteProductRepository(path)
+    repository.save_many([{"name": "A", "price": 0.1}, {"name": "B", "price": 0.2}])
+    with repository._transaction() as conn:
+        conn.execute("DELETE FROM meta WHERE key = 'price_sum'")
+        conn.execute("INSERT INTO meta (key, value) VALUES ('price_total', 0.30000000000000004)")
+    repository.close()
+
+    repository = SQLiteProductRepository(path)
+    repository.delete(1)
+    assert repository.get_price_summary()[1] == 0.2
+    repository.close()
+
+
+def test_service_works_on_any_backend(repo):
+    """Verifica que o ProductService funciona igual sobre qualquer backend."""
+    service = ProductService(repo)
+    created, error = service.create_product({"name": "Mesa", "price": 300})
+    assert error is None
+    assert service.get_product_by_id(created.id).name == "Mesa"
+    assert service.get_products_by_name("MES") == [created]
+    assert service.get_products_count() == 1
+
+
+def test_versions_advance_on_every_write(repo):
+    """A versão global cresce a cada escrita; a do produto acompanha a sua última alteração."""
+    start = repo.get_version()
+    first = repo.save({"name": "A", "price": 1})
+    repo.save({"name": "B", "price": 2})
+    assert repo.get_version() == start + 2
+    assert repo.get_product_version(first.id) == start + 1
+
+    repo.update(first.id, {"price": 3})
+    assert repo.get_product_version(first.id) == start + 3
+    repo.update(999, {"price": 3})
+    assert repo.get_version() == start + 3
+
+    repo.delete(first.id)
+    assert repo.get_product_version(first.id) is None
+    assert repo.get_version() == start + 4
+
+
+def test_change_log_records_writes_in_order(repo, monkeypatch):
+    """Verifica o histórico de alterações, a consulta incremental e a retenção limitada."""
+    start = repo.get_version()
+    first = repo.save({"name": "Caneca", "price": 10})
+    repo.update(first.id, {"price": 12})
+    repo.delete(first.id)
+    repo.clear()
+
+    changes = repo.get_changes(start, 10)
+    assert [(version - start, op, pid) for version, op, pid, _ in changes] == [
+        (1, "create", 1), (2, "update", 1), (3, "delete", 1), (4, "clear", None),
+    ]
+    assert changes[1][3].price == 12
+    assert repo.get_changes(start + 1, 2) == changes[1:3]
+    assert repo.get_changes(repo.get_version(), 10) == []
+
+    # Com retenção pequena (5 alterações; 16 no anel do backend partilhado),
+    # versões mais antigas deixam de estar disponíveis
+    if isinstance(repo, ProductRepository):
+        monkeypatch.setattr(product_repository._change_feed, "retention", 5)
+    elif isinstance(repo, SQLiteProductRepository):
+        repo.change_retention = 5
+    for i in range(20):
+        repo.save({"name": f"P{i}", "price": i})
+    assert repo.get_changes(start, 10) is None
+    assert len(repo.get_changes(repo.get_version() - 5, 10)) == 5
+
+
+def test_wait_for_changes(repo):
+    """Verifica que a espera termina com uma escrita e expira sem ela."""
+    version = repo.get_version()
+    assert repo.wait_for_changes(version, 0.05) is False
+    timer = threading.Timer(0.05, lambda: repo.save({"name": "Novo", "price": 1}))
+    timer.start()
+    assert repo.wait_for_changes(version, 5) is True
+    timer.join()
+
+
+def test_encoded_products_follow_updates(repo):
+    """O JSON em cache de cada produto é descartado quando ele é alterado."""
+    repo.save({"name": "Lâmpada", "price": 9.9})
+    fragments, _ = repo.find_page_encoded(10)
+    assert [json.loads(f) for f in fragments] == [p.to_dict() for p in repo.find_all()]
+
+    repo.update(1, {"price": 7.5})
+    assert json.loads(repo.find_by_id_encoded(1))["price"] == 7.5
+    fragments, _ = repo.find_page_encoded(10)
+    assert json.loads(fragments[0])["price"] == 7.5
+    assert [json.loads(f) for batch in repo.iter_encoded_batches(1) for f in batch] == [
+        p.to_dict() for p in repo.find_all()
+    ]
+
+
+def test_encoding_without_orjson(monkeypatch):
+    """Sem orjson, a codificação recorre ao módulo json da biblioteca padrão."""
+    monkeypatch.setattr(json_codec, "orjson", None)
+    assert json.loads(json_codec.dumps_bytes({"name": "Pão", "price": 1})) == {"name": "Pão", "price": 1}
+
+
+def test_encoding_falls_back_when_orjson_rejects_the_value():
+    """Valores que o orjson recusa (inteiros acima de 64 bits) são codificados pelo módulo json."""
+    assert json_codec.dumps_bytes({"price": 10**30}) == b'{"price":1000000000000000000000000000000}'
+    with pytest.raises(TypeError):
+        json_codec.dumps_bytes({"x": object()})
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_encoding_of_extra_types_matches_flask(monkeypatch, use_orjson):
+    """Datas, Decimal, UUID e dataclasses saem como no provider padrão do Flask."""
+    import dataclasses
+    import datetime
+    import decimal
+    import uuid
+    from flask import Flask
+
+    @dataclasses.dataclass
+    class Point:
+        x: int
+
+    value = {
+        "date": datetime.date(2024, 5, 1),
+        "when": datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.timezone.utc),
+        "amount": decimal.Decimal("1.10"),
+        "uid": uuid.UUID(int=1),
+        "point": Point(3),
+    }
+    if not use_orjson:
+        monkeypatch.setattr(json_codec, "orjson", None)
+    expected = json.loads(Flask(__name__).json.dumps(value))
+    assert json.loads(json_codec.dumps_bytes(value)) == expected
+    with pytest.raises(TypeError):
+        json_codec.dumps_bytes({"x": object()})
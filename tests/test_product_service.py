@@ -1,8 +1,11 @@
 # /tests/test_product_service.py
+import threading
+import time
 import pytest
 from unittest.mock import MagicMock
 from app.services.product_service import ProductService
 from app.repositories.product_repository import ProductRepository
+from app.services.search_cache import SearchResultCache
 
 
 # --- Fixtures de Teste ---
@@ -95,3 +98,124 @@ def test_delete_product_failure(product_service, mock_product_repository):
     assert not success
     assert error == "Produto com ID 99 não encontrado."
     mock_product_repository.delete.assert_called_once_with(99)
+
+
+def test_create_products_saves_valid_items_in_one_call(product_service, mock_product_repository):
+    """Testa que o lote valida cada item e grava os válidos numa única chamada."""
+    items = [{'name': 'A', 'price': 1.0}, {'name': 'B', 'price': -1.0}, {'name': 'C', 'price': 'caro'}]
+    mock_product_repository.save_many.return_value = [{**items[0], 'id': 1}]
+
+    results = product_service.create_products(items)
+
+    mock_product_repository.save_many.assert_called_once_with([items[0]])
+    assert [r['status'] for r in results] == [201, 400, 400]
+    assert results[1]['erro']['message'] == "O preço do produto não pode ser negativo."
+    assert results[2]['erro']['message'] == "O preço do produto deve ser numérico."
+
+
+def test_update_products_rejects_boolean_ids(product_service, mock_product_repository):
+    """true e false não são IDs, embora bool seja subclasse de int em Python."""
+    mock_product_repository.update_many.return_value = []
+
+    results = product_service.update_products([{'id': True, 'price': 3}, {'id': False, 'price': 3}])
+
+    mock_product_repository.update_many.assert_called_once_with([])
+    assert [r['status'] for r in results] == [400, 400]
+    assert results[0]['erro']['message'] == "O campo 'id' é obrigatório."
+
+
+# --- Testes da Cache de Buscas ---
+
+def test_search_cache_hits_until_version_changes(mock_product_repository):
+    """A mesma consulta (sem diferenciar maiúsculas) só volta ao repositório depois de uma escrita."""
+    service = ProductService(mock_product_repository, search_cache_max_results=4)
+    mock_product_repository.get_version.return_value = 1
+    mock_product_repository.find_by_name.return_value = ["resultado"]
+
+    assert service.get_products_by_name("Caneta") == ["resultado"]
+    assert service.get_products_by_name("CANETA") == ["resultado"]
+    mock_product_repository.find_by_name.assert_called_once_with("caneta")
+
+    mock_product_repository.get_version.return_value = 2
+    service.get_products_by_name("caneta")
+    assert mock_product_repository.find_by_name.call_count == 2
+
+    # Limitada a 4 (2 consultas de um resultado): a menos usada recentemente sai primeiro
+    service.get_products_by_name("lápis")
+    service.get_products_by_name("borracha")
+    service.get_products_by_name("caneta")
+    assert mock_product_repository.find_by_name.call_count == 5
+    stats = service.search_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"], stats["results"]) == (1, 5, 2, 4)
+    assert stats["hit_ratio"] == pytest.approx(1 / 6)
+
+
+def test_search_cache_is_bounded_by_result_size():
+    """Consultas com resultados grandes ocupam mais: o limite é o total de produtos guardados."""
+    cache = SearchResultCache(max_results=10)
+    cache.get_or_load("a", 1, lambda: range(4))
+    cache.get_or_load("b", 1, lambda: range(4))
+    assert cache.stats()["results"] == 10
+    # Não cabe sem expulsar 'a', a menos usada recentemente
+    cache.get_or_load("c", 1, lambda: range(2))
+    assert (cache.stats()["entries"], cache.stats()["results"]) == (2, 8)
+    assert cache.get_or_load("b", 1, lambda: pytest.fail("'b' foi expulsa")) == [0, 1, 2, 3]
+    # Um resultado maior que o limite não é guardado
+    assert cache.get_or_load("d", 1, lambda: range(20)) == list(range(20))
+    assert cache.stats()["results"] == 8
+
+
+def test_search_cache_drops_stale_entries_on_lookup():
+    """Uma entrada de uma versão anterior é descartada logo na consulta, mesmo que o recálculo falhe."""
+    cache = SearchResultCache()
+    cache.get_or_load("caneta", 1, lambda: range(100))
+
+    def failing():
+        raise RuntimeError("falha")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("caneta", 2, failing)
+    assert (cache.stats()["entries"], cache.stats()["results"]) == (0, 0)
+
+
+def test_search_cache_coalesces_concurrent_misses():
+    """Buscas iguais e simultâneas fazem uma única varredura e recebem o mesmo resultado."""
+    cache = SearchResultCache()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return ["resultado"]
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_load("caneta", 1, load)))
+    leader.start()
+    started.wait(5)
+    followers = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load("caneta", 1, load))) for _ in range(5)
+    ]
+    for thread in followers:
+        thread.start()
+    while cache.stats()["coalesced"] < 5:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert calls == [1]
+    assert results == [["resultado"]] * 6
+    assert (cache.stats()["misses"], cache.stats()["coalesced"]) == (1, 5)
+
+
+def test_search_cache_propagates_errors_without_caching():
+    cache = SearchResultCache()
+
+    def failing():
+        raise RuntimeError("falha")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("caneta", 1, failing)
+    assert cache.get_or_load("caneta", 1, lambda: ["ok"]) == ["ok"]
@@ -0,0 +1,112 @@
+# /tests/test_rate_limit.py
+import pytest
+from app import create_app
+from app.utils import rate_limit
+from app.utils.rate_limit import CONCURRENCY_LIMITED, RATE_LIMITED, PartnerLimiter, RateLimiter
+
+# --- Fixtures de Teste ---
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limit, "monotonic", fake)
+    return fake
+
+@pytest.fixture
+def app():
+    """Aplicação de teste com limites apertados para o parceiro de teste."""
+    flask_app = create_app('testing')
+    partners = {"partner_123": {"rate_limit": {"requests_per_second": 1, "burst": 2, "max_concurrent": 4}}}
+    flask_app.extensions["rate_limiter"] = RateLimiter(partners)
+    return flask_app
+
+@pytest.fixture
+def headers(app):
+    credentials = {"client_id": "partner_123", "client_secret": "super_secret_key_123"}
+    token = app.test_client().post('/auth/login', json=credentials).get_json()['data']['token']
+    return {'Authorization': f'Bearer {token}'}
+
+# --- Testes do Token Bucket ---
+
+def test_bucket_allows_burst_then_refills_at_rate(clock):
+    limiter = PartnerLimiter(requests_per_second=2, burst=3)
+    for _ in range(3):
+        assert limiter.acquire() == (None, 0.0)
+        limiter.release()
+    reason, wait = limiter.acquire()
+    assert reason == RATE_LIMITED
+    assert wait == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert limiter.acquire() == (None, 0.0)
+    # A capacidade nunca passa de 'burst', mesmo depois de muito tempo parado
+    clock.now += 60
+    assert [limiter.acquire()[0] for _ in range(4)] == [None, None, None, RATE_LIMITED]
+
+
+def test_concurrency_cap_counts_requests_in_flight(clock):
+    limiter = PartnerLimiter(max_concurrent=2)
+    assert limiter.acquire()[0] is None
+    assert limiter.acquire()[0] is None
+    assert limiter.acquire()[0] == CONCURRENCY_LIMITED
+    limiter.release()
+    assert limiter.acquire()[0] is None
+    assert (limiter.admitted, limiter.rejected[CONCURRENCY_LIMITED], limiter.active) == (3, 1, 2)
+
+
+def test_partners_without_limits_use_the_default():
+    limiter = RateLimiter({"a": {"rate_limit": {"max_concurrent": 1}}, "b": {}}, {"requests_per_second": 5})
+    assert limiter.limiter_for("a").max_concurrent == 1
+    assert limiter.limiter_for("b").rate == 5
+    assert limiter.limiter_for("desconhecido").rate == 5
+    assert RateLimiter({"a": {}}).limiter_for("a") is None
+
+# --- Testes das Rotas ---
+
+def test_rate_limited_requests_get_429_before_repository_work(app, headers, clock, monkeypatch):
+    client = app.test_client()
+    assert client.get('/produtos/count', headers=headers).status_code == 200
+    assert client.get('/produtos/count', headers=headers).status_code == 200
+
+    service = app.extensions["product_service"]
+    with monkeypatch.context() as patched:
+        patched.setattr(service, "get_catalogue_version", lambda: pytest.fail("repositório consultado"))
+        response = client.get('/produtos/count', headers=headers)
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+    assert response.get_json()['status'] == 'error'
+
+    clock.now += 1
+    assert client.get('/produtos/count', headers=headers).status_code == 200
+
+
+def test_concurrency_slots_are_released_after_each_request(app, headers, clock):
+    client = app.test_client()
+    limiter = app.extensions["rate_limiter"].limiter_for("partner_123")
+    limiter.rate = None
+    for _ in range(10):
+        assert client.get('/produtos/count', headers=headers).status_code == 200
+    assert limiter.active == 0
+
+    # Com as vagas ocupadas por outras requisições, a seguinte é rejeitada
+    for _ in range(4):
+        limiter.acquire()
+    response = client.get('/produtos/count', headers=headers)
+    assert response.status_code == 429
+    assert 'Retry-After' in response.headers
+
+    metrics = client.get('/metrics').get_data(as_text=True)
+    assert 'rate_limit_requests_total{client_id="partner_123",result="rejected_concurrency"} 1' in metrics
+    assert 'rate_limit_active_requests{client_id="partner_123"} 4' in metrics
+
+
+def test_rate_limit_disabled_in_testing_config():
+    assert create_app('testing').extensions["rate_limiter"] is None
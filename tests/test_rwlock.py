@@ -0,0 +1,41 @@
+# /tests/test_rwlock.py
+import threading
+from app.utils.rwlock import RWLock
+
+
+def test_readers_share_the_lock():
+    """Verifica que dois leitores conseguem manter o lock ao mesmo tempo."""
+    lock = RWLock()
+    both_inside = threading.Barrier(2, timeout=2)
+
+    def reader():
+        with lock.read():
+            both_inside.wait()
+
+    threads = [threading.Thread(target=reader) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not both_inside.broken
+
+
+def test_writer_excludes_readers():
+    """Verifica que um leitor espera enquanto há um escritor ativo."""
+    lock = RWLock()
+    events = []
+    lock.acquire_write()
+
+    def reader():
+        with lock.read():
+            events.append("read")
+
+    t = threading.Thread(target=reader)
+    t.start()
+    t.join(timeout=0.1)
+    assert events == []
+
+    events.append("write-done")
+    lock.release_write()
+    t.join(timeout=2)
+    assert events == ["write-done", "read"]
@@ -0,0 +1,67 @@
+# /tests/test_security.py
+import time
+import jwt
+import pytest
+from unittest.mock import patch
+from app import create_app
+from app.utils.security import VerifiedTokenCache
+
+
+# --- Fixtures de Teste ---
+
+@pytest.fixture
+def app():
+    """Aplicação de teste isolada (cada teste tem a sua cache de tokens)."""
+    return create_app('testing')
+
+
+def make_token(secret, seconds=3600):
+    return jwt.encode({'client_id': 'partner_123', 'exp': int(time.time()) + seconds}, secret, algorithm="HS256")
+
+
+# --- Testes da Cache de Tokens Verificados ---
+
+def test_cache_hit_skips_jwt_decode(app):
+    """Um token repetido é verificado apenas uma vez."""
+    client = app.test_client()
+    headers = {'Authorization': f"Bearer {make_token(app.config['SECRET_KEY'])}"}
+
+    with patch('app.utils.security.jwt.decode', wraps=jwt.decode) as decode:
+        for _ in range(3):
+            assert client.get('/produtos/count', headers=headers).status_code == 200
+    assert decode.call_count == 1
+    stats = app.extensions['token_cache'].stats()
+    assert (stats['hits'], stats['misses']) == (2, 1)
+
+
+def test_cache_is_invalidated_when_secret_key_rotates(app):
+    """Após rotação da SECRET_KEY, tokens antigos voltam a ser verificados (e rejeitados)."""
+    client = app.test_client()
+    headers = {'Authorization': f"Bearer {make_token(app.config['SECRET_KEY'])}"}
+    assert client.get('/produtos/count', headers=headers).status_code == 200
+
+    app.config['SECRET_KEY'] = 'chave_rotacionada'
+    response = client.get('/produtos/count', headers=headers)
+    assert response.status_code == 401
+    assert "Token inválido" in response.get_json()['erro']['message']
+
+
+def test_cache_honors_token_expiry():
+    """Uma entrada deixa de ser servida quando o 'exp' do token passa."""
+    cache = VerifiedTokenCache()
+    cache.put('token', {'exp': time.time() + 60}, 'segredo')
+    assert cache.get('token', 'segredo') is not None
+    with patch('app.utils.security.time.time', return_value=time.time() + 61):
+        assert cache.get('token', 'segredo') is None
+    assert cache.stats()['size'] == 0
+
+
+def test_cache_evicts_least_recently_used():
+    """A cache respeita o tamanho máximo, descartando a entrada menos usada."""
+    cache = VerifiedTokenCache(max_size=2)
+    for token in ('a', 'b'):
+        cache.put(token, {'exp': None}, 'segredo')
+    cache.get('a', 'segredo')
+    cache.put('c', {'exp': None}, 'segredo')
+    assert cache.get('b', 'segredo') is None
+    assert cache.get('a', 'segredo') is not None
@@ -0,0 +1,157 @@
+# /tests/test_shared_product_repository.py
+import multiprocessing
+import pytest
+from app.repositories.shared_product_repository import SharedMemoryProductRepository
+
+WORKERS = 4
+PRODUCTS_PER_WORKER = 150
+
+
+def _worker(path, worker, results):
+    """Simula um worker do gunicorn: abre o mesmo ficheiro e escreve no catálogo partilhado."""
+    repo = SharedMemoryProductRepository(path)
+    created = []
+    for i in range(PRODUCTS_PER_WORKER):
+        product = repo.save({"name": f"w{worker}-{i}", "price": float(i)})
+        created.append(product.id)
+        # Lê logo a seguir: o produto deve existir, inclusive depois das escritas dos outros
+        assert repo.find_by_id(product.id).name == f"w{worker}-{i}"
+    for product_id in created:
+        repo.update(product_id, {"price": 1000.0 + worker})
+    for product_id in created[::10]:
+        repo.delete(product_id)
+    results.put((worker, created))
+    repo.close()
+
+
+def _run_workers(target, args_for):
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    processes = [context.Process(target=target, args=(*args_for(worker), results)) for worker in range(WORKERS)]
+    for process in processes:
+        process.start()
+    collected = dict(results.get(timeout=60) for _ in processes)
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+    return collected
+
+
+# --- Testes com Vários Processos ---
+
+def test_concurrent_workers_share_catalogue_and_ids(tmp_path):
+    """Vários processos escrevem ao mesmo tempo: IDs únicos e o mesmo catálogo visto por todos."""
+    path = str(tmp_path / "products.store")
+    repo = SharedMemoryProductRepository(path, capacity=4096, change_retention=4096)
+    created = _run_workers(_worker, lambda worker: (path, worker))
+
+    all_ids = sorted(pid for ids in created.values() for pid in ids)
+    total = WORKERS * PRODUCTS_PER_WORKER
+    assert all_ids == list(range(1, total + 1))
+
+    deleted = {pid for ids in created.values() for pid in ids[::10]}
+    products = repo.find_all()
+    assert [p.id for p in products] == [pid for pid in all_ids if pid not in deleted]
+    for worker, ids in created.items():
+        for product_id in ids:
+            if product_id not in deleted:
+                assert repo.find_by_id(product_id).price == 1000.0 + worker
+        assert len(repo.find_by_name(f"w{worker}-")) == PRODUCTS_PER_WORKER - len(ids[::10])
+
+    # Cada escrita de qualquer processo avança a versão partilhada e fica no histórico
+    assert repo.get_version() == 2 * total + len(deleted)
+    changes = repo.get_changes(0, 10_000)
+    assert [change[0] for change in changes] == list(range(1, repo.get_version() + 1))
+    repo.close()
+
+
+def _forked_worker(repo, worker, results):
+    """Worker que herda o repositório aberto antes do fork (preload_app do gunicorn)."""
+    ids = [repo.save({"name": f"f{worker}-{i}", "price": 1.0}).id for i in range(50)]
+    results.put((worker, ids))
+
+
+def test_repository_opened_before_fork(tmp_path):
+    """O flock não pode ser partilhado com o processo pai através de descritores herdados."""
+    repo = SharedMemoryProductRepository(str(tmp_path / "products.store"), capacity=4096)
+    repo.save({"name": "Antes do fork", "price": 1.0})
+    created = _run_workers(_forked_worker, lambda worker: (repo, worker))
+    assert sorted(pid for ids in created.values() for pid in ids) == list(range(2, 2 + WORKERS * 50))
+    assert repo.count() == 1 + WORKERS * 50
+    repo.close()
+
+
+# --- Testes de Falhas nas Escritas ---
+
+def test_batch_over_capacity_changes_nothing(tmp_path):
+    """Um lote que não cabe na capacidade é rejeitado antes de qualquer alteração."""
+    path = str(tmp_path / "products.store")
+    repo = SharedMemoryProductRepository(path, capacity=4)
+    with pytest.raises(RuntimeError):
+        repo.save_many([{"name": f"p{i}", "price": 1.0} for i in range(5)])
+    assert repo.count() == 0
+    assert repo.save({"name": "Primeiro", "price": 1.0}).id == 1
+    repo.close()
+
+
+def test_failure_midway_rolls_back_file_and_replica(tmp_path, monkeypatch):
+    """Uma falha a meio do lote não deixa alterações parciais na réplica nem no ficheiro."""
+    path = str(tmp_path / "products.store")
+    repo = SharedMemoryProductRepository(path)
+    existing = repo.save({"name": "Existente", "price": 1.0})
+    version = repo.get_version()
+
+    original = repo._append_record
+    calls = []
+
+    def failing_append(header, product):
+        calls.append(product)
+        if len(calls) == 3:
+            raise OSError("sem espaço")
+        return original(header, product)
+
+    monkeypatch.setattr(repo, "_append_record", failing_append)
+    with pytest.raises(OSError):
+        repo.update_many([(existing.id, {"price": 2.0}), (existing.id, {"price": 3.0}), (existing.id, {"price": 4.0})])
+    with pytest.raises(OSError):
+        calls.clear()
+        repo.save_many([{"name": f"p{i}", "price": 1.0} for i in range(3)])
+    monkeypatch.undo()
+
+    other = SharedMemoryProductRepository(path)
+    for current in (repo, other):
+        assert current.get_version() == version
+        assert current.find_all() == [existing]
+    # A tabela continua a apontar para o registo original, mesmo depois de novas escritas no heap
+    assert repo.save({"name": "Novo", "price": 5.0}).id == 2
+    assert other.find_by_id(existing.id) == existing
+    repo.close()
+    other.close()
+
+# --- Testes do Heap ---
+
+def test_compaction_keeps_catalogue_and_drops_old_history(tmp_path):
+    """Atualizações geram lixo no heap; a compactação recupera-o sem perder produtos."""
+    path = str(tmp_path / "products.store")
+    repo = SharedMemoryProductRepository(path, capacity=1024, compact_min_bytes=4096)
+    other = SharedMemoryProductRepository(path)
+    for i in range(20):
+        repo.save({"name": f"Produto {i}", "price": 1.0})
+    start = repo.get_version()
+    for round_ in range(50):
+        repo.update(1 + round_ % 20, {"price": float(round_), "description": "x" * 50})
+
+    assert other.find_by_id(10).price == 49.0
+    assert [p.to_dict() for p in other.find_all()] == [p.to_dict() for p in repo.find_all()]
+    assert repo.get_changes(start, 10) is None
+    assert repo.get_changes(repo.get_version() - 1, 10)[0][3].price == 49.0
+    repo.close()
+    other.close()
+
+
+def test_rejects_invalid_file(tmp_path):
+    """Um ficheiro que não é um armazenamento partilhado é recusado em vez de sobrescrito."""
+    path = tmp_path / "products.store"
+    path.write_bytes(b"x" * 8192)
+    with pytest.raises(ValueError):
+        SharedMemoryProductRepository(str(path))
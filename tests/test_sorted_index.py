@@ -0,0 +1,64 @@
+# /tests/test_sorted_index.py
+import random
+from app.repositories.sorted_index import SortedIndex
+
+
+def test_sorted_index_matches_sorted_list():
+    """Compara o índice em blocos (blocos pequenos, para forçar divisões) com uma lista ordenada."""
+    rng = random.Random(3)
+    index = SortedIndex(block_size=4)
+    reference = set()
+    for _ in range(2000):
+        key = (rng.randint(0, 50), rng.randint(0, 200))
+        if key in reference and rng.random() < 0.5:
+            index.remove(key)
+            reference.discard(key)
+        elif key not in reference:
+            index.add(key)
+            reference.add(key)
+    expected = sorted(reference)
+    assert list(index.irange()) == expected
+    assert len(index) == len(expected)
+
+    start = expected[len(expected) // 2]
+    assert list(index.irange(start)) == [k for k in expected if k >= start]
+    assert list(index.irange(start, inclusive=False)) == [k for k in expected if k > start]
+    assert list(index.irange((25,))) == [k for k in expected if k >= (25,)]
+    assert list(index.irange((99,))) == []
+    assert index.first() == expected[0] and index.last() == expected[-1]
+    for key in [(0,), (25,), (25, 100), (99,), expected[7]]:
+        assert index.rank(key) == sum(1 for k in expected if k < key)
+
+
+def test_rank_follows_every_change():
+    """A contagem por bloco (árvore de Fenwick) acompanha inserções, remoções, divisões e blocos esvaziados."""
+    rng = random.Random(5)
+    index = SortedIndex(block_size=3)
+    index.load([(rng.randint(0, 100), i) for i in range(50)])
+    reference = set(index.irange())
+    for i in range(3000):
+        if reference and rng.random() < 0.45:
+            key = rng.choice(sorted(reference))
+            index.remove(key)
+            reference.discard(key)
+        else:
+            key = (rng.randint(0, 100), 1000 + i)
+            index.add(key)
+            reference.add(key)
+        if i % 50 == 0:
+            probe = (rng.randint(0, 101),)
+            assert index.rank(probe) == sum(1 for k in reference if k < probe)
+    assert [index.rank((price,)) for price in range(102)] == [
+        sum(1 for k in reference if k[0] < price) for price in range(102)
+    ]
+
+
+def test_sorted_index_load_and_remove_missing():
+    """Testa a carga em bloco e a remoção de chaves inexistentes."""
+    index = SortedIndex(block_size=2)
+    index.load([(3, 1), (1, 2), (2, 3), (1, 1)])
+    index.remove((9, 9))
+    index.remove((1, 2))
+    assert list(index.irange()) == [(1, 1), (2, 3), (3, 1)]
+    index.clear()
+    assert list(index.irange()) == []
@@ -0,0 +1,130 @@
+# /tests/test_write_log.py
+import os
+import pytest
+from app.repositories import product_repository
+from app.repositories.product_repository import ProductRepository, enable_durability, disable_durability
+
+
+# --- Fixtures de Teste ---
+
+@pytest.fixture
+def repo():
+    """Repositório em memória limpo, sem durabilidade ativa ao terminar."""
+    repository = ProductRepository()
+    repository.clear()
+    yield repository
+    disable_durability()
+    repository.clear()
+
+
+def restart(repo, directory, **kwargs):
+    """Simula um reinício do processo: descarta a memória e recupera do disco."""
+    disable_durability()
+    repo.clear()
+    enable_durability(directory, **kwargs)
+
+
+# --- Testes de Durabilidade ---
+
+def test_state_survives_restart(repo, tmp_path):
+    """Recupera produtos, alterações, exclusões e o próximo ID após reiniciar."""
+    enable_durability(str(tmp_path))
+    repo.save({"name": "Caneca", "price": 20})
+    repo.save({"name": "Prato", "price": 35})
+    third = repo.save({"name": "Copo", "price": 10})
+    repo.update(1, {"price": 25})
+    repo.delete(third.id)
+    version, product_version = repo.get_version(), repo.get_product_version(1)
+
+    restart(repo, str(tmp_path))
+
+    assert repo.get_version() == version
+    assert repo.get_product_version(1) == product_version
+    assert [p.to_dict() for p in repo.find_all()] == [
+        {"id": 1, "name": "Caneca", "price": 25},
+        {"id": 2, "name": "Prato", "price": 35},
+    ]
+    assert repo.find_by_name("cane")[0].id == 1
+    # O ID 3 foi excluído antes do reinício e não deve ser reutilizado
+    assert repo.save({"name": "Garfo", "price": 5}).id == 4
+
+
+def test_snapshot_compacts_log(repo, tmp_path):
+    """Após um snapshot, os segmentos antigos são apagados e a cauda é reaplicada."""
+    enable_durability(str(tmp_path))
+    for i in range(10):
+        repo.save({"name": f"Produto {i}", "price": i})
+    product_repository._write_log.snapshot()
+    repo.update(2, {"name": "Alterado depois do snapshot"})
+    version = repo.get_version()
+
+    logs = [name for name in os.listdir(tmp_path) if name.startswith("products.log.")]
+    assert len(logs) == 1
+
+    restart(repo, str(tmp_path))
+    assert repo.count() == 10
+    assert repo.find_by_id(2).name == "Alterado depois do snapshot"
+    assert repo.get_version() == version
+    assert repo.get_product_version(2) == version
+
+
+def test_torn_tail_is_discarded(repo, tmp_path):
+    """Um registo incompleto no fim do log (queda a meio da escrita) é ignorado."""
+    enable_durability(str(tmp_path))
+    repo.save({"name": "Completo", "price": 1})
+    log_path = product_repository._write_log._log_path(product_repository._write_log._generation)
+    disable_durability()
+    with open(log_path, "ab") as f:
+        f.write(b"\x01\xff\x00\x00\x00garbage")
+
+    repo.clear()
+    enable_durability(str(tmp_path))
+    assert [p.name for p in repo.find_all()] == ["Completo"]
+
+
+class FailingFile:
+    """Ficheiro cuja gravação falha (disco cheio, erro de E/S)."""
+
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, data):
+        raise OSError("sem espaço no disco")
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+def test_failed_write_fails_every_later_commit(repo, tmp_path):
+    """Depois de uma gravação falhar, nenhuma escrita seguinte é dada como durável."""
+    enable_durability(str(tmp_path))
+    repo.save({"name": "Gravado", "price": 1})
+    log = product_repository._write_log
+    real_file = log._file
+    log._file = FailingFile(real_file)
+    with pytest.raises(OSError):
+        repo.save({"name": "Perdido", "price": 2})
+    log._file = real_file
+    with pytest.raises(OSError):
+        repo.save({"name": "Depois da falha", "price": 3})
+
+    restart(repo, str(tmp_path))
+    assert [p.name for p in repo.find_all()] == ["Gravado"]
+    assert repo.get_version() == 1
+
+
+def test_corrupt_record_before_last_segment_stops_recovery(repo, tmp_path):
+    """Um registo corrompido num segmento que não é o último não pode ser saltado."""
+    enable_durability(str(tmp_path))
+    repo.save({"name": "Primeiro", "price": 1})
+    first_log = product_repository._write_log._log_path(product_repository._write_log._generation)
+    product_repository._write_log.rotate()
+    repo.save({"name": "Segundo", "price": 2})
+    disable_durability()
+    with open(first_log, "r+b") as f:
+        f.seek(-2, os.SEEK_END)
+        f.write(b"xx")
+
+    repo.clear()
+    with pytest.raises(ValueError):
+        enable_durability(str(tmp_path))